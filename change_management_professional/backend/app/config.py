@@ -9,13 +9,17 @@ load_dotenv()
 
 # Base directories
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", str(BASE_DIR / "data")))
 KNOWLEDGE_BASE_DIR = DATA_DIR / "change_management"
 PROCESSED_DIR = DATA_DIR / "processed"
+KB_INDEX_DIR = PROCESSED_DIR / "kb_index"
+# Index generation marker, bumped after every index change so all processes reload their indexes
+KB_GENERATION_FILE = KB_INDEX_DIR / "generation"
 
 # Create directories if they don't exist
 KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+KB_INDEX_DIR.mkdir(parents=True, exist_ok=True)
 
 # API settings
 API_PREFIX = "/api/v1"
@@ -73,15 +77,108 @@ MOCK_LLM = (settings.USE_MOCK_LLM or
 
 # Vector database settings
 VECTOR_DB_PATH = str(PROCESSED_DIR / "vectordb")
+# Snapshot written by scripts/ingest.py --export-snapshot, restored at startup when set
+KB_SNAPSHOT_PATH = os.getenv("KB_SNAPSHOT_PATH", "")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# "huggingface" (sentence-transformers on PyTorch) or "onnx" (ONNX Runtime, no PyTorch needed)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface").lower()
+# ONNX export and tokenizer of EMBEDDING_MODEL, downloaded on first use if missing
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", str(DATA_DIR / "models" / EMBEDDING_MODEL.replace("/", "__"))))
+# Padded tokens per ONNX inference call, and intra-op threads (0 = ONNX Runtime default)
+EMBEDDING_MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "8192"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+# Persist chunk embeddings keyed by model and chunk text hash so re-chunking and rebuilds only embed new text
+EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "True").lower() == "true"
+EMBEDDING_CACHE_PATH = Path(os.getenv("EMBEDDING_CACHE_PATH", str(PROCESSED_DIR / "embedding_cache.sqlite3")))
+# "chroma" (SQLite + HNSW) or "numpy" (exact search over a memory-mapped matrix in KB_INDEX_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+# Hash chunks across this many vector stores that are written and searched in parallel (1 = no sharding)
+VECTOR_SHARDS = int(os.getenv("VECTOR_SHARDS", "1"))
+VECTOR_SHARDS_DIR = PROCESSED_DIR / "vector_shards"
+# Store each ingest category in its own Chroma collection so filtered queries only scan that partition
+PARTITION_BY_CATEGORY = os.getenv("PARTITION_BY_CATEGORY", "True").lower() == "true"
+PARTITION_COLLECTION_PREFIX = "kb_"
 
 # Retrieval settings
 NUM_DOCS_TO_RETRIEVE = int(os.getenv("NUM_DOCS_TO_RETRIEVE", "5"))
-SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+# Minimum cosine similarity of vector search hits. Before it was compared as a cosine, the
+# threshold was applied to 1 - squared L2 distance = 2 * cosine - 1, so the former default
+# of 0.7 is the 0.85 below; convert explicit settings with (old + 1) / 2.
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+
+# "vector" for pure embedding search, "hybrid" to fuse it with BM25 keyword ranking
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector").lower()
+# Candidates taken from each ranking before reciprocal rank fusion, and the RRF constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Search in-memory "int8" or "float16" copies of the chunk vectors instead of Chroma ("none" disables).
+# The best QUANTIZED_RESCORE_CANDIDATES approximate hits are re-scored with the float32 vectors.
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+QUANTIZED_RESCORE_CANDIDATES = int(os.getenv("QUANTIZED_RESCORE_CANDIDATES", "100"))
+
+# Maximum number of queries accepted by one batch retrieval request
+RETRIEVE_MANY_MAX_QUERIES = int(os.getenv("RETRIEVE_MANY_MAX_QUERIES", "16"))
+
+# Query run at startup to load the embedding model before serving traffic
+WARM_UP_QUERY = os.getenv("WARM_UP_QUERY", "What is change management?")
+
+# Number of normalized queries whose embeddings are kept in memory (0 disables)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# Cached top-k results per normalized query, invalidated whenever the index changes
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "300"))
+
+# Thread pool running embedding and vector search off the event loop (0 queue = unbounded)
+RETRIEVAL_THREADS = int(os.getenv("RETRIEVAL_THREADS", "4"))
+RETRIEVAL_MAX_QUEUE = int(os.getenv("RETRIEVAL_MAX_QUEUE", "64"))
 
 # RAG settings
 DOCUMENT_CHUNK_SIZE = int(os.getenv("DOCUMENT_CHUNK_SIZE", "1000"))
 DOCUMENT_CHUNK_OVERLAP = int(os.getenv("DOCUMENT_CHUNK_OVERLAP", "200"))
+# Upper bound on the estimated tokens of the system prompt, knowledge base context, chat history and query
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Characters per token used to estimate prompt sizes without calling the LLM API
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))
+# A chunk that does not fit is cut to the remaining budget only if at least this many tokens remain
+CONTEXT_MIN_PARTIAL_TOKENS = int(os.getenv("CONTEXT_MIN_PARTIAL_TOKENS", "64"))
+
+# Ingestion settings - chunks per embedding/write batch and batches between persists (0 = only at the end)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "512"))
+INGEST_PERSIST_INTERVAL = int(os.getenv("INGEST_PERSIST_INTERVAL", "10"))
+# Document parser processes used by ingest_directory (1 = parse in the ingesting process)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+# Files at least this large are loaded page by page instead of all at once
+INGEST_STREAMING_THRESHOLD_BYTES = int(float(os.getenv("INGEST_STREAMING_THRESHOLD_MB", "10")) * 1024 * 1024)
+# Upper bound on chunks buffered in memory before they are embedded and written
+INGEST_MAX_CHUNKS_IN_MEMORY = int(os.getenv("INGEST_MAX_CHUNKS_IN_MEMORY", "2000"))
+# Cache text extracted from PDF, Word and Markdown files per content hash (zstd-compressed JSON lines)
+PARSED_TEXT_CACHE = os.getenv("PARSED_TEXT_CACHE", "True").lower() == "true"
+PARSED_TEXT_CACHE_DIR = Path(os.getenv("PARSED_TEXT_CACHE_DIR", str(PROCESSED_DIR / "parsed_cache")))
+
+# Ingestion jobs started through the API run one at a time across all API workers, each in a separate process
+INGEST_JOB_MAX_QUEUE = int(os.getenv("INGEST_JOB_MAX_QUEUE", "8"))
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "50"))
+# Job registry shared by the API worker processes, the queue limit and history apply to all of them
+INGEST_JOB_DB_PATH = Path(os.getenv("INGEST_JOB_DB_PATH", str(PROCESSED_DIR / "ingest_jobs.sqlite3")))
+# Niceness increment and CPU cores (0 = no limit) of the job process so chat requests keep priority
+INGEST_JOB_NICE = int(os.getenv("INGEST_JOB_NICE", "10"))
+INGEST_JOB_CPUS = int(os.getenv("INGEST_JOB_CPUS", "2"))
+# Directory jobs may only read below this directory, uploads are stored in KNOWLEDGE_BASE_DIR
+INGEST_JOB_ROOT = Path(os.getenv("INGEST_JOB_ROOT", str(DATA_DIR)))
+INGEST_UPLOAD_MAX_BYTES = int(float(os.getenv("INGEST_UPLOAD_MAX_MB", "50")) * 1024 * 1024)
+
+# Watch KNOWLEDGE_BASE_DIR from one API worker and re-index changed files in a background process
+KB_WATCH = os.getenv("KB_WATCH", "False").lower() == "true"
+# File events are grouped until none arrived for KB_WATCH_QUIET_MS, for at most KB_WATCH_DEBOUNCE_MS
+KB_WATCH_DEBOUNCE_MS = int(os.getenv("KB_WATCH_DEBOUNCE_MS", "5000"))
+KB_WATCH_QUIET_MS = int(os.getenv("KB_WATCH_QUIET_MS", "1000"))
+
+# Drop chunks whose SimHash is within DEDUPE_MAX_HAMMING bits (max 3) of a stored chunk of the same category
+DEDUPE_CHUNKS = os.getenv("DEDUPE_CHUNKS", "True").lower() == "true"
+DEDUPE_MAX_HAMMING = int(os.getenv("DEDUPE_MAX_HAMMING", "3"))
 
 # Jira settings - use the values from settings if available
 JIRA_BASE_URL = settings.JIRA_BASE_URL or os.getenv("JIRA_BASE_URL", "")
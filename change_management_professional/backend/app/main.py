@@ -1,12 +1,17 @@
 # app/main.py
 import logging
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.routes import chat, technology, tools, integrations
+from app.routes import chat, technology, tools, integrations, ingest
 from app.routes import jira_routes  # Import the jira_routes directly
-from app.config import API_PREFIX, PROJECT_NAME, DEBUG
+from app.config import API_PREFIX, PROJECT_NAME, DEBUG, KB_WATCH
+from app.services.knowledge_base import initialize_knowledge_base, get_knowledge_base_status, shutdown_knowledge_base
+from app.services.ingest_jobs import shutdown_ingest_jobs
+from app.services.kb_watcher import watch_knowledge_base
 
 # Configure logging
 logging.basicConfig(
@@ -15,12 +20,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the shared knowledge base in the background so health checks respond during warm-up"""
+    warm_up_task = asyncio.create_task(initialize_knowledge_base())
+    # Optionally re-index documents dropped into the knowledge base directory
+    watch_task = asyncio.create_task(watch_knowledge_base()) if KB_WATCH else None
+    yield
+    warm_up_task.cancel()
+    if watch_task is not None:
+        watch_task.cancel()
+    shutdown_ingest_jobs()
+    shutdown_knowledge_base()
+
 # Create FastAPI app
 app = FastAPI(
     title=PROJECT_NAME,
     description="API for Change Management AI Assistant",
     version="0.1.0",
     debug=DEBUG,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware - allow requests from your frontend
@@ -51,6 +70,13 @@ app.include_router(
     tags=["tools"],
 )
 
+# Add the background ingestion jobs router
+app.include_router(
+    ingest.router,
+    prefix=f"{API_PREFIX}/ingest",
+    tags=["ingest"],
+)
+
 # Add the integrations router
 app.include_router(
     integrations.router,
@@ -86,8 +112,14 @@ async def root():
 
 @app.get(f"{API_PREFIX}/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Health check endpoint, only healthy once the knowledge base is warmed up"""
+    kb_status = get_knowledge_base_status()
+    if kb_status != "ready":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable" if kb_status == "failed" else "starting", "knowledge_base": kb_status},
+        )
+    return {"status": "healthy", "knowledge_base": kb_status}
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
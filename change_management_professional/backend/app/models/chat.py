@@ -2,6 +2,8 @@ from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from app.config import RETRIEVE_MANY_MAX_QUERIES
+
 class Message(BaseModel):
     """Model for a chat message"""
     role: str = Field(..., description="Role of the message sender ('user' or 'assistant')")
@@ -13,6 +15,7 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="User message")
     conversation_id: Optional[str] = Field(None, description="Unique identifier for the conversation")
     history: Optional[List[Dict[str, str]]] = Field(None, description="Previous messages in the conversation")
+    category: Optional[str] = Field(None, description="Knowledge base category to search in, e.g. 'frameworks'")
 
 class ChatResponse(BaseModel):
     """Model for a chat response"""
@@ -21,6 +24,27 @@ class ChatResponse(BaseModel):
     sources: Optional[List[Dict[str, str]]] = Field(None, description="Source documents used for response")
     suggested_questions: Optional[List[str]] = Field(None, description="Follow-up questions the user might ask")
 
+class RetrieveManyRequest(BaseModel):
+    """Model for a batch retrieval request"""
+    queries: List[str] = Field(..., min_length=1, max_length=RETRIEVE_MANY_MAX_QUERIES, description="Queries to retrieve context for")
+    category: Optional[str] = Field(None, description="Knowledge base category to search in, e.g. 'frameworks'")
+
+class RetrievedChunk(BaseModel):
+    """Model for a knowledge base chunk returned by retrieval"""
+    content: str = Field(..., description="Chunk text")
+    title: str = Field(..., description="File name of the source document")
+    path: str = Field(..., description="Path of the source document")
+    category: Optional[str] = Field(None, description="Category of the source document")
+
+class QueryResult(BaseModel):
+    """Model for the retrieval results of one query"""
+    query: str = Field(..., description="Query as sent by the client")
+    hits: List[RetrievedChunk] = Field(default_factory=list, description="Relevant chunks, best first")
+
+class RetrieveManyResponse(BaseModel):
+    """Model for a batch retrieval response"""
+    results: List[QueryResult] = Field(..., description="Results in the order of the queries")
+
 class FeedbackRequest(BaseModel):
     """Model for user feedback on a response"""
     conversation_id: str = Field(..., description="Conversation identifier")
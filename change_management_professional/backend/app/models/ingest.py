@@ -0,0 +1,33 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class IngestDirectoryRequest(BaseModel):
+    """Model for a request to ingest a directory on the server"""
+    directory: Optional[str] = Field(None, description="Directory to ingest, defaults to the knowledge base directory")
+    incremental: bool = Field(True, description="Skip files that are unchanged since they were last ingested")
+
+class IngestJobProgress(BaseModel):
+    """Model for the progress counters of an ingestion job"""
+    total_files: int = Field(..., description="Number of files to parse")
+    files_parsed: int = Field(..., description="Number of files parsed so far, including failed ones")
+    files_failed: int = Field(..., description="Number of files that could not be loaded")
+    files_skipped: int = Field(..., description="Number of unchanged files that were skipped")
+    chunks_embedded: int = Field(..., description="Number of chunks embedded and stored so far")
+    elapsed_seconds: float = Field(..., description="Seconds since parsing started")
+    files_per_second: float = Field(..., description="Parsing throughput")
+    chunks_per_second: float = Field(..., description="Embedding throughput")
+    eta_seconds: Optional[float] = Field(None, description="Estimated seconds until all files are parsed")
+
+class IngestJobResponse(BaseModel):
+    """Model for the state of an ingestion job"""
+    job_id: str = Field(..., description="Unique identifier for the job")
+    kind: str = Field(..., description="Job kind ('directory', 'upload' or 'changes')")
+    target: str = Field(..., description="Directory being ingested or holding the uploaded files")
+    status: str = Field(..., description="Job status ('queued', 'running', 'completed' or 'failed')")
+    created_at: datetime = Field(..., description="Time the job was queued")
+    started_at: Optional[datetime] = Field(None, description="Time the job started running")
+    finished_at: Optional[datetime] = Field(None, description="Time the job finished")
+    chunks_added: int = Field(0, description="Number of chunks added to the knowledge base")
+    error: Optional[str] = Field(None, description="Error message of a failed job")
+    progress: IngestJobProgress = Field(..., description="Progress counters")
@@ -4,10 +4,14 @@ from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
-from app.models.chat import ChatRequest, ChatResponse, FeedbackRequest, FeedbackResponse
+from app.models.chat import (
+    ChatRequest, ChatResponse, FeedbackRequest, FeedbackResponse,
+    RetrieveManyRequest, RetrieveManyResponse, QueryResult, RetrievedChunk
+)
 from app.services.llm_service import LLMService
-from app.services.knowledge_base import KnowledgeBase
+from app.services.knowledge_base import KnowledgeBase, get_shared_knowledge_base, get_knowledge_base_status
 from app.services.feedback_service import FeedbackService
+from app.utils.executor import ThreadPoolSaturated
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -20,7 +24,10 @@ def get_llm_service():
     return LLMService()
 
 def get_knowledge_base():
-    return KnowledgeBase()
+    # The shared instance is created and warmed up by the app lifespan hook
+    if get_knowledge_base_status() != "ready":
+        raise HTTPException(status_code=503, detail="Knowledge base is not ready yet, please retry shortly")
+    return get_shared_knowledge_base()
 
 def get_feedback_service():
     return FeedbackService()
@@ -40,7 +47,10 @@ async def chat(
         conversation_id = request.conversation_id or str(uuid.uuid4())
         
         # Retrieve relevant documents from knowledge base
-        retrieved_docs = await knowledge_base.retrieve_relevant_documents(request.message)
+        retrieved_docs = await knowledge_base.retrieve_relevant_documents(
+            request.message,
+            categories=[request.category] if request.category else None
+        )
         
         # Generate response using LLM
         response_text = await llm_service.generate_response(
@@ -75,10 +85,50 @@ async def chat(
             suggested_questions=suggested_questions if suggested_questions else None
         )
         
+    except ThreadPoolSaturated:
+        raise HTTPException(status_code=503, detail="Knowledge base is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/retrieve-many", response_model=RetrieveManyResponse)
+async def retrieve_many(
+    request: RetrieveManyRequest,
+    knowledge_base: KnowledgeBase = Depends(get_knowledge_base)
+):
+    """
+    Retrieve knowledge base context for several queries in one round trip
+    """
+    try:
+        results = await knowledge_base.retrieve_many(
+            request.queries,
+            categories=[request.category] if request.category else None
+        )
+        
+        return RetrieveManyResponse(
+            results=[
+                QueryResult(
+                    query=query,
+                    hits=[
+                        RetrievedChunk(
+                            content=doc.page_content,
+                            title=doc.metadata.get("filename") or doc.metadata.get("source", "").split("/")[-1],
+                            path=doc.metadata.get("source", ""),
+                            category=doc.metadata.get("category")
+                        )
+                        for doc in docs
+                    ]
+                )
+                for query, docs in zip(request.queries, results)
+            ]
+        )
+        
+    except ThreadPoolSaturated:
+        raise HTTPException(status_code=503, detail="Knowledge base is busy, please retry shortly")
+    except Exception as e:
+        logger.error(f"Error in retrieve-many endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/feedback", response_model=FeedbackResponse)
 async def submit_feedback(
     request: FeedbackRequest,
@@ -130,13 +180,22 @@ async def get_knowledge_stats(knowledge_base: KnowledgeBase = Depends(get_knowle
     Get statistics about the knowledge base
     """
     try:
-        doc_count = knowledge_base.get_document_count()
+        stats = await knowledge_base.get_stats_async()
         
         return {
-            "total_documents": doc_count,
-            "status": "operational" if doc_count > 0 else "empty"
+            "total_documents": stats["total_sources"],
+            "total_chunks": stats["total_chunks"],
+            "bytes_indexed": stats["bytes_indexed"],
+            "duplicates_collapsed": stats["duplicates_collapsed"],
+            "categories": stats["categories"],
+            "updated_at": stats["updated_at"],
+            "status": "operational" if stats["total_chunks"] > 0 else "empty",
+            "cache": knowledge_base.get_cache_stats(),
+            "retrieval_pool": knowledge_base.get_retrieval_pool_stats()
         }
         
+    except ThreadPoolSaturated:
+        raise HTTPException(status_code=503, detail="Knowledge base is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Error getting knowledge stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
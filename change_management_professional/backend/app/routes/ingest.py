@@ -0,0 +1,108 @@
+import os
+import re
+import asyncio
+import uuid
+import logging
+from pathlib import Path
+from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+
+from app.config import KNOWLEDGE_BASE_DIR, INGEST_JOB_ROOT, INGEST_UPLOAD_MAX_BYTES
+from app.models.ingest import IngestDirectoryRequest, IngestJobResponse
+from app.services.ingest_jobs import IngestJob, IngestQueueFull, get_ingest_job_manager
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter()
+
+# Bytes read from an upload per step
+UPLOAD_READ_BYTES = 1024 * 1024
+
+async def _submit(job: IngestJob) -> IngestJobResponse:
+    """Queue a job, answering 503 when the queue is full"""
+    try:
+        # The job registry is an SQLite database shared with the other API workers
+        job = await asyncio.to_thread(get_ingest_job_manager().submit, job)
+        return IngestJobResponse(**job.to_dict())
+    except IngestQueueFull:
+        raise HTTPException(status_code=503, detail="Too many ingestion jobs are queued, please retry later")
+
+@router.post("/jobs", response_model=IngestJobResponse, status_code=202)
+async def create_directory_job(request: IngestDirectoryRequest):
+    """
+    Start ingesting a directory on the server in the background
+    """
+    directory = Path(request.directory).resolve() if request.directory else KNOWLEDGE_BASE_DIR
+    if not directory.is_relative_to(INGEST_JOB_ROOT.resolve()):
+        raise HTTPException(status_code=400, detail=f"Directory must be inside {INGEST_JOB_ROOT}")
+    if not directory.is_dir():
+        raise HTTPException(status_code=404, detail=f"Directory not found: {directory}")
+
+    return await _submit(IngestJob("directory", str(directory), incremental=request.incremental))
+
+@router.post("/jobs/upload", response_model=IngestJobResponse, status_code=202)
+async def create_upload_job(
+    files: List[UploadFile] = File(..., description="Documents to add to the knowledge base"),
+    category: str = Form("general", description="Knowledge base category of the documents"),
+    incremental: bool = Form(True, description="Skip files that are unchanged since they were last ingested")
+):
+    """
+    Store uploaded documents in the knowledge base directory and ingest them in the background
+    """
+    if not re.fullmatch(r"[\w-]+", category):
+        raise HTTPException(status_code=400, detail="Category may only contain letters, digits, '_' and '-'")
+
+    category_dir = KNOWLEDGE_BASE_DIR / category
+    await asyncio.to_thread(category_dir.mkdir, parents=True, exist_ok=True)
+    stored_files = []
+    try:
+        for upload in files:
+            filename = Path(upload.filename or "").name
+            if not filename or filename.startswith('.'):
+                raise HTTPException(status_code=400, detail=f"Invalid file name: {upload.filename}")
+
+            file_path = category_dir / filename
+            # Written next to the target and renamed once complete, so a job or the watcher never reads a partial file
+            tmp_path = category_dir / f".{filename}.{uuid.uuid4().hex}.upload"
+            size = 0
+            f = await asyncio.to_thread(open, tmp_path, 'xb')
+            try:
+                with f:
+                    while data := await upload.read(UPLOAD_READ_BYTES):
+                        size += len(data)
+                        if size > INGEST_UPLOAD_MAX_BYTES:
+                            raise HTTPException(status_code=413, detail=f"{filename} exceeds the upload size limit")
+                        await asyncio.to_thread(f.write, data)
+                await asyncio.to_thread(os.replace, tmp_path, file_path)
+            except BaseException:
+                await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+                raise
+
+            # Same metadata as files found by a directory ingest
+            stored_files.append((str(file_path), {"source": str(file_path), "filename": filename, "category": category}))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error storing uploaded documents: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error storing uploaded documents")
+
+    return await _submit(IngestJob("upload", str(category_dir), files=stored_files, incremental=incremental))
+
+@router.get("/jobs", response_model=List[IngestJobResponse])
+async def list_jobs():
+    """
+    List queued, running and recently finished ingestion jobs
+    """
+    return [IngestJobResponse(**job) for job in await asyncio.to_thread(get_ingest_job_manager().list_jobs)]
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+async def get_job(job_id: str):
+    """
+    Get the status and progress of an ingestion job
+    """
+    job = await asyncio.to_thread(get_ingest_job_manager().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    return IngestJobResponse(**job)
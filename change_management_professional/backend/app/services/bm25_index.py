@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterable, Optional
+
+from app.config import KB_INDEX_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# BM25 index storage path
+BM25_INDEX_FILE = KB_INDEX_DIR / "bm25_index.json"
+
+# Common English words that carry no lexical signal
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "its", "me", "my", "of", "on", "or", "our", "so",
+    "that", "the", "their", "there", "these", "this", "to", "was", "we", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your"
+}
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for lexical matching
+
+    Acronyms such as ADKAR or KPI are kept as single terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms without stopwords
+    """
+    return [term for term in re.findall(r"[a-z0-9]+", text.lower()) if term not in STOPWORDS]
+
+class BM25Index:
+    """In-process BM25 inverted index over chunk text, keyed by chunk ID"""
+
+    def __init__(self, path: Path = BM25_INDEX_FILE, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index, loading it from disk if present
+
+        Args:
+            path: Location of the index JSON file
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # term -> {chunk ID -> term frequency}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        # chunk ID -> number of terms
+        self.doc_lengths: Dict[str, int] = {}
+        # chunk ID -> category, for partition-filtered searches
+        self.doc_categories: Dict[str, str] = {}
+        # chunk ID -> distinct terms, so removals only touch the chunk's own postings
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self.postings = data["postings"]
+                self.doc_lengths = data["doc_lengths"]
+                self.doc_categories = data.get("doc_categories", {})
+                self.total_length = sum(self.doc_lengths.values())
+                # Not stored on disk, rebuilt from the postings
+                for term, postings in self.postings.items():
+                    for chunk_id in postings:
+                        self.doc_terms.setdefault(chunk_id, []).append(term)
+                logger.info(f"Loaded BM25 index with {len(self.doc_lengths)} chunks")
+            except Exception as e:
+                logger.error(f"Error loading BM25 index: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, chunk_id: str, text: str, category: Optional[str] = None) -> None:
+        """
+        Index the text of a chunk, replacing any previous entry with the same ID
+
+        Args:
+            chunk_id: ID of the chunk in the vector store
+            text: Chunk text
+            category: Optional category of the chunk
+        """
+        terms = tokenize(text)
+        with self._lock:
+            if chunk_id in self.doc_lengths:
+                self.remove([chunk_id])
+            frequencies = Counter(terms)
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[chunk_id] = frequency
+            self.doc_terms[chunk_id] = list(frequencies)
+            self.doc_lengths[chunk_id] = len(terms)
+            self.total_length += len(terms)
+            if category:
+                self.doc_categories[chunk_id] = category
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Remove chunks from the index
+
+        Args:
+            chunk_ids: IDs of the chunks to remove
+        """
+        with self._lock:
+            for chunk_id in set(chunk_ids):
+                if chunk_id not in self.doc_lengths:
+                    continue
+                self.total_length -= self.doc_lengths.pop(chunk_id)
+                self.doc_categories.pop(chunk_id, None)
+                for term in self.doc_terms.pop(chunk_id, ()):
+                    postings = self.postings.get(term)
+                    if postings is None:
+                        continue
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(self, query: str, k: int, categories: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25
+
+        Args:
+            query: User query
+            k: Maximum number of results
+            categories: Optional categories the results must belong to
+
+        Returns:
+            List of (chunk ID, score) sorted by descending score
+        """
+        with self._lock:
+            doc_count = len(self.doc_lengths)
+            if not doc_count:
+                return []
+            avg_length = self.total_length / doc_count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    if categories and self.doc_categories.get(chunk_id) not in categories:
+                        continue
+                    length_norm = 1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self) -> None:
+        """Write the index to disk atomically"""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(
+                    {"postings": self.postings, "doc_lengths": self.doc_lengths, "doc_categories": self.doc_categories},
+                    f,
+                    separators=(",", ":")
+                )
+            os.replace(tmp_path, self.path)
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of the same items with reciprocal rank fusion
+
+    Args:
+        rankings: Lists of item IDs, each ordered from best to worst
+        k: RRF damping constant, larger values flatten the rank contribution
+
+    Returns:
+        List of (item ID, fused score) sorted by descending score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
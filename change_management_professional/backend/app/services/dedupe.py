@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterable, Optional
+
+import numpy as np
+
+from app.config import KB_INDEX_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Near-duplicate index storage path
+DEDUPE_INDEX_FILE = KB_INDEX_DIR / "dedupe_index.json"
+
+# Words per shingle hashed into the fingerprint
+SHINGLE_SIZE = 3
+
+# Fingerprints are split into this many 16-bit bands for candidate lookup
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+def simhash(text: str) -> int:
+    """
+    Compute the 64-bit SimHash of a text over word shingles
+
+    Texts sharing most of their shingles get fingerprints that differ in
+    only a few bits.
+
+    Args:
+        text: Text to fingerprint
+
+    Returns:
+        Fingerprint as an unsigned 64-bit integer
+    """
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little") for shingle in shingles],
+        dtype=np.uint64
+    )
+    votes = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    bits = votes * 2 > len(hashes)
+    return int(np.sum(np.left_shift(np.uint64(1), _BIT_POSITIONS[bits]), dtype=np.uint64))
+
+def hamming_distance(a: int, b: int) -> int:
+    """
+    Count the differing bits of two fingerprints
+
+    Args:
+        a: First fingerprint
+        b: Second fingerprint
+
+    Returns:
+        Number of differing bits
+    """
+    return bin(a ^ b).count("1")
+
+class NearDuplicateIndex:
+    """
+    SimHash fingerprints of stored chunks and the sources referencing each chunk
+
+    A chunk that is a near-duplicate of a stored one of the same category is
+    not stored again; its source is added to the references of the stored
+    chunk instead. Chunks are only compared within a category so category
+    filtered retrieval still finds every chunk. The first reference is the
+    source the chunk is stored under. A chunk is only deleted once no source
+    references it anymore.
+    """
+
+    def __init__(self, max_distance: int, path: Path = DEDUPE_INDEX_FILE):
+        """
+        Initialize the index, loading it from disk if present
+
+        Args:
+            max_distance: Maximum Hamming distance between near-duplicate fingerprints, at most BANDS - 1
+            path: Location of the index JSON file
+        """
+        self.max_distance = min(max_distance, BANDS - 1)
+        self.path = path
+        self._lock = threading.RLock()
+        # chunk ID -> fingerprint
+        self.fingerprints: Dict[str, int] = {}
+        # chunk ID -> referencing sources, the first one owns the chunk
+        self.references: Dict[str, List[str]] = {}
+        # chunk ID -> category
+        self.categories: Dict[str, str] = {}
+        # (category, band, band value) -> chunk IDs
+        self._bands: Dict[Tuple[str, int, int], List[str]] = {}
+        self.exists = self.path.exists()
+
+        if self.exists:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                for chunk_id, fingerprint in data["fingerprints"].items():
+                    self.add(chunk_id, int(fingerprint), data["categories"][chunk_id], data["references"][chunk_id])
+                logger.info(f"Loaded near-duplicate index with {len(self.fingerprints)} chunks")
+            except Exception as e:
+                logger.error(f"Error loading near-duplicate index: {str(e)}")
+                self.fingerprints, self.references, self.categories, self._bands = {}, {}, {}, {}
+                self.exists = False
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    @staticmethod
+    def _band_keys(fingerprint: int, category: str) -> List[Tuple[str, int, int]]:
+        """Split a fingerprint into its band lookup keys within a category"""
+        mask = (1 << BAND_BITS) - 1
+        return [(category, band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+    def find(self, fingerprint: int, category: str) -> Optional[str]:
+        """
+        Find a stored chunk of a category that is a near-duplicate of a fingerprint
+
+        Two fingerprints within max_distance < BANDS bits share at least one
+        band exactly, so only chunks sharing a band are compared.
+
+        Args:
+            fingerprint: Fingerprint of the new chunk
+            category: Category of the new chunk
+
+        Returns:
+            ID of the closest stored chunk, or None
+        """
+        with self._lock:
+            best_id, best_distance = None, self.max_distance + 1
+            for key in self._band_keys(fingerprint, category):
+                for chunk_id in self._bands.get(key, ()):
+                    distance = hamming_distance(fingerprint, self.fingerprints[chunk_id])
+                    if distance < best_distance:
+                        best_id, best_distance = chunk_id, distance
+            return best_id
+
+    def add(self, chunk_id: str, fingerprint: int, category: str, sources: List[str]) -> None:
+        """
+        Record a stored chunk
+
+        Args:
+            chunk_id: ID of the chunk in the vector store
+            fingerprint: SimHash of the chunk text
+            category: Category of the chunk
+            sources: Sources referencing the chunk, owner first
+        """
+        with self._lock:
+            self.fingerprints[chunk_id] = fingerprint
+            self.references[chunk_id] = list(sources)
+            self.categories[chunk_id] = category
+            for key in self._band_keys(fingerprint, category):
+                self._bands.setdefault(key, []).append(chunk_id)
+
+    def add_reference(self, chunk_id: str, source: str) -> bool:
+        """
+        Record that a source contains a near-duplicate of a stored chunk
+
+        Args:
+            chunk_id: ID of the stored chunk
+            source: Source path of the file containing the duplicate
+
+        Returns:
+            True if the source did not reference the chunk yet
+        """
+        with self._lock:
+            references = self.references[chunk_id]
+            if source in references:
+                return False
+            references.append(source)
+            return True
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Forget chunks entirely
+
+        Args:
+            chunk_ids: IDs of the chunks
+        """
+        with self._lock:
+            for chunk_id in chunk_ids:
+                fingerprint = self.fingerprints.pop(chunk_id, None)
+                self.references.pop(chunk_id, None)
+                category = self.categories.pop(chunk_id, None)
+                if fingerprint is None:
+                    continue
+                for key in self._band_keys(fingerprint, category):
+                    band = self._bands.get(key)
+                    if band and chunk_id in band:
+                        band.remove(chunk_id)
+                        if not band:
+                            del self._bands[key]
+
+    def release(self, source: str, chunk_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Drop the references of a source to its chunks
+
+        Args:
+            source: Source path of the file being removed
+            chunk_ids: IDs of the chunks the source referenced
+
+        Returns:
+            Tuple of (IDs no longer referenced by any source, IDs still
+            referenced by other sources whose references changed)
+        """
+        orphaned: List[str] = []
+        changed: List[str] = []
+        with self._lock:
+            for chunk_id in chunk_ids:
+                references = self.references.get(chunk_id)
+                if references is None:
+                    # Chunk stored before deduplication was enabled
+                    orphaned.append(chunk_id)
+                    continue
+                if source in references:
+                    references.remove(source)
+                if references:
+                    changed.append(chunk_id)
+                else:
+                    orphaned.append(chunk_id)
+            self.remove(orphaned)
+        return orphaned, changed
+
+    def save(self) -> None:
+        """Write the index to disk atomically"""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(
+                    {
+                        "fingerprints": {chunk_id: str(fingerprint) for chunk_id, fingerprint in self.fingerprints.items()},
+                        "references": self.references,
+                        "categories": self.categories
+                    },
+                    f,
+                    separators=(",", ":")
+                )
+            os.replace(tmp_path, self.path)
+            self.exists = True
@@ -0,0 +1,138 @@
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import EMBEDDING_CACHE_PATH
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Texts looked up per SQL statement, below SQLite's host parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+def content_hash(text: str) -> bytes:
+    """
+    Hash a chunk text for the cache key
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        16-byte BLAKE2b digest
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class EmbeddingCache:
+    """
+    Persisted mapping of (model name, chunk content hash) -> embedding vector
+
+    Chunk texts that were embedded before are not embedded again when the
+    chunking settings change or an index is rebuilt. Vectors are stored as
+    float32 in an SQLite database in WAL mode, so the API service and
+    ingestion job processes can share it. Deleting the file only costs
+    re-embedding.
+    """
+
+    def __init__(self, model: str, path: Path = EMBEDDING_CACHE_PATH):
+        """
+        Initialize the cache, creating the database if needed
+
+        Args:
+            model: Name of the embedding model, vectors of other models are never returned
+            path: Location of the SQLite database
+        """
+        self.model = model
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, content_hash BLOB NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, content_hash)) WITHOUT ROWID"
+        )
+        self._connection.commit()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the vectors of several texts
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            Vector of each text, None where it is not cached
+        """
+        hashes = [content_hash(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        unique_hashes = list(set(hashes))
+        with self._lock:
+            for start in range(0, len(unique_hashes), LOOKUP_BATCH_SIZE):
+                batch = unique_hashes[start:start + LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [self.model, *batch]
+                )
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+
+            vectors = [found.get(key) for key in hashes]
+            hits = sum(1 for vector in vectors if vector is not None)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """
+        Store the vectors of several texts
+
+        Args:
+            texts: Chunk texts
+            vectors: Embedding vector of each text
+        """
+        rows = [
+            (self.model, content_hash(text), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._connection.commit()
+
+    def embed_documents(self, embeddings: Any, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, only passing the ones without a cached vector to the model
+
+        Args:
+            embeddings: Embedding function
+            texts: Chunk texts
+
+        Returns:
+            Embedding vector of each text
+        """
+        vectors = self.get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            embedded = dict(zip(missing, embeddings.embed_documents(missing)))
+            self.put_many(missing, [embedded[text] for text in missing])
+            vectors = [vector if vector is not None else embedded[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hit and miss counts of this process
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
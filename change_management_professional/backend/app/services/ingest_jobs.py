@@ -0,0 +1,507 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import queue
+import asyncio
+import logging
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional, Iterator, IO
+
+from app.config import (
+    PROCESSED_DIR, INGEST_JOB_MAX_QUEUE, INGEST_JOB_HISTORY, INGEST_JOB_NICE, INGEST_JOB_CPUS, INGEST_JOB_DB_PATH
+)
+from app.utils.progress import IngestProgress
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Seconds between liveness checks of the job process while no progress arrives
+EVENT_POLL_SECONDS = 1.0
+
+# Held while a process writes the indexes, so the jobs and watch re-indexing of all API workers take turns
+INGEST_LOCK_FILE = PROCESSED_DIR / "ingest.lock"
+
+# Held by the API worker running a job, so only one job process exists across all workers
+INGEST_JOB_SLOT_FILE = PROCESSED_DIR / "ingest_job.lock"
+
+# Seconds between attempts to take the job slot, and between progress writes to the registry
+SLOT_POLL_SECONDS = 1.0
+PROGRESS_WRITE_SECONDS = 1.0
+
+class IngestQueueFull(Exception):
+    """Raised when the maximum number of ingestion jobs is already waiting"""
+
+class _ForwardedProgress(IngestProgress):
+    """Progress tracker of the job process that sends every update to the API process"""
+
+    def __init__(self, events: Any):
+        super().__init__()
+        self.events = events
+
+    def add_files(self, count: int, skipped: int = 0) -> None:
+        self.events.put(("add_files", (count, skipped)))
+
+    def file_parsed(self, failed: bool = False) -> None:
+        self.events.put(("file_parsed", (failed,)))
+
+    def chunks_written(self, count: int) -> None:
+        self.events.put(("chunks_written", (count,)))
+
+@contextmanager
+def ingest_lock() -> Iterator[None]:
+    """Hold the ingest lock, waiting until no other process writes the indexes"""
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    with open(INGEST_LOCK_FILE, 'w') as lock_file:
+        # Released when the file is closed, also if the process dies
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def lower_priority() -> None:
+    """Lower the CPU priority of the current process and pin it to a subset of the cores"""
+    try:
+        os.nice(INGEST_JOB_NICE)
+    except (AttributeError, OSError) as e:
+        logger.warning(f"Could not lower ingestion job priority: {str(e)}")
+
+    if INGEST_JOB_CPUS and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) > INGEST_JOB_CPUS:
+            # Leave the first cores to the API process
+            os.sched_setaffinity(0, cpus[-INGEST_JOB_CPUS:])
+
+def _run_job_process(
+    kind: str,
+    target: str,
+    files: List[Tuple[str, Dict[str, Any]]],
+    incremental: bool,
+    events: Any
+) -> None:
+    """
+    Job process entry point that ingests a directory, a list of files or the changes of a directory
+
+    Args:
+        kind: "directory", "upload" or "changes"
+        target: Directory to ingest for directory jobs, the watched directory for changes jobs
+        files: Tuples of (file path, metadata) for upload jobs, or of (changed path, {}) for changes jobs
+        incremental: Skip files whose content hash matches the manifest
+        events: Queue receiving progress updates and the final result
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        # Limit the process before the embedding libraries start their thread pools
+        lower_priority()
+        from app.services.knowledge_base import KnowledgeBase
+
+        knowledge_base = KnowledgeBase()
+        progress = _ForwardedProgress(events)
+        with ingest_lock():
+            if kind == "directory":
+                chunks_added = asyncio.run(
+                    knowledge_base.ingest_directory(Path(target), incremental=incremental, progress=progress)
+                )
+            elif kind == "changes":
+                chunks_added = asyncio.run(
+                    knowledge_base.ingest_changes(Path(target), [Path(file_path) for file_path, _ in files], progress=progress)
+                )
+            else:
+                chunks_added = asyncio.run(
+                    knowledge_base.ingest_documents(
+                        [(Path(file_path), metadata) for file_path, metadata in files],
+                        incremental=incremental,
+                        progress=progress
+                    )
+                )
+        events.put(("done", (chunks_added,)))
+    except Exception as e:
+        events.put(("error", (str(e),)))
+
+class IngestJob:
+    """State of one background ingestion job"""
+
+    def __init__(
+        self,
+        kind: str,
+        target: str,
+        files: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+        incremental: bool = True
+    ):
+        """
+        Initialize a queued job
+
+        Args:
+            kind: "directory", "upload" or "changes"
+            target: Directory being ingested, or the directory uploads were stored in
+            files: Tuples of (file path, metadata) for upload jobs, or of (changed path, {}) for changes jobs
+            incremental: Skip files whose content hash matches the manifest
+        """
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.target = target
+        self.files = files or []
+        self.incremental = incremental
+        self.status = "queued"
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.chunks_added = 0
+        self.error: Optional[str] = None
+        self.progress = IngestProgress()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the job state for the API
+
+        Returns:
+            Dictionary with the job status, timestamps, result and progress counters
+        """
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "chunks_added": self.chunks_added,
+            "error": self.error,
+            "progress": self.progress.snapshot()
+        }
+
+class IngestJobRegistry:
+    """
+    Job states shared by the API worker processes through an SQLite database
+
+    Each worker writes the state of the jobs it runs, so a status query
+    answered by any worker sees every job, and the queue limit counts the
+    queued jobs of all workers. Jobs record the PID of their worker; queued
+    or running jobs of a worker that exited are marked as failed.
+    """
+
+    def __init__(self, path: Path = INGEST_JOB_DB_PATH):
+        """
+        Initialize the registry, creating the database if needed
+
+        Args:
+            path: Location of the SQLite database
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # Autocommit, so submit() can count and insert in one BEGIN IMMEDIATE transaction
+        self._connection = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, owner_pid INTEGER NOT NULL, state TEXT NOT NULL, status TEXT NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def submit(self, job: IngestJob, max_queue: int, history: int) -> None:
+        """
+        Record a queued job, forgetting the oldest finished jobs beyond the history size
+
+        Args:
+            job: Job to record
+            max_queue: Maximum number of jobs waiting to run in all workers
+            history: Number of finished jobs kept for status queries
+
+        Raises:
+            IngestQueueFull: If max_queue jobs are already queued
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_orphans()
+                queued = self._connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= max_queue:
+                    raise IngestQueueFull(f"{queued} ingestion jobs are already queued")
+                self._connection.execute(
+                    "INSERT INTO jobs VALUES (?, ?, ?, ?)", (job.id, os.getpid(), self._encode(job), job.status)
+                )
+                self._connection.execute(
+                    "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND rowid NOT IN ("
+                    "SELECT rowid FROM jobs WHERE status IN ('completed', 'failed') ORDER BY rowid DESC LIMIT ?)",
+                    (history,)
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def update(self, job: IngestJob) -> None:
+        """
+        Write the current state of a job
+
+        Args:
+            job: Job run by this worker
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, status = ? WHERE id = ?", (self._encode(job), job.status, job.id)
+            )
+
+    def fail_queued(self, error: str) -> None:
+        """
+        Mark the queued jobs of this worker as failed
+
+        Args:
+            error: Error message of the jobs
+        """
+        with self._lock:
+            for job_id, state in self._connection.execute(
+                "SELECT id, state FROM jobs WHERE owner_pid = ? AND status = 'queued'", (os.getpid(),)
+            ).fetchall():
+                self._set_failed(job_id, state, error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of a job queued by any worker
+
+        Args:
+            job_id: ID returned when the job was queued
+
+        Returns:
+            Job state as returned by IngestJob.to_dict(), or None if the job is unknown
+        """
+        with self._lock:
+            self._fail_orphans()
+            row = self._connection.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """
+        Get the states of all known jobs, newest first
+
+        Returns:
+            List of job states as returned by IngestJob.to_dict()
+        """
+        with self._lock:
+            self._fail_orphans()
+            rows = self._connection.execute("SELECT state FROM jobs ORDER BY rowid DESC").fetchall()
+        return [self._decode(state) for state, in rows]
+
+    def _fail_orphans(self) -> None:
+        """Mark the unfinished jobs of workers that exited as failed"""
+        for job_id, owner_pid, state in self._connection.execute(
+            "SELECT id, owner_pid, state FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall():
+            if not _process_exists(owner_pid):
+                self._set_failed(job_id, state, "The API worker that queued the job exited")
+
+    def _set_failed(self, job_id: str, state: str, error: str) -> None:
+        """Mark a stored job as failed"""
+        data = json.loads(state)
+        data.update(status="failed", error=error, finished_at=datetime.now().isoformat())
+        self._connection.execute(
+            "UPDATE jobs SET state = ?, status = 'failed' WHERE id = ?", (json.dumps(data), job_id)
+        )
+
+    @staticmethod
+    def _encode(job: IngestJob) -> str:
+        """Serialize the API state of a job"""
+        return json.dumps(job.to_dict(), default=lambda value: value.isoformat())
+
+    @staticmethod
+    def _decode(state: str) -> Dict[str, Any]:
+        """Deserialize the API state of a job"""
+        data = json.loads(state)
+        for key in ("created_at", "started_at", "finished_at"):
+            if data[key] is not None:
+                data[key] = datetime.fromisoformat(data[key])
+        return data
+
+def _process_exists(pid: int) -> bool:
+    """Check whether a process with the given PID is running on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs in the background, one at a time across all API processes
+
+    Each job runs in its own process with a lowered priority and limited
+    CPU cores, so parsing and embedding neither hold the GIL of the API
+    process nor compete with chat requests for the CPU. The worker that
+    queued a job starts its process once it holds the job slot file lock,
+    and writes the job state to the shared registry. When the index
+    generation file changes, the API processes reload the vector backend:
+    the NumPy store maps its files again and the Chroma backend opens a new
+    client, since a Chroma client never sees the writes of another process.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = INGEST_JOB_MAX_QUEUE,
+        history: int = INGEST_JOB_HISTORY,
+        registry: Optional[IngestJobRegistry] = None
+    ):
+        """
+        Initialize the manager
+
+        Args:
+            max_queue: Maximum number of jobs waiting to run in all API processes
+            history: Number of finished jobs kept for status queries
+            registry: Job registry shared with the other API processes
+        """
+        self.max_queue = max_queue
+        self.history = history
+        self.registry = registry or IngestJobRegistry()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-job")
+        self._process: Optional[multiprocessing.Process] = None
+        self._stopping = threading.Event()
+
+    def submit(self, job: IngestJob) -> IngestJob:
+        """
+        Queue a job
+
+        Args:
+            job: Job to run
+
+        Returns:
+            The queued job
+
+        Raises:
+            IngestQueueFull: If the maximum number of jobs is already queued
+        """
+        self.registry.submit(job, self.max_queue, self.history)
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued {job.kind} ingestion job {job.id} for {job.target}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job by ID
+
+        Args:
+            job_id: ID returned when the job was queued
+
+        Returns:
+            Job state as returned by IngestJob.to_dict(), or None if the job is unknown
+        """
+        return self.registry.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """
+        Get all known jobs, newest first
+
+        Returns:
+            List of job states as returned by IngestJob.to_dict()
+        """
+        return self.registry.list_jobs()
+
+    def _acquire_slot(self) -> Optional[IO]:
+        """Wait for the job slot, returning its locked file, or None if the manager shuts down first"""
+        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+        slot = open(INGEST_JOB_SLOT_FILE, 'w')
+        while not self._stopping.is_set():
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot
+            except BlockingIOError:
+                self._stopping.wait(SLOT_POLL_SECONDS)
+        slot.close()
+        return None
+
+    def _run(self, job: IngestJob) -> None:
+        """Run a job in a child process and relay its progress, called on the worker thread"""
+        slot = self._acquire_slot()
+        if slot is None:
+            return
+        job.status = "running"
+        job.started_at = datetime.now()
+        self.registry.update(job)
+        context = multiprocessing.get_context("spawn")
+        events = context.Queue()
+
+        try:
+            # Not a daemon so the job can start its own document parser processes
+            self._process = context.Process(
+                target=_run_job_process,
+                args=(job.kind, job.target, job.files, job.incremental, events),
+                name=f"ingest-job-{job.id}"
+            )
+            self._process.start()
+
+            result: Optional[Tuple[str, Tuple[Any, ...]]] = None
+            written_at = time.monotonic()
+            while result is None:
+                try:
+                    event, args = events.get(timeout=EVENT_POLL_SECONDS)
+                except queue.Empty:
+                    if not self._process.is_alive():
+                        break
+                    continue
+                if event in ("done", "error"):
+                    result = (event, args)
+                else:
+                    getattr(job.progress, event)(*args)
+                    if time.monotonic() - written_at >= PROGRESS_WRITE_SECONDS:
+                        self.registry.update(job)
+                        written_at = time.monotonic()
+            self._process.join()
+
+            if result is None:
+                raise RuntimeError(f"Ingestion process exited with code {self._process.exitcode}")
+            if result[0] == "error":
+                raise RuntimeError(result[1][0])
+            job.chunks_added = result[1][0]
+            job.status = "completed"
+            logger.info(f"Ingestion job {job.id} added {job.chunks_added} chunks")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.now()
+            self._process = None
+            events.close()
+            slot.close()
+            self.registry.update(job)
+
+    def shutdown(self) -> None:
+        """Stop the running job and fail the queued ones"""
+        self._stopping.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.registry.fail_queued("The API worker shut down before the job started")
+        process = self._process
+        if process is not None and process.is_alive():
+            logger.info(f"Terminating running ingestion job process {process.name}")
+            process.terminate()
+
+# Process-wide job manager shared by all requests
+_ingest_job_manager: Optional[IngestJobManager] = None
+_ingest_job_manager_lock = threading.Lock()
+
+def get_ingest_job_manager() -> IngestJobManager:
+    """
+    Get the process-wide ingestion job manager, creating it on first use
+
+    Returns:
+        Shared IngestJobManager instance
+    """
+    global _ingest_job_manager
+    if _ingest_job_manager is None:
+        with _ingest_job_manager_lock:
+            if _ingest_job_manager is None:
+                _ingest_job_manager = IngestJobManager()
+    return _ingest_job_manager
+
+def shutdown_ingest_jobs() -> None:
+    """Stop the background ingestion of the shared job manager"""
+    if _ingest_job_manager is not None:
+        _ingest_job_manager.shutdown()
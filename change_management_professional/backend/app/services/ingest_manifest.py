@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.config import KB_INDEX_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Manifest storage path
+MANIFEST_FILE = KB_INDEX_DIR / "ingest_manifest.json"
+
+def compute_file_hash(file_path: Path) -> str:
+    """
+    Compute the SHA-256 hash of a file's content
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def make_chunk_id(source: str, content_hash: str, index: int) -> str:
+    """
+    Build the deterministic ID of a chunk of one version of a source file
+
+    Args:
+        source: Source path of the file
+        content_hash: Hash of the file content
+        index: Position of the chunk within the file
+
+    Returns:
+        Chunk ID
+    """
+    prefix = hashlib.sha1(f"{source}:{content_hash}".encode()).hexdigest()[:16]
+    return f"{prefix}-{index}"
+
+class IngestManifest:
+    """Persisted mapping of ingested file path -> content hash -> chunk IDs"""
+
+    def __init__(self, path: Path = MANIFEST_FILE):
+        """
+        Initialize the manifest, loading it from disk if present
+
+        Args:
+            path: Location of the manifest JSON file
+        """
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+                logger.info(f"Loaded ingest manifest with {len(self.entries)} files")
+            except Exception as e:
+                logger.error(f"Error loading ingest manifest: {str(e)}")
+                self.entries = {}
+
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the manifest entry for a source file
+
+        Args:
+            source: Source path of the file
+
+        Returns:
+            Entry with content_hash, chunk_ids and ingested_at, or None
+        """
+        return self.entries.get(source)
+
+    def is_unchanged(self, source: str, content_hash: str) -> bool:
+        """
+        Check whether a file was already ingested with the same content
+
+        Args:
+            source: Source path of the file
+            content_hash: Hash of the current file content
+
+        Returns:
+            True if the file can be skipped
+        """
+        entry = self.entries.get(source)
+        return entry is not None and entry.get("content_hash") == content_hash
+
+    def update(self, source: str, content_hash: str, chunk_ids: List[str]) -> None:
+        """
+        Record the chunks currently stored for a source file
+
+        Args:
+            source: Source path of the file
+            content_hash: Hash of the ingested file content
+            chunk_ids: IDs of the chunks written to the vector store
+        """
+        self.entries[source] = {
+            "content_hash": content_hash,
+            "chunk_ids": chunk_ids,
+            "ingested_at": datetime.now().isoformat()
+        }
+
+    def remove(self, source: str) -> List[str]:
+        """
+        Forget a source file
+
+        Args:
+            source: Source path of the file
+
+        Returns:
+            IDs of the chunks that were stored for the file
+        """
+        entry = self.entries.pop(source, None)
+        return entry.get("chunk_ids", []) if entry else []
+
+    def sources_under(self, directory_path: Path) -> List[str]:
+        """
+        Get all recorded sources located inside a directory
+
+        Args:
+            directory_path: Directory to look in
+
+        Returns:
+            List of source paths
+        """
+        prefix = str(directory_path).rstrip(os.sep) + os.sep
+        return [source for source in self.entries if source.startswith(prefix)]
+
+    def save(self) -> None:
+        """Write the manifest to disk atomically"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
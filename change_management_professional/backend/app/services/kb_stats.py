@@ -0,0 +1,163 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from app.config import KB_INDEX_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Statistics storage path
+STATS_FILE = KB_INDEX_DIR / "stats.json"
+
+class KnowledgeBaseStats:
+    """
+    Running totals of the indexed content, maintained at ingest time
+
+    Per-source counts are kept so that replacing or removing a file adjusts
+    the totals without reading the vector store. Chunks are counted under the
+    source they are stored under; near-duplicates of chunks stored under
+    another source are counted as duplicates only.
+    """
+
+    def __init__(self, path: Path = STATS_FILE):
+        """
+        Initialize the statistics, loading them from disk if present
+
+        Args:
+            path: Location of the statistics JSON file
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        # source -> {"category", "chunks", "bytes", "duplicates"}
+        self.sources: Dict[str, Dict[str, Any]] = {}
+        # category -> {"sources", "chunks", "bytes"}
+        self.categories: Dict[str, Dict[str, int]] = {}
+        self.total_chunks = 0
+        self.total_bytes = 0
+        self.total_duplicates = 0
+        # Chunks handed over to sources that are not recorded yet, source -> [chunks, bytes]
+        self._pending_transfers: Dict[str, List[int]] = {}
+        self.updated_at: Optional[str] = None
+        self.exists = self.path.exists()
+
+        if self.exists:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                for source, entry in data["sources"].items():
+                    self.add_source(source, entry["category"], entry["chunks"], entry["bytes"], entry.get("duplicates", 0))
+                self.updated_at = data.get("updated_at")
+                logger.info(f"Loaded knowledge base statistics for {len(self.sources)} sources")
+            except Exception as e:
+                logger.error(f"Error loading knowledge base statistics: {str(e)}")
+                self.exists = False
+
+    def add_source(self, source: str, category: str, chunks: int, size_bytes: int, duplicates: int = 0) -> None:
+        """
+        Record the chunks indexed for a source file, replacing its previous counts
+
+        Args:
+            source: Source path of the file
+            category: Category of the file
+            chunks: Number of chunks stored under the file
+            size_bytes: UTF-8 size of the stored chunk text
+            duplicates: Number of chunks of the file already stored under another source
+        """
+        with self._lock:
+            self.remove_source(source)
+            transferred_chunks, transferred_bytes = self._pending_transfers.pop(source, (0, 0))
+            chunks += transferred_chunks
+            size_bytes += transferred_bytes
+            duplicates -= transferred_chunks
+            self.sources[source] = {"category": category, "chunks": chunks, "bytes": size_bytes, "duplicates": duplicates}
+            totals = self.categories.setdefault(category, {"sources": 0, "chunks": 0, "bytes": 0})
+            totals["sources"] += 1
+            totals["chunks"] += chunks
+            totals["bytes"] += size_bytes
+            self.total_chunks += chunks
+            self.total_bytes += size_bytes
+            self.total_duplicates += duplicates
+            self.updated_at = datetime.now().isoformat()
+
+    def transfer(self, source: str, size_bytes: int) -> None:
+        """
+        Count a chunk under the source it was handed over to
+
+        Called when the source a deduplicated chunk was stored under is removed
+        and another source containing the chunk becomes its owner.
+
+        Args:
+            source: Source path of the new owner
+            size_bytes: UTF-8 size of the chunk text
+        """
+        with self._lock:
+            entry = self.sources.get(source)
+            if entry is None:
+                # The new owner is still being ingested
+                pending = self._pending_transfers.setdefault(source, [0, 0])
+                pending[0] += 1
+                pending[1] += size_bytes
+                return
+            entry["chunks"] += 1
+            entry["bytes"] += size_bytes
+            entry["duplicates"] -= 1
+            totals = self.categories[entry["category"]]
+            totals["chunks"] += 1
+            totals["bytes"] += size_bytes
+            self.total_chunks += 1
+            self.total_bytes += size_bytes
+            self.total_duplicates -= 1
+            self.updated_at = datetime.now().isoformat()
+
+    def remove_source(self, source: str) -> None:
+        """
+        Forget the chunks of a source file
+
+        Args:
+            source: Source path of the file
+        """
+        with self._lock:
+            entry = self.sources.pop(source, None)
+            if entry is None:
+                return
+            totals = self.categories[entry["category"]]
+            totals["sources"] -= 1
+            totals["chunks"] -= entry["chunks"]
+            totals["bytes"] -= entry["bytes"]
+            if not totals["sources"]:
+                del self.categories[entry["category"]]
+            self.total_chunks -= entry["chunks"]
+            self.total_bytes -= entry["bytes"]
+            self.total_duplicates -= entry["duplicates"]
+            self.updated_at = datetime.now().isoformat()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the current totals
+
+        Returns:
+            Dictionary with chunk, source and byte totals overall and per category
+        """
+        with self._lock:
+            return {
+                "total_chunks": self.total_chunks,
+                "total_sources": len(self.sources),
+                "bytes_indexed": self.total_bytes,
+                "duplicates_collapsed": self.total_duplicates,
+                "categories": {category: dict(totals) for category, totals in sorted(self.categories.items())},
+                "updated_at": self.updated_at
+            }
+
+    def save(self) -> None:
+        """Write the statistics to disk atomically"""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"sources": self.sources, "updated_at": self.updated_at}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.exists = True
@@ -0,0 +1,207 @@
+import fcntl
+import queue
+import asyncio
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from watchfiles import Change, DefaultFilter, awatch
+
+from app.config import KNOWLEDGE_BASE_DIR, PROCESSED_DIR, KB_WATCH_DEBOUNCE_MS, KB_WATCH_QUIET_MS
+from app.services.ingest_jobs import ingest_lock, lower_priority
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Seconds between liveness checks of the re-index process while a batch runs
+JOB_POLL_SECONDS = 1.0
+
+# Seconds between attempts of the other API workers to take over the watch
+LEADER_POLL_SECONDS = 30.0
+
+# Seconds the re-index process gets to finish its batch on shutdown
+STOP_TIMEOUT_SECONDS = 10.0
+
+# Held by the API worker that watches the knowledge base directory
+WATCH_LOCK_FILE = PROCESSED_DIR / "kb_watch.lock"
+
+class _DocumentFilter(DefaultFilter):
+    """Ignore editor swap files, VCS directories and hidden files, which are never ingested"""
+
+    def __call__(self, change: Change, path: str) -> bool:
+        return super().__call__(change, path) and not Path(path).name.startswith('.')
+
+async def watch_directory(
+    reindex: Callable[[List[Path]], Awaitable[Any]],
+    directory: Path = KNOWLEDGE_BASE_DIR,
+    stop_event: Optional[asyncio.Event] = None
+) -> None:
+    """
+    Re-index the documents of a directory whenever they change
+
+    File events are grouped until none arrived for KB_WATCH_QUIET_MS, for at
+    most KB_WATCH_DEBOUNCE_MS, so an editor saving a file or copying a folder
+    triggers one re-index. Events arriving while reindex runs are collected
+    and handed over in the next call.
+
+    Args:
+        reindex: Coroutine function receiving the created, modified and deleted paths
+        directory: Directory to watch recursively
+        stop_event: Optional event that ends the watch when set
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Watching {directory} for document changes")
+    async for changes in awatch(
+        directory,
+        watch_filter=_DocumentFilter(),
+        debounce=KB_WATCH_DEBOUNCE_MS,
+        step=KB_WATCH_QUIET_MS,
+        stop_event=stop_event
+    ):
+        paths = sorted({Path(path) for _, path in changes})
+        logger.info(f"Detected {len(paths)} changed paths in {directory}")
+        try:
+            await reindex(paths)
+        except Exception as e:
+            logger.error(f"Error re-indexing changed documents: {str(e)}")
+
+def _reindex_process(directory: str, requests: Any, results: Any) -> None:
+    """
+    Re-index process entry point, keeping one knowledge base and embedding model for all batches
+
+    Args:
+        directory: Watched knowledge base directory
+        requests: Queue receiving lists of changed paths, None stops the process
+        results: Queue receiving ("done", chunks added) or ("error", message) per batch
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Limit the process before the embedding libraries start their thread pools
+    lower_priority()
+    from app.services.knowledge_base import KnowledgeBase
+
+    knowledge_base = KnowledgeBase()
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            paths = requests.get(timeout=JOB_POLL_SECONDS)
+        except queue.Empty:
+            # Exit with the API worker, also when it was killed without stopping the watch
+            if parent is not None and not parent.is_alive():
+                return
+            continue
+        if paths is None:
+            return
+        try:
+            with ingest_lock():
+                chunks_added = asyncio.run(knowledge_base.ingest_changes(Path(directory), [Path(path) for path in paths]))
+            results.put(("done", chunks_added))
+        except Exception as e:
+            results.put(("error", str(e)))
+
+class _ReindexWorker:
+    """
+    Long-lived low-priority process re-indexing the changed paths of a watched directory
+
+    Parsing and embedding stay out of the API process, and the embedding
+    model is loaded once instead of once per batch. The process is started
+    on the first batch and again if it died.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        Initialize the worker without starting its process
+
+        Args:
+            directory: Watched knowledge base directory
+        """
+        self.directory = directory
+        self._context = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.Process] = None
+
+    def _start(self) -> None:
+        """Start the re-index process with fresh queues"""
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = self._context.Process(
+            target=_reindex_process,
+            args=(str(self.directory), self._requests, self._results),
+            name="kb-watch-reindex",
+            daemon=True
+        )
+        self._process.start()
+
+    def _wait_result(self) -> Tuple[str, Any]:
+        """Block until the process reports the result of a batch or dies"""
+        while True:
+            try:
+                return self._results.get(timeout=JOB_POLL_SECONDS)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError(f"Re-index process exited with code {self._process.exitcode}")
+
+    async def reindex(self, paths: List[Path]) -> int:
+        """
+        Re-index changed paths and wait until they are written
+
+        Args:
+            paths: Created, modified and deleted paths
+
+        Returns:
+            Number of chunks added to the vector store
+        """
+        if self._process is None or not self._process.is_alive():
+            self._start()
+        self._requests.put([str(path) for path in paths])
+        status, result = await asyncio.to_thread(self._wait_result)
+        if status == "error":
+            raise RuntimeError(result)
+        logger.info(f"Re-indexed changed documents: {result} chunks added")
+        return result
+
+    def stop(self) -> None:
+        """Stop the re-index process once it finished the current batch"""
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=STOP_TIMEOUT_SECONDS)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+async def _acquire_watch_lock() -> Any:
+    """Wait until this process holds the watch lock, returning the open lock file"""
+    WATCH_LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(WATCH_LOCK_FILE, 'w')
+    logged = False
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            if not logged:
+                logger.info("Another API worker watches the knowledge base directory")
+                logged = True
+            # Take over if the watching worker exits
+            await asyncio.sleep(LEADER_POLL_SECONDS)
+
+async def watch_knowledge_base(directory: Path = KNOWLEDGE_BASE_DIR) -> None:
+    """
+    Keep the knowledge base of the API service in sync with its document directory
+
+    Only one API worker watches the directory, the one holding the watch lock
+    file. Changed files are re-indexed by a long-lived low-priority process,
+    which takes turns with the ingestion jobs on the ingest lock. The API
+    workers pick up the result through the index generation file.
+
+    Args:
+        directory: Knowledge base directory to watch
+    """
+    lock_file = await _acquire_watch_lock()
+    worker = _ReindexWorker(directory)
+    try:
+        await watch_directory(worker.reindex, directory)
+    finally:
+        worker.stop()
+        lock_file.close()
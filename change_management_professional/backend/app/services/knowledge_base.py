@@ -1,6 +1,12 @@
 import os
+import re
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
 from pathlib import Path
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -10,7 +16,6 @@ from langchain.document_loaders import (
     Docx2txtLoader, 
     UnstructuredMarkdownLoader
 )
-from langchain.vectorstores import Chroma
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.schema import Document
 
@@ -20,12 +25,186 @@ from app.config import (
     NUM_DOCS_TO_RETRIEVE,
     SIMILARITY_THRESHOLD,
     DOCUMENT_CHUNK_SIZE,
-    DOCUMENT_CHUNK_OVERLAP
+    DOCUMENT_CHUNK_OVERLAP,
+    WARM_UP_QUERY,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    RETRIEVAL_CACHE_SIZE,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    KB_GENERATION_FILE,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    EMBEDDING_MAX_BATCH_TOKENS,
+    ONNX_THREADS,
+    INGEST_BATCH_SIZE,
+    INGEST_PERSIST_INTERVAL,
+    INGEST_WORKERS,
+    INGEST_MAX_CHUNKS_IN_MEMORY,
+    INGEST_STREAMING_THRESHOLD_BYTES,
+    RETRIEVAL_THREADS,
+    RETRIEVAL_MAX_QUEUE,
+    RETRIEVAL_MODE,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    VECTOR_BACKEND,
+    VECTOR_QUANTIZATION,
+    DEDUPE_CHUNKS,
+    DEDUPE_MAX_HAMMING,
+    KB_SNAPSHOT_PATH,
+    EMBEDDING_CACHE,
+    PARSED_TEXT_CACHE,
+    QUANTIZED_RESCORE_CANDIDATES
 )
+from app.services.bm25_index import BM25Index, reciprocal_rank_fusion
+from app.services.onnx_embeddings import OnnxEmbeddings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.parsed_cache import iter_cached_pages
+from app.services.quantized_index import QuantizedVectorIndex
+from app.services.vector_backends import VectorBackend, create_vector_backend, cosine_similarity
+from app.services.kb_stats import KnowledgeBaseStats
+from app.services.dedupe import NearDuplicateIndex, simhash
+from app.services.snapshot import restore_snapshot
+from app.services.ingest_manifest import IngestManifest, compute_file_hash, make_chunk_id
+from app.utils.cache import LRUCache
+from app.utils.executor import MeteredThreadPool, ThreadPoolSaturated
+from app.utils.progress import IngestProgress
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+def collapse_whitespace(query: str) -> str:
+    """
+    Collapse runs of whitespace in a query, keeping its case for the embedding model
+    
+    Args:
+        query: Raw user query
+        
+    Returns:
+        Query with collapsed whitespace
+    """
+    return re.sub(r"\s+", " ", query).strip()
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so trivially different phrasings share cache entries
+    
+    Only used as a cache key: the embedded text is the case-preserving collapse_whitespace
+    form, so queries differing only in case share the vector of the first one embedded.
+    
+    Args:
+        query: Raw user query
+        
+    Returns:
+        Lowercased query with collapsed whitespace
+    """
+    return collapse_whitespace(query).lower()
+
+def get_loader_for_file(file_path: Path) -> Any:
+    """
+    Get the appropriate document loader based on file extension
+    
+    Args:
+        file_path: Path to the document file
+        
+    Returns:
+        Document loader instance
+    """
+    file_extension = file_path.suffix.lower()
+    
+    if file_extension == '.txt':
+        return TextLoader(str(file_path))
+    elif file_extension == '.pdf':
+        return PyPDFLoader(str(file_path))
+    elif file_extension in ['.docx', '.doc']:
+        return Docx2txtLoader(str(file_path))
+    elif file_extension in ['.md', '.markdown']:
+        return UnstructuredMarkdownLoader(str(file_path))
+    else:
+        # Default to text loader
+        return TextLoader(str(file_path))
+
+def iter_split_file(
+    file_path: Path,
+    text_splitter: RecursiveCharacterTextSplitter,
+    metadata: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None
+) -> Iterator[Document]:
+    """
+    Lazily load a document page by page (or section by section) and yield its chunks
+    
+    Only one loaded page is held at a time, so even very large documents can be
+    split with bounded memory. With PARSED_TEXT_CACHE and a content hash, the
+    text extracted by PDF, Word and Markdown loaders is cached so later
+    ingests of the same content skip parsing.
+    
+    Args:
+        file_path: Path to the document file
+        text_splitter: Splitter used to chunk the loaded pages
+        metadata: Optional metadata for the document
+        content_hash: Optional content hash of the file, the parsed text cache key
+        
+    Yields:
+        Chunks ready to be embedded
+    """
+    # Get appropriate loader
+    loader = get_loader_for_file(file_path)
+    if PARSED_TEXT_CACHE and content_hash is not None and not isinstance(loader, TextLoader):
+        pages = iter_cached_pages(loader, content_hash)
+    else:
+        pages = loader.lazy_load()
+    
+    for page in pages:
+        # Add file metadata if provided
+        if metadata:
+            page.metadata.update(metadata)
+        
+        # Ensure source is in metadata
+        if "source" not in page.metadata:
+            page.metadata["source"] = str(file_path)
+        
+        # Split the page into chunks
+        yield from text_splitter.split_documents([page])
+
+def load_and_split_file(
+    file_path: Path,
+    text_splitter: RecursiveCharacterTextSplitter,
+    metadata: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None
+) -> List[Document]:
+    """
+    Load a document from disk and split it into chunks
+    
+    Args:
+        file_path: Path to the document file
+        text_splitter: Splitter used to chunk the loaded pages
+        metadata: Optional metadata for the document
+        content_hash: Optional content hash of the file, the parsed text cache key
+        
+    Returns:
+        List of chunks ready to be embedded
+    """
+    return list(iter_split_file(file_path, text_splitter, metadata, content_hash))
+
+# Text splitters built inside parser worker processes, keyed by (chunk size, overlap)
+_worker_text_splitters: Dict[Tuple[int, int], RecursiveCharacterTextSplitter] = {}
+
+def _parse_file_worker(
+    file_path: Path,
+    metadata: Dict[str, Any],
+    chunk_size: int,
+    chunk_overlap: int,
+    content_hash: Optional[str] = None
+) -> List[Document]:
+    """Process pool entry point that loads and splits a single document"""
+    key = (chunk_size, chunk_overlap)
+    if key not in _worker_text_splitters:
+        _worker_text_splitters[key] = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+    return load_and_split_file(file_path, _worker_text_splitters[key], metadata, content_hash)
+
 class KnowledgeBase:
     """Service for handling document storage, retrieval and RAG functionality"""
     
@@ -33,22 +212,25 @@ class KnowledgeBase:
         """Initialize the knowledge base with vector store and embeddings"""
         try:
             # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-            
-            # Check if vector store exists and load it
-            if os.path.exists(VECTOR_DB_PATH) and os.listdir(VECTOR_DB_PATH):
-                self.vectorstore = Chroma(
-                    persist_directory=VECTOR_DB_PATH,
-                    embedding_function=self.embeddings
+            if EMBEDDING_BACKEND == "onnx":
+                self.embeddings = OnnxEmbeddings(
+                    EMBEDDING_MODEL,
+                    ONNX_MODEL_DIR,
+                    batch_size=EMBEDDING_BATCH_SIZE,
+                    max_batch_tokens=EMBEDDING_MAX_BATCH_TOKENS,
+                    threads=ONNX_THREADS
                 )
-                logger.info(f"Loaded existing vector store from {VECTOR_DB_PATH}")
             else:
-                # Create a new vector store if it doesn't exist
-                self.vectorstore = Chroma(
-                    persist_directory=VECTOR_DB_PATH,
-                    embedding_function=self.embeddings
+                self.embeddings = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL,
+                    encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE}
                 )
-                logger.info(f"Created new vector store at {VECTOR_DB_PATH}")
+            
+            # Vectors of previously embedded chunk texts, shared by all ingests
+            self.embedding_cache = EmbeddingCache(f"{EMBEDDING_BACKEND}/{EMBEDDING_MODEL}") if EMBEDDING_CACHE else None
+            
+            # Store of chunk vectors, text and metadata
+            self.backend: VectorBackend = create_vector_backend(VECTOR_BACKEND, self.embeddings)
                 
             # Initialize text splitter for document chunking
             self.text_splitter = RecursiveCharacterTextSplitter(
@@ -57,11 +239,277 @@ class KnowledgeBase:
                 length_function=len,
             )
             
+            # Record of ingested files and the chunks they produced
+            self.manifest = IngestManifest()
+            
+            # Chunk, source and byte totals kept up to date at ingest time
+            self.stats = KnowledgeBaseStats()
+            self._stats_lock = threading.Lock()
+            
+            # Fingerprints of stored chunks, near-duplicates are not stored twice
+            self.dedupe = NearDuplicateIndex(DEDUPE_MAX_HAMMING) if DEDUPE_CHUNKS else None
+            self._dedupe_lock = threading.Lock()
+            
+            # Lexical index built alongside the vector store for hybrid retrieval
+            self.bm25_index = BM25Index()
+            self._bm25_lock = threading.Lock()
+            
+            # Optional quantized copy of the chunk vectors, searched instead of the backend
+            self.vector_index = QuantizedVectorIndex(VECTOR_QUANTIZATION) if VECTOR_QUANTIZATION != "none" else None
+            self._vector_index_lock = threading.Lock()
+            
+            # Cache of normalized query -> embedding vector
+            self._query_embedding_cache = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+            
+            # Cache of (index generation, normalized query, k, mode, categories) -> relevant documents
+            self._retrieval_cache = LRUCache(RETRIEVAL_CACHE_SIZE, ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS)
+            self._index_generation = 0
+            self._generation_mtime: Optional[int] = None
+            self._bm25_generation = self._get_index_generation()
+            self._vector_index_generation = self._bm25_generation
+            self._backend_generation = self._bm25_generation
+            self._stats_generation = self._bm25_generation
+            self._dedupe_generation = self._bm25_generation
+            self._backend_lock = threading.Lock()
+            
+            # Dedicated pool for blocking embedding and vector search calls
+            self._retrieval_pool = MeteredThreadPool(RETRIEVAL_THREADS, RETRIEVAL_MAX_QUEUE, name="kb-retrieval")
+            
+            # Set once warm_up() has loaded the model and touched the index
+            self.ready = False
+            
             logger.info("Knowledge base service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize knowledge base: {str(e)}")
             raise
     
+    def warm_up(self) -> None:
+        """
+        Run a throwaway query so the embedding model and vector index are
+        fully loaded before the first user request arrives
+        """
+        query_embedding = self.embeddings.embed_query(WARM_UP_QUERY)
+        self._vector_search(query_embedding, 1)
+        if RETRIEVAL_MODE == "hybrid":
+            self._get_bm25_index()
+        self.ready = True
+        logger.info("Knowledge base warm-up complete")
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the cached vector for repeated queries
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Embedding vector for the query
+        """
+        key = normalize_query(query)
+        embedding = self._query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(collapse_whitespace(query))
+            self._query_embedding_cache.put(key, embedding)
+        return embedding
+    
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries with a single model call, reusing cached vectors
+        
+        Args:
+            queries: User queries
+            
+        Returns:
+            Embedding vector for each query
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings = {key: self._query_embedding_cache.get(key) for key in set(keys)}
+        # Embed the first spelling of each uncached key, keeping its case
+        missing = {}
+        for key, query in zip(keys, queries):
+            if embeddings[key] is None and key not in missing:
+                missing[key] = collapse_whitespace(query)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            for key, embedding in zip(missing, vectors):
+                embeddings[key] = embedding
+                self._query_embedding_cache.put(key, embedding)
+        return [embeddings[key] for key in keys]
+    
+    def _get_index_generation(self) -> int:
+        """
+        Get the current index generation, picking up bumps made by other processes
+        
+        Returns:
+            Generation counter of the vector index
+        """
+        try:
+            mtime = os.stat(KB_GENERATION_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return self._index_generation
+        
+        if mtime != self._generation_mtime:
+            try:
+                self._index_generation = int(KB_GENERATION_FILE.read_text().strip() or 0)
+                self._generation_mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read index generation: {str(e)}")
+        return self._index_generation
+    
+    def _bump_index_generation(self) -> None:
+        """Invalidate cached retrieval results after chunks are added or removed"""
+        generation = self._get_index_generation() + 1
+        tmp_path = KB_GENERATION_FILE.with_suffix(".tmp")
+        tmp_path.write_text(str(generation))
+        os.replace(tmp_path, KB_GENERATION_FILE)
+        self._index_generation = generation
+        # This process already holds the up-to-date backend and sidecar indexes
+        self._backend_generation = generation
+        self._stats_generation = generation
+        self._dedupe_generation = generation
+        self._bm25_generation = generation
+        self._vector_index_generation = generation
+        self._retrieval_cache.clear()
+    
+    def _get_backend(self) -> VectorBackend:
+        """
+        Get the vector backend, reloading it when another process changed the index
+        
+        Returns:
+            Current vector backend
+        """
+        with self._backend_lock:
+            generation = self._get_index_generation()
+            if generation != self._backend_generation:
+                self.backend.reload()
+                self._backend_generation = generation
+            return self.backend
+    
+    def _get_stats(self) -> KnowledgeBaseStats:
+        """
+        Get the knowledge base statistics, reloading them when another process
+        changed the index and computing them once for stores ingested before
+        statistics were kept
+        
+        Returns:
+            Current statistics
+        """
+        with self._stats_lock:
+            generation = self._get_index_generation()
+            if generation != self._stats_generation:
+                self.stats = KnowledgeBaseStats()
+                self._stats_generation = generation
+            
+            backend = self._get_backend()
+            if not self.stats.exists and backend.count():
+                logger.info("Computing knowledge base statistics from existing vector store")
+                per_source: Dict[str, List[Any]] = {}
+                for _, documents, _ in backend.iter_chunks(INGEST_BATCH_SIZE):
+                    for doc in documents:
+                        entry = per_source.setdefault(
+                            doc.metadata.get("source", "unknown"),
+                            [doc.metadata.get("category", "general"), 0, 0]
+                        )
+                        entry[1] += 1
+                        entry[2] += len(doc.page_content.encode("utf-8"))
+                for source, (category, chunks, size_bytes) in per_source.items():
+                    self.stats.add_source(source, category, chunks, size_bytes)
+                self.stats.save()
+            return self.stats
+    
+    def _get_dedupe_index(self) -> Optional[NearDuplicateIndex]:
+        """
+        Get the near-duplicate index, reloading it when another process changed
+        the index and fingerprinting the vector store if it was never created
+        
+        Returns:
+            Current near-duplicate index, or None if deduplication is disabled
+        """
+        if self.dedupe is None:
+            return None
+        
+        with self._dedupe_lock:
+            generation = self._get_index_generation()
+            if generation != self._dedupe_generation:
+                self.dedupe = NearDuplicateIndex(DEDUPE_MAX_HAMMING)
+                self._dedupe_generation = generation
+            
+            backend = self._get_backend()
+            if not self.dedupe.exists and backend.count():
+                logger.info("Fingerprinting existing vector store for near-duplicate detection")
+                for chunk_ids, documents, _ in backend.iter_chunks(INGEST_BATCH_SIZE):
+                    for chunk_id, doc in zip(chunk_ids, documents):
+                        self.dedupe.add(
+                            chunk_id,
+                            simhash(doc.page_content),
+                            doc.metadata.get("category", "general"),
+                            [doc.metadata.get("source", "unknown")]
+                        )
+                self.dedupe.save()
+            return self.dedupe
+    
+    def _get_bm25_index(self) -> BM25Index:
+        """
+        Get the BM25 index, reloading it when another process changed the index
+        and building it from the vector store if it was never created
+        
+        Returns:
+            Current BM25 index
+        """
+        with self._bm25_lock:
+            generation = self._get_index_generation()
+            if generation != self._bm25_generation:
+                self.bm25_index = BM25Index()
+                self._bm25_generation = generation
+            
+            backend = self._get_backend()
+            if not len(self.bm25_index) and backend.count():
+                logger.info("Building BM25 index from existing vector store")
+                for chunk_ids, documents, _ in backend.iter_chunks(INGEST_BATCH_SIZE):
+                    for chunk_id, doc in zip(chunk_ids, documents):
+                        self.bm25_index.add(chunk_id, doc.page_content, doc.metadata.get("category"))
+                self.bm25_index.save()
+            return self.bm25_index
+    
+    def _get_vector_index(self) -> Optional[QuantizedVectorIndex]:
+        """
+        Get the quantized vector index, reloading it when another process changed
+        the index and building it from the vector store if it was never created
+        
+        Returns:
+            Current quantized vector index, or None if quantization is disabled
+        """
+        if self.vector_index is None:
+            return None
+        
+        with self._vector_index_lock:
+            generation = self._get_index_generation()
+            if generation != self._vector_index_generation:
+                self.vector_index = QuantizedVectorIndex(VECTOR_QUANTIZATION)
+                self._vector_index_generation = generation
+            
+            backend = self._get_backend()
+            if not len(self.vector_index) and backend.count():
+                logger.info("Building quantized vector index from existing vector store")
+                for chunk_ids, documents, embeddings in backend.iter_chunks(INGEST_BATCH_SIZE, include_embeddings=True):
+                    self.vector_index.add(chunk_ids, embeddings, [doc.metadata.get("category") for doc in documents])
+                self.vector_index.save()
+            return self.vector_index
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for the retrieval caches
+        
+        Returns:
+            Dictionary of cache statistics keyed by cache name
+        """
+        return {
+            "query_embeddings": self._query_embedding_cache.stats(),
+            "retrieval_results": self._retrieval_cache.stats(),
+            "chunk_embeddings": self.embedding_cache.stats() if self.embedding_cache is not None else None,
+            "index_generation": self._get_index_generation()
+        }
+    
     def _get_loader_for_file(self, file_path: Path) -> Any:
         """
         Get the appropriate document loader based on file extension
@@ -72,76 +520,517 @@ class KnowledgeBase:
         Returns:
             Document loader instance
         """
-        file_extension = file_path.suffix.lower()
-        
-        if file_extension == '.txt':
-            return TextLoader(str(file_path))
-        elif file_extension == '.pdf':
-            return PyPDFLoader(str(file_path))
-        elif file_extension in ['.docx', '.doc']:
-            return Docx2txtLoader(str(file_path))
-        elif file_extension in ['.md', '.markdown']:
-            return UnstructuredMarkdownLoader(str(file_path))
-        else:
-            # Default to text loader
-            return TextLoader(str(file_path))
+        return get_loader_for_file(file_path)
     
-    async def ingest_document(self, file_path: Path, metadata: Optional[Dict[str, Any]] = None) -> int:
+    def _load_and_split(
+        self,
+        file_path: Path,
+        metadata: Optional[Dict[str, Any]] = None,
+        content_hash: Optional[str] = None
+    ) -> List[Document]:
         """
-        Ingest a document into the knowledge base
+        Load a document from disk and split it into chunks
         
         Args:
             file_path: Path to the document file
             metadata: Optional metadata for the document
+            content_hash: Optional content hash of the file, the parsed text cache key
             
         Returns:
-            Number of chunks added to the vector store
+            List of chunks ready to be embedded
         """
-        try:
-            if not file_path.exists():
-                logger.error(f"File not found: {file_path}")
-                return 0
+        return load_and_split_file(file_path, self.text_splitter, metadata, content_hash)
+    
+    def _iter_directory_files(self, directory_path: Path) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        """
+        Walk a directory and yield every document with its ingest metadata
+        
+        Args:
+            directory_path: Path to the directory
+            
+        Yields:
+            Tuples of (file path, metadata)
+        """
+        # Walk through directory recursively
+        for root, _, files in os.walk(directory_path):
+            root_path = Path(root)
+            
+            # Process each file
+            for file in files:
+                file_path = root_path / file
                 
-            # Get appropriate loader
-            loader = self._get_loader_for_file(file_path)
+                # Skip hidden files and non-document files
+                if file.startswith('.'):
+                    continue
+                    
+                yield file_path, self._file_metadata(directory_path, file_path)
+    
+    @staticmethod
+    def _file_metadata(directory_path: Path, file_path: Path) -> Dict[str, Any]:
+        """
+        Get the ingest metadata of a document inside a knowledge base directory
+        
+        Args:
+            directory_path: Path to the knowledge base directory
+            file_path: Path to the document
             
-            # Load document
-            documents = loader.load()
+        Returns:
+            Metadata with the source, file name and category
+        """
+        # Extract relative path for metadata
+        rel_path = file_path.relative_to(directory_path)
+        category = rel_path.parts[0] if len(rel_path.parts) > 1 else "general"
+        
+        # Create metadata
+        return {
+            "source": str(file_path),
+            "filename": file_path.name,
+            "category": category
+        }
+    
+    def _write_chunks(self, chunks: List[Document]) -> None:
+        """
+        Embed a batch of chunks in one pass and add them to the vector store
+        
+        With EMBEDDING_CACHE, only chunk texts that were never embedded by the
+        current model are passed to it.
+        
+        Args:
+            chunks: Chunks to add, possibly coming from several files, each
+                carrying its chunk_id in metadata
+        """
+        texts = [chunk.page_content for chunk in chunks]
+        if self.embedding_cache is not None:
+            embeddings = self.embedding_cache.embed_documents(self.embeddings, texts)
+        else:
+            embeddings = self.embeddings.embed_documents(texts)
+        chunk_ids = [chunk.metadata["chunk_id"] for chunk in chunks]
+        self.backend.add(chunk_ids, embeddings, chunks)
+        
+        if self.vector_index is not None:
+            self.vector_index.add(
+                chunk_ids,
+                embeddings,
+                [chunk.metadata.get("category") for chunk in chunks]
+            )
+        for chunk in chunks:
+            self.bm25_index.add(chunk.metadata["chunk_id"], chunk.page_content, chunk.metadata.get("category"))
+    
+    def _delete_source_chunks(self, source: str) -> int:
+        """
+        Remove every stored chunk of a source file and forget it in the manifest and statistics
+        
+        Args:
+            source: Source path of the file
             
-            # Add file metadata if provided
-            if metadata:
-                for doc in documents:
-                    doc.metadata.update(metadata)
+        Returns:
+            Number of chunks deleted
+        """
+        chunk_ids = self.manifest.remove(source)
+        if not chunk_ids:
+            # Chunks ingested before the manifest existed can only be found by source
+            chunk_ids = self.backend.ids_for_source(source)
+        shared_ids: List[str] = []
+        if self.dedupe is not None:
+            # Chunks that other sources also contain are kept
+            chunk_ids, shared_ids = self.dedupe.release(source, chunk_ids)
+        if chunk_ids:
+            self.backend.delete(chunk_ids)
+            self.bm25_index.remove(chunk_ids)
+            if self.vector_index is not None:
+                self.vector_index.remove(chunk_ids)
+        self.stats.remove_source(source)
+        if shared_ids:
+            self._update_chunk_references(shared_ids)
+        return len(chunk_ids)
+    
+    def _update_chunk_references(self, chunk_ids: List[str]) -> None:
+        """
+        Write the sources referencing deduplicated chunks into their metadata
+        
+        When the source a chunk is stored under was removed, the chunk is
+        handed over to the next source containing it.
+        
+        Args:
+            chunk_ids: IDs of stored chunks whose references changed
+        """
+        updated_ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for chunk_id, doc in self.backend.get_documents(chunk_ids).items():
+            references = self.dedupe.references.get(chunk_id)
+            if not references:
+                continue
+            metadata = dict(doc.metadata)
+            if metadata.get("source") != references[0]:
+                metadata["source"] = references[0]
+                metadata["filename"] = Path(references[0]).name
+                self.stats.transfer(references[0], len(doc.page_content.encode("utf-8")))
+            metadata["duplicate_sources"] = json.dumps(references[1:])
+            updated_ids.append(chunk_id)
+            metadatas.append(metadata)
+        if updated_ids:
+            self.backend.update_metadata(updated_ids, metadatas)
+    
+    def _parse_files(
+        self,
+        files: List[Tuple[Path, Dict[str, Any]]],
+        workers: int,
+        streaming_threshold_bytes: int,
+        content_hashes: Optional[Dict[str, str]] = None
+    ) -> Iterator[Tuple[Path, Optional[Iterable[Document]]]]:
+        """
+        Load and split documents, in parallel worker processes when workers > 1
+        
+        Results are yielded as soon as each file is parsed so the caller can
+        embed them while the remaining files are still being parsed. At most
+        2 * workers files are in flight at any time. Files of at least
+        streaming_threshold_bytes are never materialized: they are yielded
+        last as lazy chunk iterators parsed in this process.
+        
+        Args:
+            files: Tuples of (file path, metadata) to parse
+            workers: Number of parser processes, 1 parses in this process
+            streaming_threshold_bytes: File size from which documents are streamed
+            content_hashes: Optional content hash of each file keyed by source, used by the parsed text cache
             
-            # Ensure source is in metadata
-            for doc in documents:
-                if "source" not in doc.metadata:
-                    doc.metadata["source"] = str(file_path)
+        Yields:
+            Tuples of (file path, chunks), chunks is None if parsing failed
+        """
+        content_hashes = content_hashes or {}
+        small_files: List[Tuple[Path, Dict[str, Any]]] = []
+        large_files: List[Tuple[Path, Dict[str, Any]]] = []
+        for file_path, metadata in files:
+            try:
+                is_large = file_path.stat().st_size >= streaming_threshold_bytes
+            except OSError:
+                is_large = False
+            (large_files if is_large else small_files).append((file_path, metadata))
+        
+        if workers <= 1:
+            for file_path, metadata in small_files:
+                try:
+                    yield file_path, self._load_and_split(file_path, metadata, content_hashes.get(metadata["source"]))
+                except Exception as e:
+                    logger.error(f"Error loading document {file_path}: {str(e)}")
+                    yield file_path, None
+        elif small_files:
+            chunk_size = self.text_splitter._chunk_size
+            chunk_overlap = self.text_splitter._chunk_overlap
+            files_iter = iter(small_files)
+            in_flight: Dict[Future, Path] = {}
             
-            # Split documents into chunks
-            chunks = self.text_splitter.split_documents(documents)
+            # Spawn rather than fork so workers don't inherit the loaded embedding model
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                def submit_next() -> None:
+                    for file_path, metadata in files_iter:
+                        future = pool.submit(
+                            _parse_file_worker,
+                            file_path,
+                            metadata,
+                            chunk_size,
+                            chunk_overlap,
+                            content_hashes.get(metadata["source"])
+                        )
+                        in_flight[future] = file_path
+                        return
+                
+                for _ in range(workers * 2):
+                    submit_next()
+                
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = in_flight.pop(future)
+                        submit_next()
+                        try:
+                            yield file_path, future.result()
+                        except Exception as e:
+                            logger.error(f"Error loading document {file_path}: {str(e)}")
+                            yield file_path, None
+        
+        for file_path, metadata in large_files:
+            logger.info(f"Streaming large document: {file_path}")
+            yield file_path, iter_split_file(file_path, self.text_splitter, metadata, content_hashes.get(metadata["source"]))
+    
+    def _ingest_files(
+        self,
+        files: List[Tuple[Path, Dict[str, Any]]],
+        content_hashes: Dict[str, str],
+        batch_size: int,
+        persist_interval: int,
+        workers: int,
+        max_chunks_in_memory: int,
+        streaming_threshold_bytes: int,
+        progress: Optional[IngestProgress] = None
+    ) -> Tuple[int, int]:
+        """
+        Parse, embed and store files, replacing the chunks of their previous versions
+        
+        Chunks from consecutive files are accumulated and embedded together in
+        batches, and never more than max_chunks_in_memory chunks are buffered.
+        A file is recorded in the manifest once all of its chunks are written.
+        With DEDUPE_CHUNKS, near-duplicates of stored or queued chunks are
+        dropped and their source is added to the references of the kept chunk.
+        
+        Args:
+            files: Tuples of (file path, metadata with "source") to ingest
+            content_hashes: Content hash of each file keyed by source
+            batch_size: Number of chunks embedded and written per batch
+            persist_interval: Number of batches between persist checkpoints
+            workers: Number of document parser processes
+            max_chunks_in_memory: Upper bound on buffered chunks
+            streaming_threshold_bytes: File size from which documents are streamed
+            progress: Optional tracker receiving parsed file and written chunk counts
             
-            if not chunks:
-                logger.warning(f"No chunks created from document: {file_path}")
-                return 0
+        Returns:
+            Tuple of (chunks added to the vector store, near-duplicate chunks collapsed)
+        """
+        batch_size = max(1, min(batch_size, max_chunks_in_memory))
+        total_chunks = 0
+        collapsed_chunks = 0
+        queued_chunks = 0
+        written_chunks = 0
+        pending_chunks: List[Document] = []
+        # (queued chunk offset of the file's last chunk, source, chunk IDs, (stored chunks, text bytes, duplicates)), in queue order
+        pending_files: List[Tuple[int, str, List[str], Tuple[int, int, int]]] = []
+        # Stored chunks that gained a reference, their metadata is updated once written
+        referenced_ids = set()
+        failed_sources = set()
+        batches_since_persist = 0
+        sources = {file_path: metadata["source"] for file_path, metadata in files}
+        categories = {metadata["source"]: metadata.get("category", "general") for _, metadata in files}
+        
+        def checkpoint() -> None:
+            self.backend.persist()
+            self.manifest.save()
+            self.stats.save()
+            self.bm25_index.save()
+            if self.vector_index is not None:
+                self.vector_index.save()
+            if self.dedupe is not None:
+                self.dedupe.save()
+        
+        def write_batch(batch: List[Document]) -> None:
+            nonlocal total_chunks, written_chunks, batches_since_persist
+            if batch:
+                try:
+                    self._write_chunks(batch)
+                    total_chunks += len(batch)
+                    if progress is not None:
+                        progress.chunks_written(len(batch))
+                    logger.info(f"Embedded batch of {len(batch)} chunks ({total_chunks} total)")
+                except Exception as e:
+                    logger.error(f"Error writing batch of {len(batch)} chunks: {str(e)}")
+                    failed_sources.update(chunk.metadata["source"] for chunk in batch)
+                    if self.dedupe is not None:
+                        self.dedupe.remove(chunk.metadata["chunk_id"] for chunk in batch)
+                written_chunks += len(batch)
+                batches_since_persist += 1
+            
+            if referenced_ids:
+                self._update_chunk_references(list(referenced_ids))
+                referenced_ids.clear()
             
-            # Add chunks to vector store
-            self.vectorstore.add_documents(chunks)
-            self.vectorstore.persist()
+            # Record files once all of their chunks have been written
+            while pending_files and pending_files[0][0] <= written_chunks:
+                _, source, chunk_ids, (stored_chunks, size_bytes, duplicates) = pending_files.pop(0)
+                if source not in failed_sources:
+                    self.manifest.update(source, content_hashes[source], chunk_ids)
+                    self.stats.add_source(source, categories[source], stored_chunks, size_bytes, duplicates)
             
-            logger.info(f"Ingested {len(chunks)} chunks from {file_path}")
-            return len(chunks)
+            if persist_interval and batches_since_persist >= persist_interval:
+                checkpoint()
+                batches_since_persist = 0
+        
+        for file_path, chunks in self._parse_files(files, workers, streaming_threshold_bytes, content_hashes):
+            if chunks is None:
+                if progress is not None:
+                    progress.file_parsed(failed=True)
+                continue
             
+            # Replace the chunks of the previous version of the file
+            source = sources[file_path]
+            self._delete_source_chunks(source)
+            
+            chunk_ids: List[str] = []
+            stored_chunks = 0
+            size_bytes = 0
+            duplicates = 0
+            try:
+                for position, chunk in enumerate(chunks):
+                    chunk_id = make_chunk_id(source, content_hashes[source], position)
+                    
+                    if self.dedupe is not None:
+                        fingerprint = simhash(chunk.page_content)
+                        duplicate_of = self.dedupe.find(fingerprint, categories[source])
+                        if duplicate_of is not None:
+                            # Keep the stored chunk and remember this source contains it too
+                            collapsed_chunks += 1
+                            if self.dedupe.add_reference(duplicate_of, source):
+                                chunk_ids.append(duplicate_of)
+                                referenced_ids.add(duplicate_of)
+                                duplicates += 1
+                            continue
+                        self.dedupe.add(chunk_id, fingerprint, categories[source], [source])
+                    
+                    chunk.metadata["chunk_id"] = chunk_id
+                    chunk_ids.append(chunk_id)
+                    stored_chunks += 1
+                    size_bytes += len(chunk.page_content.encode("utf-8"))
+                    queued_chunks += 1
+                    
+                    # Accumulate chunks across files into large embedding batches
+                    pending_chunks.append(chunk)
+                    if len(pending_chunks) >= batch_size:
+                        write_batch(pending_chunks)
+                        pending_chunks = []
+            except Exception as e:
+                logger.error(f"Error loading document {file_path}: {str(e)}")
+                failed_sources.add(source)
+            if progress is not None:
+                progress.file_parsed(failed=source in failed_sources)
+            
+            if not chunk_ids:
+                logger.warning(f"No chunks created from document: {file_path}")
+            pending_files.append((queued_chunks, source, chunk_ids, (stored_chunks, size_bytes, duplicates)))
+        
+        write_batch(pending_chunks)
+        checkpoint()
+        return total_chunks, collapsed_chunks
+    
+    async def ingest_document(
+        self,
+        file_path: Path,
+        metadata: Optional[Dict[str, Any]] = None,
+        incremental: bool = True,
+        progress: Optional[IngestProgress] = None
+    ) -> int:
+        """
+        Ingest a document into the knowledge base, replacing any previous version
+        
+        Args:
+            file_path: Path to the document file
+            metadata: Optional metadata for the document
+            incremental: Skip the file if its content hash matches the manifest
+            progress: Optional tracker receiving parsed file and written chunk counts
+            
+        Returns:
+            Number of chunks added to the vector store
+        """
+        try:
+            return await self.ingest_documents([(file_path, metadata)], incremental=incremental, progress=progress)
         except Exception as e:
             logger.error(f"Error ingesting document {file_path}: {str(e)}")
             return 0
     
-    async def ingest_directory(self, directory_path: Path) -> int:
+    async def ingest_documents(
+        self,
+        files: List[Tuple[Path, Optional[Dict[str, Any]]]],
+        incremental: bool = True,
+        progress: Optional[IngestProgress] = None
+    ) -> int:
+        """
+        Ingest several documents into the knowledge base, replacing any previous versions
+        
+        The files are embedded together in batches like in ingest_directory,
+        and the store is persisted and the index generation bumped once for
+        the whole list.
+        
+        Args:
+            files: Tuples of (file path, optional metadata) to ingest
+            incremental: Skip files whose content hash matches the manifest
+            progress: Optional tracker receiving parsed file and written chunk counts
+            
+        Returns:
+            Number of chunks added to the vector store
+        """
+        self.manifest = IngestManifest()
+        # Long-lived writers pick up the writes of other processes before adding to the indexes
+        self._get_backend()
+        self._get_stats()
+        self._get_dedupe_index()
+        self._get_bm25_index()
+        self._get_vector_index()
+        
+        files_to_parse: List[Tuple[Path, Dict[str, Any]]] = []
+        content_hashes: Dict[str, str] = {}
+        skipped_files = 0
+        for file_path, metadata in files:
+            if not file_path.exists():
+                logger.error(f"File not found: {file_path}")
+                continue
+            
+            metadata = dict(metadata or {})
+            metadata.setdefault("source", str(file_path))
+            source = metadata["source"]
+            try:
+                content_hashes[source] = compute_file_hash(file_path)
+            except OSError as e:
+                logger.error(f"Error reading document {file_path}: {str(e)}")
+                continue
+            if incremental and self.manifest.is_unchanged(source, content_hashes[source]):
+                logger.info(f"Skipping unchanged document: {file_path}")
+                skipped_files += 1
+                continue
+            files_to_parse.append((file_path, metadata))
+        
+        if progress is not None:
+            progress.add_files(len(files_to_parse), skipped=skipped_files)
+        if not files_to_parse:
+            return 0
+        
+        chunk_count, collapsed_chunks = self._ingest_files(
+            files_to_parse,
+            content_hashes,
+            batch_size=INGEST_BATCH_SIZE,
+            persist_interval=0,
+            workers=min(INGEST_WORKERS, len(files_to_parse)),
+            max_chunks_in_memory=INGEST_MAX_CHUNKS_IN_MEMORY,
+            streaming_threshold_bytes=INGEST_STREAMING_THRESHOLD_BYTES,
+            progress=progress
+        )
+        self._bump_index_generation()
+        
+        logger.info(
+            f"Ingested {chunk_count} chunks from {len(files_to_parse)} documents "
+            f"({skipped_files} unchanged documents skipped, {collapsed_chunks} near-duplicates collapsed)"
+        )
+        return chunk_count
+    
+    async def ingest_directory(
+        self,
+        directory_path: Path,
+        batch_size: int = INGEST_BATCH_SIZE,
+        persist_interval: int = INGEST_PERSIST_INTERVAL,
+        workers: int = INGEST_WORKERS,
+        incremental: bool = True,
+        max_chunks_in_memory: int = INGEST_MAX_CHUNKS_IN_MEMORY,
+        streaming_threshold_bytes: int = INGEST_STREAMING_THRESHOLD_BYTES,
+        progress: Optional[IngestProgress] = None
+    ) -> int:
         """
         Recursively ingest all documents in a directory
         
+        Chunks from consecutive files are accumulated and embedded together in
+        batches of batch_size, and the store is persisted every persist_interval
+        batches (0 = only once at the end) instead of once per file. With
+        workers > 1 documents are parsed in a process pool while earlier
+        batches are being embedded. Files of at least streaming_threshold_bytes
+        are loaded page by page so they never sit in memory as a whole.
+        
+        The ingest manifest makes re-runs incremental: files whose content hash
+        is unchanged are skipped, modified files have their old chunks replaced
+        and chunks of files deleted from the directory are removed.
+        
         Args:
             directory_path: Path to the directory
+            batch_size: Number of chunks embedded and written per batch
+            persist_interval: Number of batches between persist checkpoints
+            workers: Number of document parser processes
+            incremental: Skip files whose content hash matches the manifest
+            max_chunks_in_memory: Upper bound on chunks buffered before embedding
+            streaming_threshold_bytes: File size from which documents are streamed
+            progress: Optional tracker receiving file and chunk counts as the ingest proceeds
             
         Returns:
             Total number of chunks added to the vector store
@@ -149,82 +1038,457 @@ class KnowledgeBase:
         if not directory_path.exists() or not directory_path.is_dir():
             logger.error(f"Directory not found: {directory_path}")
             return 0
+        
+        self.manifest = IngestManifest()
+        self._get_backend()
+        self._get_stats()
+        self._get_dedupe_index()
+        self._get_bm25_index()
+        self._get_vector_index()
+        
+        # Decide which files need (re-)ingesting
+        files_to_parse: List[Tuple[Path, Dict[str, Any]]] = []
+        content_hashes: Dict[str, str] = {}
+        skipped_files = 0
+        for file_path, metadata in self._iter_directory_files(directory_path):
+            source = metadata["source"]
+            try:
+                content_hashes[source] = compute_file_hash(file_path)
+            except OSError as e:
+                logger.error(f"Error reading document {file_path}: {str(e)}")
+                continue
+            if incremental and self.manifest.is_unchanged(source, content_hashes[source]):
+                skipped_files += 1
+                continue
+            files_to_parse.append((file_path, metadata))
+        
+        if progress is not None:
+            progress.add_files(len(files_to_parse), skipped=skipped_files)
+        
+        # Drop chunks of files that no longer exist
+        removed_chunks = 0
+        removed_sources = [source for source in self.manifest.sources_under(directory_path) if source not in content_hashes]
+        for source in removed_sources:
+            removed_chunks += self._delete_source_chunks(source)
+        
+        total_chunks, collapsed_chunks = self._ingest_files(
+            files_to_parse,
+            content_hashes,
+            batch_size=batch_size,
+            persist_interval=persist_interval,
+            workers=workers,
+            max_chunks_in_memory=max_chunks_in_memory,
+            streaming_threshold_bytes=streaming_threshold_bytes,
+            progress=progress
+        )
+        if files_to_parse or removed_sources:
+            self._bump_index_generation()
+        
+        logger.info(
+            f"Total chunks added from directory {directory_path}: {total_chunks} "
+            f"({skipped_files} unchanged files skipped, {len(removed_sources)} removed files, "
+            f"{removed_chunks} chunks deleted, {collapsed_chunks} near-duplicate chunks collapsed)"
+        )
+        return total_chunks
+    
+    async def ingest_changes(
+        self,
+        directory_path: Path,
+        changed_paths: List[Path],
+        progress: Optional[IngestProgress] = None
+    ) -> int:
+        """
+        Re-index only the given paths inside a knowledge base directory
+        
+        Used by watch mode with the paths touched since the last run. Files
+        and directories that exist are ingested like in ingest_directory unless
+        their content hash is unchanged, and paths that no longer exist have the
+        chunks of every source at or below them removed. Paths outside the
+        directory and hidden files are ignored.
+        
+        Args:
+            directory_path: Path to the knowledge base directory
+            changed_paths: Files or directories that were created, modified or deleted
+            progress: Optional tracker receiving file and chunk counts as the ingest proceeds
             
-        total_chunks = 0
+        Returns:
+            Number of chunks added to the vector store
+        """
+        self.manifest = IngestManifest()
+        self._get_backend()
+        self._get_stats()
+        self._get_dedupe_index()
+        self._get_bm25_index()
+        self._get_vector_index()
         
-        # Walk through directory recursively
-        for root, _, files in os.walk(directory_path):
-            root_path = Path(root)
+        files_to_parse: List[Tuple[Path, Dict[str, Any]]] = []
+        content_hashes: Dict[str, str] = {}
+        removed_sources = set()
+        skipped_files = 0
+        resolved_directory = directory_path.resolve()
+        for path in sorted(set(changed_paths)):
+            # Sources are recorded below the directory path as given to ingest_directory
+            if not path.is_relative_to(directory_path) and path.is_relative_to(resolved_directory):
+                path = directory_path / path.relative_to(resolved_directory)
+            if not path.is_relative_to(directory_path) or path.name.startswith('.'):
+                continue
+            if not path.exists():
+                removed_sources.update(
+                    source for source in [str(path)] + self.manifest.sources_under(path)
+                    if source in self.manifest.entries
+                )
+                continue
             
-            # Process each file
-            for file in files:
-                file_path = root_path / file
-                
-                # Skip hidden files and non-document files
-                if file.startswith('.'):
+            # A directory moved into place is reported without its files
+            file_paths = [file_path for file_path, _ in self._iter_directory_files(path)] if path.is_dir() else [path]
+            for file_path in file_paths:
+                source = str(file_path)
+                if source in content_hashes:
                     continue
-                    
-                # Extract relative path for metadata
-                rel_path = file_path.relative_to(directory_path)
-                category = rel_path.parts[0] if len(rel_path.parts) > 1 else "general"
-                
-                # Create metadata
-                metadata = {
-                    "source": str(file_path),
-                    "filename": file,
-                    "category": category
-                }
-                
-                # Ingest document
-                chunks_added = await self.ingest_document(file_path, metadata)
-                total_chunks += chunks_added
+                try:
+                    content_hashes[source] = compute_file_hash(file_path)
+                except OSError as e:
+                    logger.error(f"Error reading document {file_path}: {str(e)}")
+                    continue
+                if self.manifest.is_unchanged(source, content_hashes[source]):
+                    skipped_files += 1
+                    continue
+                files_to_parse.append((file_path, self._file_metadata(directory_path, file_path)))
+        
+        if progress is not None:
+            progress.add_files(len(files_to_parse), skipped=skipped_files)
+        if not files_to_parse and not removed_sources:
+            return 0
+        
+        removed_chunks = 0
+        for source in removed_sources:
+            removed_chunks += self._delete_source_chunks(source)
+        
+        total_chunks, collapsed_chunks = self._ingest_files(
+            files_to_parse,
+            content_hashes,
+            batch_size=INGEST_BATCH_SIZE,
+            persist_interval=0,
+            workers=1,
+            max_chunks_in_memory=INGEST_MAX_CHUNKS_IN_MEMORY,
+            streaming_threshold_bytes=INGEST_STREAMING_THRESHOLD_BYTES,
+            progress=progress
+        )
+        self._bump_index_generation()
         
-        logger.info(f"Total chunks added from directory {directory_path}: {total_chunks}")
+        logger.info(
+            f"Re-indexed {len(files_to_parse)} changed files in {directory_path}: {total_chunks} chunks added "
+            f"({len(removed_sources)} removed files, {removed_chunks} chunks deleted, "
+            f"{collapsed_chunks} near-duplicate chunks collapsed)"
+        )
         return total_chunks
     
-    async def retrieve_relevant_documents(self, query: str) -> List[Document]:
+    def _vector_search(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Run a nearest-neighbour search and keep the IDs of the hits
+        
+        No chunk text is read, callers fetch it for the hits they keep. With
+        VECTOR_QUANTIZATION enabled the quantized index is searched instead
+        of the backend.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of neighbours
+            categories: Optional categories, only their partitions are scanned
+            
+        Returns:
+            List of (chunk ID, distance) ordered by distance
+        """
+        vector_index = self._get_vector_index()
+        if vector_index is not None:
+            return vector_index.search(embedding, k, QUANTIZED_RESCORE_CANDIDATES, categories)
+        
+        return self._get_backend().search_ids(embedding, k, categories)
+    
+    def _fetch_documents(self, chunk_ids: List[str], categories: Optional[List[str]] = None) -> Dict[str, Document]:
+        """
+        Load the text and metadata of chunks by ID
+        
+        Args:
+            chunk_ids: IDs of the chunks
+            categories: Optional categories, only their stores are read
+            
+        Returns:
+            Documents keyed by chunk ID
+        """
+        return self._get_backend().get_documents(chunk_ids, categories)
+    
+    def _search(
+        self,
+        query: str,
+        mode: str,
+        categories: Optional[List[str]] = None,
+        embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """
+        Embed a query and run the search (blocking, runs on the retrieval pool)
+        
+        In hybrid mode the vector and BM25 rankings are fused with reciprocal
+        rank fusion, so exact acronym matches can surface chunks that the
+        embedding ranks poorly. Both rankings work on chunk IDs, the text and
+        metadata are only read for the final results.
+        
+        Args:
+            query: User query
+            mode: "vector" or "hybrid"
+            categories: Optional categories to restrict the search to
+            embedding: Precomputed query embedding, embedded here if omitted
+            
+        Returns:
+            Relevant documents, best first
+        """
+        if embedding is None:
+            embedding = self._embed_query(query)
+        candidates = HYBRID_CANDIDATES if mode == "hybrid" else NUM_DOCS_TO_RETRIEVE
+        
+        # Filter based on similarity score threshold
+        # Every backend and the quantized index return squared L2 distances between normalized embeddings
+        vector_ids = [
+            chunk_id
+            for chunk_id, distance in self._vector_search(embedding, candidates, categories)
+            if cosine_similarity(distance) >= SIMILARITY_THRESHOLD
+        ]
+        if mode != "hybrid":
+            result_ids = vector_ids
+        else:
+            lexical_hits = self._get_bm25_index().search(query, HYBRID_CANDIDATES, categories)
+            fused = reciprocal_rank_fusion(
+                [vector_ids, [chunk_id for chunk_id, _ in lexical_hits]],
+                k=RRF_K
+            )[:NUM_DOCS_TO_RETRIEVE]
+            result_ids = [chunk_id for chunk_id, _ in fused]
+        
+        docs_by_id = self._fetch_documents(result_ids, categories)
+        return [docs_by_id[chunk_id] for chunk_id in result_ids if chunk_id in docs_by_id]
+    
+    def _search_many(self, queries: List[str], mode: str, categories: Optional[List[str]] = None) -> List[List[Document]]:
+        """
+        Embed several queries in one batch and run their searches (blocking, runs on the retrieval pool)
+        
+        Args:
+            queries: User queries
+            mode: "vector" or "hybrid"
+            categories: Optional categories to restrict the searches to
+            
+        Returns:
+            Relevant documents of each query, best first
+        """
+        embeddings = self._embed_queries(queries)
+        return [
+            self._search(query, mode, categories, embedding)
+            for query, embedding in zip(queries, embeddings)
+        ]
+    
+    async def retrieve_relevant_documents(
+        self,
+        query: str,
+        mode: Optional[str] = None,
+        categories: Optional[List[str]] = None
+    ) -> List[Document]:
         """
         Retrieve relevant documents for a given query
         
+        Cache hits are answered directly; otherwise the embedding and vector
+        search run on the retrieval thread pool so the event loop stays free.
+        
         Args:
             query: User query
+            mode: "vector" or "hybrid", defaults to RETRIEVAL_MODE
+            categories: Optional categories (e.g. "frameworks") to search in
             
         Returns:
             List of relevant documents
+            
+        Raises:
+            ThreadPoolSaturated: If the retrieval pool queue is full
         """
         try:
-            # Perform similarity search with threshold
-            docs = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=NUM_DOCS_TO_RETRIEVE
+            mode = mode or RETRIEVAL_MODE
+            categories = sorted(set(categories)) if categories else None
+            cache_key = (
+                self._get_index_generation(),
+                normalize_query(query),
+                NUM_DOCS_TO_RETRIEVE,
+                mode,
+                tuple(categories or ())
             )
+            cached_docs = self._retrieval_cache.get(cache_key)
+            if cached_docs is not None:
+                logger.info(f"Retrieved {len(cached_docs)} cached documents for query: {query}")
+                return list(cached_docs)
             
-            # Filter based on similarity score threshold
-            relevant_docs = []
-            for doc, score in docs:
-                # Note: Chroma returns cosine distance, so we need to convert to similarity
-                # Cosine similarity = 1 - cosine distance
-                similarity = 1 - score
-                if similarity >= SIMILARITY_THRESHOLD:
-                    relevant_docs.append(doc)
+            relevant_docs = await self._retrieval_pool.run(self._search, query, mode, categories)
             
+            self._retrieval_cache.put(cache_key, relevant_docs)
             logger.info(f"Retrieved {len(relevant_docs)} relevant documents for query: {query}")
             return relevant_docs
             
+        except ThreadPoolSaturated:
+            logger.warning(f"Retrieval pool saturated, rejecting query: {query}")
+            raise
         except Exception as e:
             logger.error(f"Error retrieving documents: {str(e)}")
             return []
     
+    async def retrieve_many(
+        self,
+        queries: List[str],
+        mode: Optional[str] = None,
+        categories: Optional[List[str]] = None
+    ) -> List[List[Document]]:
+        """
+        Retrieve relevant documents for several queries at once
+        
+        Cached queries are answered directly; the others are embedded in a
+        single model call and searched in one retrieval pool task.
+        
+        Args:
+            queries: User queries
+            mode: "vector" or "hybrid", defaults to RETRIEVAL_MODE
+            categories: Optional categories (e.g. "frameworks") to search in
+            
+        Returns:
+            List of relevant documents for each query, in the order of queries
+            
+        Raises:
+            ThreadPoolSaturated: If the retrieval pool queue is full
+        """
+        try:
+            mode = mode or RETRIEVAL_MODE
+            categories = sorted(set(categories)) if categories else None
+            generation = self._get_index_generation()
+            cache_keys = [
+                (generation, normalize_query(query), NUM_DOCS_TO_RETRIEVE, mode, tuple(categories or ()))
+                for query in queries
+            ]
+            results: List[Optional[List[Document]]] = [self._retrieval_cache.get(key) for key in cache_keys]
+            
+            # Search each distinct uncached query once
+            missing: Dict[Tuple, str] = {}
+            for query, key, cached_docs in zip(queries, cache_keys, results):
+                if cached_docs is None:
+                    missing.setdefault(key, query)
+            if missing:
+                found = await self._retrieval_pool.run(self._search_many, list(missing.values()), mode, categories)
+                found_by_key = dict(zip(missing, found))
+                for key, relevant_docs in found_by_key.items():
+                    self._retrieval_cache.put(key, relevant_docs)
+                results = [docs if docs is not None else found_by_key[key] for docs, key in zip(results, cache_keys)]
+            
+            logger.info(f"Retrieved documents for {len(queries)} queries ({len(missing)} searched)")
+            return [list(docs) for docs in results]
+            
+        except ThreadPoolSaturated:
+            logger.warning(f"Retrieval pool saturated, rejecting batch of {len(queries)} queries")
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            return [[] for _ in queries]
+    
     def get_document_count(self) -> int:
         """
-        Get the total number of documents in the knowledge base
+        Get the total number of chunks in the knowledge base
         
         Returns:
-            Number of documents
+            Number of chunks
         """
         try:
-            # This is an approximation as it counts chunks, not original documents
-            return len(self.vectorstore.get())
+            return self._get_stats().total_chunks
         except Exception as e:
             logger.error(f"Error getting document count: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get chunk, source document and byte totals, overall and per category
+        
+        Served from the statistics maintained at ingest time, without reading
+        the vector store.
+        
+        Returns:
+            Dictionary of knowledge base statistics
+        """
+        return self._get_stats().summary()
+    
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """
+        Get the knowledge base statistics without blocking the event loop
+        
+        They are read from disk when another process changed the index.
+        
+        Returns:
+            Dictionary of knowledge base statistics
+        """
+        return await self._retrieval_pool.run(self.get_stats)
+    
+    def get_retrieval_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and throughput counters of the retrieval thread pool
+        
+        Returns:
+            Dictionary of pool statistics
+        """
+        return self._retrieval_pool.stats()
+
+
+# Process-wide knowledge base shared by all requests
+_knowledge_base: Optional[KnowledgeBase] = None
+_knowledge_base_lock = threading.Lock()
+_knowledge_base_error: Optional[str] = None
+
+def get_shared_knowledge_base() -> KnowledgeBase:
+    """
+    Get the process-wide knowledge base, creating it on first use
+    
+    When KB_SNAPSHOT_PATH is set, the snapshot is restored before the
+    knowledge base is opened.
+    
+    Returns:
+        Shared KnowledgeBase instance
+    """
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_base_lock:
+            if _knowledge_base is None:
+                if KB_SNAPSHOT_PATH:
+                    restore_snapshot(Path(KB_SNAPSHOT_PATH))
+                _knowledge_base = KnowledgeBase()
+    return _knowledge_base
+
+async def initialize_knowledge_base() -> None:
+    """Create and warm up the shared knowledge base without blocking the event loop"""
+    global _knowledge_base_error
+    try:
+        knowledge_base = await asyncio.to_thread(get_shared_knowledge_base)
+        await asyncio.to_thread(knowledge_base.warm_up)
+    except Exception as e:
+        _knowledge_base_error = str(e)
+        logger.error(f"Knowledge base warm-up failed: {str(e)}")
+
+def shutdown_knowledge_base() -> None:
+    """Release the worker threads of the shared knowledge base"""
+    if _knowledge_base is not None:
+        _knowledge_base._retrieval_pool.shutdown()
+
+def get_knowledge_base_status() -> str:
+    """
+    Get the readiness of the shared knowledge base
+    
+    Returns:
+        One of "ready", "warming_up" or "failed"
+    """
+    if _knowledge_base_error:
+        return "failed"
+    if _knowledge_base is not None and _knowledge_base.ready:
+        return "ready"
+    return "warming_up"
@@ -1,12 +1,69 @@
+import math
 import logging
 from typing import List, Dict, Any, Optional
 import google.generativeai as genai
 
-from app.config import GEMINI_API_KEY, GEMINI_MODEL, MOCK_LLM, MOCK_RESPONSES, SYSTEM_TEMPLATE
+from app.config import (
+    GEMINI_API_KEY, GEMINI_MODEL, MOCK_LLM, MOCK_RESPONSES, SYSTEM_TEMPLATE,
+    PROMPT_TOKEN_BUDGET, CHARS_PER_TOKEN, CONTEXT_MIN_PARTIAL_TOKENS
+)
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Shortest shared text treated as chunk overlap rather than a coincidence
+MIN_OVERLAP_CHARS = 32
+
+# Context used when no retrieved document fits in the prompt
+NO_CONTEXT_MESSAGE = "No relevant information found in the knowledge base."
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens of a text from its length
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def strip_overlap(text: str, kept_texts: List[str]) -> str:
+    """
+    Remove the parts of a chunk that are already in other chunks of the same source
+    
+    Neighbouring chunks share DOCUMENT_CHUNK_OVERLAP characters, so a chunk
+    may start with the end of a kept chunk or end with its beginning.
+    
+    Args:
+        text: Chunk text
+        kept_texts: Texts of chunks of the same source already in the context
+        
+    Returns:
+        Remaining text, empty if the chunk is contained in a kept chunk
+    """
+    for kept in kept_texts:
+        if text in kept:
+            return ""
+        
+        # A kept chunk ends with the start of this one
+        position = kept.find(text[:MIN_OVERLAP_CHARS])
+        while position != -1:
+            if text.startswith(kept[position:]):
+                text = text[len(kept) - position:]
+                break
+            position = kept.find(text[:MIN_OVERLAP_CHARS], position + 1)
+        
+        # A kept chunk starts with the end of this one
+        position = text.find(kept[:MIN_OVERLAP_CHARS])
+        while position != -1:
+            if kept.startswith(text[position:]):
+                text = text[:position]
+                break
+            position = text.find(kept[:MIN_OVERLAP_CHARS], position + 1)
+    return text.strip()
+
 class LLMService:
     """Service for handling LLM operations using Google's Gemini API"""
     
@@ -29,27 +86,81 @@ class LLMService:
         if self.mock_mode:
             logger.warning("LLM service running in mock mode. Responses will be simulated.")
     
-    def _prepare_context(self, retrieved_docs: List[Any]) -> str:
+    def _prepare_context(self, retrieved_docs: List[Any], token_budget: Optional[int] = None) -> str:
         """
-        Prepare context from retrieved documents
+        Prepare context from retrieved documents within a token budget
+        
+        Documents are added best first. Text a document shares with an
+        already added chunk of the same source is left out, and once the
+        budget runs out the next document is cut to the remaining tokens
+        and the rest are dropped.
         
         Args:
-            retrieved_docs: List of retrieved documents
+            retrieved_docs: List of retrieved documents, best first
+            token_budget: Maximum estimated tokens of the context, None for no limit
             
         Returns:
             Formatted context string
         """
         if not retrieved_docs:
-            return "No relevant information found in the knowledge base."
+            return NO_CONTEXT_MESSAGE
         
         context_parts = []
-        for i, doc in enumerate(retrieved_docs):
+        kept_by_source: Dict[str, List[str]] = {}
+        remaining = token_budget if token_budget is not None else math.inf
+        for doc in retrieved_docs:
             source = doc.metadata.get("source", "Unknown source")
-            content = doc.page_content
-            context_parts.append(f"[Document {i+1}] From {source}:\n{content}\n")
+            content = strip_overlap(doc.page_content, kept_by_source.get(source, []))
+            if not content:
+                continue
+            
+            header = f"[Document {len(context_parts) + 1}] From {source}:\n"
+            tokens = estimate_tokens(header) + estimate_tokens(content) + 1
+            if tokens > remaining:
+                # Cut the chunk at a word boundary if enough budget is left to be useful
+                available = remaining - estimate_tokens(header) - 1
+                if available >= CONTEXT_MIN_PARTIAL_TOKENS:
+                    content = content[:int(available * CHARS_PER_TOKEN)].rsplit(" ", 1)[0]
+                    context_parts.append(f"{header}{content} ...\n")
+                break
+            
+            context_parts.append(f"{header}{content}\n")
+            kept_by_source.setdefault(source, []).append(doc.page_content)
+            remaining -= tokens
         
+        if len(context_parts) < len(retrieved_docs):
+            logger.info(f"Context holds {len(context_parts)} of {len(retrieved_docs)} retrieved documents")
+        if not context_parts:
+            return NO_CONTEXT_MESSAGE
         return "\n".join(context_parts)
     
+    def _fit_chat_history(self, chat_history: List[Dict[str, str]], token_budget: int) -> List[Dict[str, str]]:
+        """
+        Keep the most recent chat messages that fit in a token budget
+        
+        Messages are dropped oldest first, so the turns a follow-up question
+        refers to are the last ones to go.
+        
+        Args:
+            chat_history: Chat messages, oldest first
+            token_budget: Maximum estimated tokens of the kept messages
+            
+        Returns:
+            Kept messages, oldest first
+        """
+        kept: List[Dict[str, str]] = []
+        remaining = token_budget
+        for message in reversed(chat_history):
+            tokens = estimate_tokens(message["content"]) + 1
+            if tokens > remaining:
+                break
+            kept.append(message)
+            remaining -= tokens
+        
+        if len(kept) < len(chat_history):
+            logger.info(f"Prompt holds {len(kept)} of {len(chat_history)} chat history messages")
+        return kept[::-1]
+    
     def _get_mock_response(self, query: str) -> str:
         """
         Generate a mock response for testing without API calls
@@ -92,12 +203,17 @@ class LLMService:
             return self._get_mock_response(query)
         
         try:
-            # Create context from retrieved documents
-            context = self._prepare_context(retrieved_docs)
+            # Create context from retrieved documents, leaving room for the template and query
+            context_budget = PROMPT_TOKEN_BUDGET - estimate_tokens(SYSTEM_TEMPLATE.format(context="")) - estimate_tokens(query)
+            context = self._prepare_context(retrieved_docs, max(0, context_budget))
             
             # Prepare system prompt with context
             system_prompt = SYSTEM_TEMPLATE.format(context=context)
             
+            # Chat history gets the budget the context left, dropping the oldest messages first
+            history_budget = PROMPT_TOKEN_BUDGET - estimate_tokens(system_prompt) - estimate_tokens(query)
+            chat_history = self._fit_chat_history(chat_history or [], history_budget)
+            
             # Convert chat history to Google Generative AI format
             chat = []
             if chat_history:
@@ -0,0 +1,171 @@
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings computed with ONNX Runtime instead of PyTorch
+
+    Runs an exported sentence-transformers model (mean pooling followed by L2
+    normalization, as in all-MiniLM-L6-v2) using the Rust tokenizers library.
+    Texts are sorted by token length and batched so each batch is only padded
+    to its own longest text and holds at most max_batch_tokens tokens.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model_dir: Path,
+        max_length: int = 256,
+        batch_size: int = 64,
+        max_batch_tokens: int = 8192,
+        threads: int = 0
+    ):
+        """
+        Load the tokenizer and the ONNX model, downloading them if needed
+
+        Args:
+            model_name: Model name, e.g. "all-MiniLM-L6-v2" or "sentence-transformers/all-MiniLM-L6-v2"
+            model_dir: Directory holding model.onnx and tokenizer.json
+            max_length: Maximum number of tokens per text
+            batch_size: Maximum number of texts per inference call
+            max_batch_tokens: Maximum number of padded tokens per inference call
+            threads: Intra-op threads used by ONNX Runtime, 0 lets it decide
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = model_dir / "model.onnx"
+        tokenizer_path = model_dir / "tokenizer.json"
+        if not model_path.exists() or not tokenizer_path.exists():
+            self._download(model_name, model_dir)
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        # Tokenizer objects are not safe to share between threads
+        self._tokenizer_lock = threading.Lock()
+        logger.info(f"Loaded ONNX embedding model from {model_path}")
+
+    @staticmethod
+    def _download(model_name: str, model_dir: Path) -> None:
+        """
+        Fetch the ONNX export and tokenizer of a sentence-transformers model
+
+        Args:
+            model_name: Model name or Hugging Face repository ID
+            model_dir: Directory to store the files in
+        """
+        import shutil
+        from huggingface_hub import hf_hub_download
+
+        repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        model_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Downloading ONNX export of {repo_id} to {model_dir}")
+        for remote_name, local_name in (("onnx/model.onnx", "model.onnx"), ("tokenizer.json", "tokenizer.json")):
+            shutil.copyfile(hf_hub_download(repo_id, remote_name), model_dir / local_name)
+
+    def _tokenize(self, texts: List[str]) -> List[List[int]]:
+        """Tokenize texts without padding"""
+        with self._tokenizer_lock:
+            return [encoding.ids for encoding in self.tokenizer.encode_batch(texts)]
+
+    def _run(self, token_ids: List[List[int]]) -> np.ndarray:
+        """
+        Embed one batch of tokenized texts
+
+        Args:
+            token_ids: Token IDs of each text
+
+        Returns:
+            Matrix of normalized float32 embeddings
+        """
+        length = max(len(ids) for ids in token_ids)
+        input_ids = np.full((len(token_ids), length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), length), dtype=np.int64)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in length-sorted batches bounded by count and padded tokens
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Matrix of embeddings in the order of texts
+        """
+        token_ids = self._tokenize(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(token_ids[i]))
+        embeddings: Optional[np.ndarray] = None
+
+        start = 0
+        while start < len(order):
+            # Grow the batch while its padded size stays within the token budget
+            end = start + 1
+            while (
+                end < len(order)
+                and end - start < self.batch_size
+                and len(token_ids[order[end]]) * (end - start + 1) <= self.max_batch_tokens
+            ):
+                end += 1
+            batch = order[start:end]
+            vectors = self._run([token_ids[i] for i in batch])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[batch] = vectors
+            start = end
+        return embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed chunks of text
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embeddings
+        """
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query
+
+        Args:
+            text: Query text
+
+        Returns:
+            Embedding vector
+        """
+        return self._embed([text])[0].tolist()
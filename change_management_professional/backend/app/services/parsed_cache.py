@@ -0,0 +1,78 @@
+import io
+import json
+import uuid
+import logging
+from pathlib import Path
+from typing import Any, Iterator
+
+import zstandard
+from langchain.schema import Document
+
+from app.config import PARSED_TEXT_CACHE_DIR
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# zstd level of cache entries, extracted text compresses well even at low levels
+CACHE_COMPRESSION_LEVEL = 3
+
+def _entry_path(content_hash: str, loader: Any, cache_dir: Path) -> Path:
+    """Get the cache entry of a file content parsed by a loader class"""
+    return cache_dir / type(loader).__name__ / content_hash[:2] / f"{content_hash}.jsonl.zst"
+
+def _read_entry(path: Path) -> Iterator[Document]:
+    """Yield the pages stored in a cache entry"""
+    with open(path, 'rb') as f:
+        with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                page = json.loads(line)
+                yield Document(page_content=page["page_content"], metadata=page["metadata"])
+
+def _write_through(loader: Any, path: Path) -> Iterator[Document]:
+    """Yield the pages of a loader while appending them to a new cache entry"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per writer, parser processes may parse identical files at the same time
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            with zstandard.ZstdCompressor(level=CACHE_COMPRESSION_LEVEL).stream_writer(f) as writer:
+                for page in loader.lazy_load():
+                    # The source is set per ingest, the same content may live at several paths
+                    metadata = {key: value for key, value in page.metadata.items() if key != "source"}
+                    record = {"page_content": page.page_content, "metadata": metadata}
+                    writer.write((json.dumps(record, default=str) + "\n").encode("utf-8"))
+                    yield page
+        tmp_path.replace(path)
+    finally:
+        # Entries of files that failed or were not read to the end are not kept
+        tmp_path.unlink(missing_ok=True)
+
+def iter_cached_pages(loader: Any, content_hash: str, cache_dir: Path = PARSED_TEXT_CACHE_DIR) -> Iterator[Document]:
+    """
+    Load the pages of a document, reusing the text extracted from identical content before
+
+    Entries are zstd-compressed JSON lines, one page per line, keyed by the
+    loader class and the file content hash. Pages are streamed in both
+    directions, so large documents keep their bounded memory use. The cache
+    directory can be deleted at any time.
+
+    Args:
+        loader: Document loader of the file
+        content_hash: Content hash of the file
+        cache_dir: Directory holding the cache entries
+
+    Yields:
+        Pages of the document
+    """
+    path = _entry_path(content_hash, loader, cache_dir)
+    if not path.exists():
+        yield from _write_through(loader, path)
+        return
+
+    try:
+        yield from _read_entry(path)
+    except (OSError, ValueError, KeyError, zstandard.ZstdError) as e:
+        # Pages may already have been used, so the file fails and is parsed again next time
+        logger.error(f"Dropping unreadable parsed text cache entry {path}: {str(e)}")
+        path.unlink(missing_ok=True)
+        raise
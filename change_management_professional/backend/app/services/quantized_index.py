@@ -0,0 +1,377 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Iterable, Optional
+
+import numpy as np
+
+from app.config import KB_INDEX_DIR
+from app.utils.mmap_matrix import MmapMatrix
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Quantized vector index storage directory
+QUANTIZED_INDEX_DIR = KB_INDEX_DIR / "vectors"
+
+# Supported storage types of the in-memory vector codes
+QUANTIZATION_TYPES = ("float16", "int8")
+
+# Rows scored per block, bounds the float32 temporaries created while searching
+SEARCH_BLOCK_ROWS = 16384
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Compress float32 vectors
+
+    int8 uses symmetric per-vector scaling, float16 a plain cast.
+
+    Args:
+        vectors: Matrix of float32 vectors, one per row
+        dtype: "float16" or "int8"
+
+    Returns:
+        Tuple of (codes, per-row scales or None)
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unsupported quantization type: {dtype}")
+
+class QuantizedVectorIndex:
+    """
+    Exact-rescored vector index keeping only quantized vectors in memory
+
+    Searches score every vector from its float16/int8 code, then re-score the
+    best candidates with the full float32 vectors, which stay on disk and are
+    memory-mapped so only the candidate rows are read. Distances are squared
+    L2, the same metric as the default Chroma collections.
+
+    Checkpoints append new vectors to the files; they are only rewritten once
+    vectors were removed. The ID sidecar is a JSON lines file written last, so
+    rows the array files hold beyond its records are ignored.
+    """
+
+    def __init__(self, dtype: str, path: Path = QUANTIZED_INDEX_DIR):
+        """
+        Initialize the index, loading it from disk if present
+
+        Args:
+            dtype: "float16" or "int8"
+            path: Directory holding the index files
+        """
+        if dtype not in QUANTIZATION_TYPES:
+            raise ValueError(f"Unsupported quantization type: {dtype}")
+        self.dtype = dtype
+        self.path = path
+        self._lock = threading.RLock()
+        self._clear()
+
+        if (self.path / "ids.jsonl").exists() or (self.path / "ids.json").exists():
+            try:
+                self._load()
+                logger.info(f"Loaded {self.dtype} vector index with {len(self)} vectors")
+            except Exception as e:
+                logger.error(f"Error loading vector index: {str(e)}")
+                self._clear()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _clear(self) -> None:
+        """Reset the index to an empty state"""
+        self.ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self.category_names: List[str] = []
+        self._category_code: Dict[str, int] = {}
+        self.categories = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.norms = np.zeros(0, dtype=np.float32)
+        # float32 vectors, only read to re-score candidates
+        self.full = MmapMatrix(self.path / "full.npy", load=False)
+        # Rows and sidecar bytes already on disk, a torn last sidecar line is overwritten
+        self._disk_rows = 0
+        self._sidecar_bytes = 0
+        # Rewrite every file on the next save
+        self._compact = False
+
+    def _load(self) -> None:
+        """Read the index files, re-quantizing if they were written with another type"""
+        if (self.path / "ids.jsonl").exists():
+            dtype, self.ids, categories, self._sidecar_bytes = self._read_sidecar(self.path / "ids.jsonl")
+        else:
+            # Indexes written before the JSON lines sidecar are converted on the next save
+            with open(self.path / "ids.json", 'r') as f:
+                data = json.load(f)
+            dtype, self.ids = data.get("dtype"), data["ids"]
+            categories = [data["category_names"][code] for code in data["categories"]]
+            self._compact = True
+        if not self.ids:
+            self._compact = True
+            return
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        for category in categories:
+            if category not in self._category_code:
+                self._category_code[category] = len(self.category_names)
+                self.category_names.append(category)
+        self.categories = np.asarray([self._category_code[category] for category in categories], dtype=np.int32)
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        # Rows appended by an interrupted save are not listed in the sidecar
+        self.full = MmapMatrix(self.path / "full.npy", rows=len(self.ids))
+        self.norms = self._read_array("norms", np.float32, (len(self.ids),))
+
+        if dtype == self.dtype:
+            self.codes = self._read_array("codes", np.dtype(self.dtype), (len(self.ids), self.full.dim))
+            self.scales = self._read_array("scales", np.float32, (len(self.ids),)) if self.dtype == "int8" else None
+        else:
+            logger.info(f"Re-quantizing vector index from {dtype} to {self.dtype}")
+            parts = [
+                quantize(np.asarray(self.full.block(start, min(start + SEARCH_BLOCK_ROWS, len(self.full)))), self.dtype)
+                for start in range(0, len(self.full), SEARCH_BLOCK_ROWS)
+            ]
+            self.codes = np.concatenate([codes for codes, _ in parts])
+            self.scales = np.concatenate([scales for _, scales in parts]) if self.dtype == "int8" else None
+            self._compact = True
+        if len(self.full) != len(self.ids):
+            raise ValueError(f"full.npy holds {len(self.full)} rows for {len(self.ids)} vectors")
+        self._disk_rows = len(self.ids)
+
+    @staticmethod
+    def _read_sidecar(path: Path) -> Tuple[Optional[str], List[str], List[str], int]:
+        """Read the sidecar, returning the code type, the chunk IDs, their categories and the bytes read"""
+        dtype = None
+        ids: List[str] = []
+        categories: List[str] = []
+        size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                # A save interrupted while appending leaves an incomplete last line
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if "dtype" in record:
+                    dtype = record["dtype"]
+                else:
+                    ids.append(record["id"])
+                    categories.append(record["category"])
+                size += len(line)
+        return dtype, ids, categories, size
+
+    def _read_array(self, name: str, dtype: np.dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        """Read the rows of an array file listed in the sidecar, or a legacy .npy file"""
+        if not (self.path / f"{name}.bin").exists():
+            return np.load(self.path / f"{name}.npy")
+        array = np.fromfile(self.path / f"{name}.bin", dtype=dtype, count=int(np.prod(shape)))
+        if array.size != np.prod(shape):
+            raise ValueError(f"{name}.bin holds {array.size} values for shape {shape}")
+        return array.reshape(shape)
+
+    def add(self, chunk_ids: List[str], embeddings: List[List[float]], categories: List[Optional[str]]) -> None:
+        """
+        Add vectors, replacing any previous vector with the same chunk ID
+
+        Args:
+            chunk_ids: IDs of the chunks in the vector store
+            embeddings: Embedding of each chunk
+            categories: Category of each chunk
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(vectors):
+            return
+        codes, scales = quantize(vectors, self.dtype)
+        with self._lock:
+            self.remove(chunk_ids)
+            start = len(self.ids)
+            category_codes = []
+            for offset, (chunk_id, category) in enumerate(zip(chunk_ids, categories)):
+                self.ids.append(chunk_id)
+                self._row_of[chunk_id] = start + offset
+                category = category or "general"
+                if category not in self._category_code:
+                    self._category_code[category] = len(self.category_names)
+                    self.category_names.append(category)
+                category_codes.append(self._category_code[category])
+
+            self.codes = codes if self.codes is None else np.concatenate([self.codes, codes])
+            if scales is not None:
+                self.scales = scales if self.scales is None else np.concatenate([self.scales, scales])
+            self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", vectors, vectors)])
+            self.categories = np.concatenate([self.categories, np.asarray(category_codes, dtype=np.int32)])
+            self.alive = np.concatenate([self.alive, np.ones(len(vectors), dtype=bool)])
+            self.full.append(vectors)
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Remove vectors from the index
+
+        Args:
+            chunk_ids: IDs of the chunks to remove
+        """
+        with self._lock:
+            for chunk_id in chunk_ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self.alive[row] = False
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        candidates: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the nearest vectors to a query
+
+        Args:
+            embedding: Query embedding
+            k: Number of results
+            candidates: Number of approximate hits re-scored with float32 vectors
+            categories: Optional categories the results must belong to
+
+        Returns:
+            List of (chunk ID, squared L2 distance) sorted by distance
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        candidates = max(k, candidates)
+        # Snapshot the rows under the lock and score without it, so searches do not block writers.
+        # Adds and saves replace these arrays, removals flag rows in place so the mask is copied.
+        with self._lock:
+            if not len(self._row_of):
+                return []
+            count = len(self.ids)
+            ids = self.ids
+            mask = self.alive[:count].copy()
+            if categories:
+                codes = [self._category_code[name] for name in categories if name in self._category_code]
+                mask &= np.isin(self.categories[:count], codes)
+            all_codes, scales, norms = self.codes, self.scales, self.norms
+            full = self.full.snapshot()
+
+        # Approximate distances from the quantized codes, scored block by block
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_distances = np.zeros(0, dtype=np.float32)
+        for start in range(0, count, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, count)
+            block_mask = mask[start:end]
+            if block_mask.all():
+                # Slicing avoids copying the codes of fully live blocks
+                rows = np.arange(start, end)
+                codes = all_codes[start:end]
+            else:
+                rows = start + np.flatnonzero(block_mask)
+                if not len(rows):
+                    continue
+                codes = all_codes[rows]
+            dots = codes.astype(np.float32) @ query
+            if scales is not None:
+                dots *= scales[rows]
+            distances = norms[rows] - 2 * dots
+            rows = np.concatenate([best_rows, rows])
+            distances = np.concatenate([best_distances, distances])
+            if len(rows) > candidates:
+                keep = np.argpartition(distances, candidates - 1)[:candidates]
+                rows, distances = rows[keep], distances[keep]
+            best_rows, best_distances = rows, distances
+
+        if not len(best_rows):
+            return []
+
+        # Re-score the candidates exactly
+        best_rows = np.sort(best_rows)
+        vectors = full.take(best_rows)
+        diffs = vectors - query
+        exact = np.einsum("ij,ij->i", diffs, diffs)
+        order = np.argsort(exact)[:k]
+        return [(ids[best_rows[i]], float(exact[i])) for i in order]
+
+    def memory_stats(self) -> Dict[str, int]:
+        """
+        Get the memory held by the in-memory vectors
+
+        Returns:
+            Dictionary with the quantized size and the equivalent float32 size in bytes
+        """
+        with self._lock:
+            if self.codes is None:
+                return {"vectors": 0, "quantized_bytes": 0, "float32_bytes": 0}
+            quantized_bytes = self.codes.nbytes + self.norms.nbytes
+            if self.scales is not None:
+                quantized_bytes += self.scales.nbytes
+            return {
+                "vectors": len(self),
+                "quantized_bytes": int(quantized_bytes),
+                "float32_bytes": int(self.codes.size * 4)
+            }
+
+    def save(self) -> None:
+        """Append the new vectors to the index files, rewriting them without the removed vectors if there are any"""
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            compact = self._compact or not self._sidecar_bytes or not self.alive.all()
+            rows = np.flatnonzero(self.alive)
+            self.full.save(rows)
+
+            if compact:
+                self.ids = [self.ids[row] for row in rows]
+                self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+                self.categories = self.categories[rows]
+                self.norms = self.norms[rows]
+                self.alive = np.ones(len(rows), dtype=bool)
+                if self.codes is not None:
+                    self.codes = self.codes[rows]
+                if self.scales is not None:
+                    self.scales = self.scales[rows]
+                start = 0
+            else:
+                start = self._disk_rows
+
+            arrays = {"norms": self.norms}
+            if self.codes is not None:
+                arrays["codes"] = self.codes
+            if self.scales is not None:
+                arrays["scales"] = self.scales
+            for name, array in arrays.items():
+                data = np.ascontiguousarray(array[start:]).tobytes()
+                if compact:
+                    tmp_path = self.path / f"{name}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, self.path / f"{name}.bin")
+                else:
+                    with open(self.path / f"{name}.bin", 'ab') as f:
+                        f.truncate(start * array[:1].nbytes)
+                        f.write(data)
+
+            # The sidecar is written last, it decides which rows of the other files exist
+            records = [{"dtype": self.dtype}] if compact else []
+            records += [
+                {"id": self.ids[row], "category": self.category_names[self.categories[row]]}
+                for row in range(start, len(self.ids))
+            ]
+            lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+            sidecar = self.path / "ids.jsonl"
+            if compact:
+                tmp_path = self.path / "ids.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(lines)
+                os.replace(tmp_path, sidecar)
+                for name in ("ids.json", "norms.npy", "codes.npy", "scales.npy"):
+                    (self.path / name).unlink(missing_ok=True)
+                self._sidecar_bytes = len(lines)
+            else:
+                with open(sidecar, 'ab') as f:
+                    f.truncate(self._sidecar_bytes)
+                    f.write(lines)
+                self._sidecar_bytes += len(lines)
+
+            self._disk_rows = len(self.ids)
+            self._compact = False
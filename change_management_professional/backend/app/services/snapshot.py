@@ -0,0 +1,205 @@
+import io
+import json
+import fcntl
+import shutil
+import logging
+import tarfile
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import zstandard
+
+from app.config import (
+    PROCESSED_DIR,
+    VECTOR_DB_PATH,
+    KB_INDEX_DIR,
+    KB_GENERATION_FILE,
+    VECTOR_SHARDS,
+    VECTOR_SHARDS_DIR,
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    VECTOR_BACKEND,
+    PARTITION_BY_CATEGORY,
+    DOCUMENT_CHUNK_SIZE,
+    DOCUMENT_CHUNK_OVERLAP,
+)
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Bumped when the artifact layout changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+# First member of every snapshot, describing how the indexes were built
+SNAPSHOT_HEADER_NAME = "snapshot.json"
+
+# Records which snapshot the processed directory was last restored from
+SNAPSHOT_MARKER_FILE = PROCESSED_DIR / "snapshot_restored.json"
+
+# Held while a snapshot is restored, API workers starting together restore one after another
+SNAPSHOT_LOCK_FILE = PROCESSED_DIR / "snapshot_restore.lock"
+
+# Settings that must match for a snapshot to be usable by this service
+COMPATIBILITY_KEYS = ("embedding_model", "vector_backend", "vector_shards", "partition_by_category")
+
+def _snapshot_settings() -> Dict[str, Any]:
+    """Get the settings the indexes depend on"""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "vector_backend": VECTOR_BACKEND,
+        "vector_shards": VECTOR_SHARDS,
+        "partition_by_category": PARTITION_BY_CATEGORY,
+        "chunk_size": DOCUMENT_CHUNK_SIZE,
+        "chunk_overlap": DOCUMENT_CHUNK_OVERLAP,
+    }
+
+def _snapshot_directories() -> Dict[str, Path]:
+    """Get the directories a snapshot can hold, keyed by their name inside the artifact"""
+    return {
+        "vectordb": Path(VECTOR_DB_PATH),
+        "vector_shards": VECTOR_SHARDS_DIR,
+        "kb_index": KB_INDEX_DIR,
+        "onnx_model": ONNX_MODEL_DIR,
+    }
+
+def export_snapshot(path: Path, level: int = 10) -> Dict[str, Any]:
+    """
+    Write the vector store and all index sidecars into one zstd-compressed tar file
+
+    No ingest may run while the snapshot is taken.
+
+    Args:
+        path: Location of the snapshot file
+        level: zstd compression level
+
+    Returns:
+        Snapshot header
+    """
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "settings": _snapshot_settings(),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    with open(tmp_path, 'wb') as f:
+        with zstandard.ZstdCompressor(level=level, threads=-1).stream_writer(f) as writer:
+            with tarfile.open(fileobj=writer, mode="w|") as tar:
+                header_bytes = json.dumps(header, indent=2).encode("utf-8")
+                info = tarfile.TarInfo(SNAPSHOT_HEADER_NAME)
+                info.size = len(header_bytes)
+                info.mtime = int(datetime.now().timestamp())
+                tar.addfile(info, io.BytesIO(header_bytes))
+
+                for name, directory in _snapshot_directories().items():
+                    # The ONNX model is shipped too so new pods skip the download
+                    if not directory.exists() or (name == "onnx_model" and EMBEDDING_BACKEND != "onnx"):
+                        continue
+                    # Leftovers of interrupted atomic writes are not part of the index
+                    tar.add(directory, arcname=name, filter=lambda member: None if ".tmp" in member.name else member)
+
+    tmp_path.replace(path)
+    logger.info(f"Exported knowledge base snapshot to {path} ({path.stat().st_size / (1024 * 1024):.1f} MiB)")
+    return header
+
+def _read_generation() -> int:
+    """Get the current index generation, 0 if the indexes were never changed"""
+    try:
+        return int(KB_GENERATION_FILE.read_text().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def _read_marker() -> Optional[Dict[str, Any]]:
+    """Get the header of the snapshot the processed directory was restored from"""
+    try:
+        with open(SNAPSHOT_MARKER_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def restore_snapshot(path: Path, force: bool = False) -> bool:
+    """
+    Restore the vector store and index sidecars from a snapshot
+
+    The artifact is decompressed and unpacked in a single sequential pass
+    into a staging directory, which then replaces the current directories.
+    Nothing is re-embedded or rebuilt. A snapshot that was already restored
+    is skipped unless force is set.
+
+    Processes restoring at the same time take turns on a lock file, so only
+    the first one unpacks the snapshot and the others find its marker.
+
+    Args:
+        path: Location of the snapshot file
+        force: Restore even if this snapshot was restored before
+
+    Returns:
+        True if the snapshot was restored, False if it was already in place
+    """
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SNAPSHOT_LOCK_FILE, 'w') as lock_file:
+        # Released when the file is closed, also if the process dies
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return _restore_snapshot_locked(path, force)
+
+def _restore_snapshot_locked(path: Path, force: bool) -> bool:
+    """Restore a snapshot while holding the restore lock, the marker is only read after taking it"""
+    # Per process, so a restore never unpacks into the staging directory of another one
+    staging_dir = Path(tempfile.mkdtemp(prefix=".snapshot_restore_", dir=PROCESSED_DIR))
+
+    try:
+        header: Optional[Dict[str, Any]] = None
+        with open(path, 'rb') as f:
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                with tarfile.open(fileobj=reader, mode="r|") as tar:
+                    for member in tar:
+                        if header is None:
+                            if member.name != SNAPSHOT_HEADER_NAME:
+                                raise ValueError(f"{path} is not a knowledge base snapshot")
+                            header = json.load(tar.extractfile(member))
+                            if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                                raise ValueError(f"Unsupported snapshot format version {header.get('format_version')}")
+                            settings = _snapshot_settings()
+                            # Snapshots taken before sharding existed hold a single store
+                            header["settings"].setdefault("vector_shards", 1)
+                            mismatched = [key for key in COMPATIBILITY_KEYS if header["settings"].get(key) != settings[key]]
+                            if mismatched:
+                                raise ValueError(f"Snapshot was built with different settings: {', '.join(mismatched)}")
+                            if not force and _read_marker() == header:
+                                logger.info(f"Snapshot {path} from {header['created_at']} is already restored")
+                                return False
+                            continue
+                        tar.extract(member, staging_dir, filter="data")
+        if header is None:
+            raise ValueError(f"{path} is an empty snapshot")
+
+        # Swap the restored directories in
+        previous_generation = _read_generation()
+        for name, directory in _snapshot_directories().items():
+            restored = staging_dir / name
+            if not restored.exists():
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            directory.parent.mkdir(parents=True, exist_ok=True)
+            restored.replace(directory)
+
+        # The snapshot brings its own generation, which may not exceed the replaced one. Running
+        # processes only reload their indexes and drop cached results when it moves to a new value.
+        KB_GENERATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_generation = KB_GENERATION_FILE.with_suffix(".tmp")
+        tmp_generation.write_text(str(max(previous_generation, _read_generation()) + 1))
+        tmp_generation.replace(KB_GENERATION_FILE)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    tmp_marker = SNAPSHOT_MARKER_FILE.with_suffix(".tmp")
+    with open(tmp_marker, 'w') as f:
+        json.dump(header, f, indent=2)
+    tmp_marker.replace(SNAPSHOT_MARKER_FILE)
+    logger.info(f"Restored knowledge base snapshot {path} from {header['created_at']}")
+    return True
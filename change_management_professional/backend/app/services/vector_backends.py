@@ -0,0 +1,930 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Set
+
+import numpy as np
+from chromadb.api.shared_system_client import SharedSystemClient
+from langchain.vectorstores import Chroma
+from langchain.schema import Document
+
+from app.config import (
+    VECTOR_DB_PATH,
+    KB_INDEX_DIR,
+    PARTITION_BY_CATEGORY,
+    PARTITION_COLLECTION_PREFIX,
+    VECTOR_SHARDS,
+    VECTOR_SHARDS_DIR
+)
+from app.utils.mmap_matrix import MmapMatrix
+from app.utils.text_blob import TextBlob
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# NumPy backend storage directory
+NUMPY_STORE_DIR = KB_INDEX_DIR / "numpy_store"
+
+# Rows scored per matrix multiply by the NumPy backend
+SEARCH_BLOCK_ROWS = 65536
+
+def partition_collection_name(category: str) -> str:
+    """
+    Build the Chroma collection name holding the chunks of one category
+
+    Args:
+        category: Chunk category, e.g. "frameworks"
+
+    Returns:
+        Valid Chroma collection name
+    """
+    slug = re.sub(r"[^a-zA-Z0-9_-]+", "_", category).strip("_-") or "general"
+    return f"{PARTITION_COLLECTION_PREFIX}{slug}"[:63]
+
+def cosine_similarity(distance: float) -> float:
+    """
+    Convert the squared L2 distance of two normalized embeddings to their cosine similarity
+
+    For unit vectors |a - b|^2 = 2 - 2 cos(a, b).
+
+    Args:
+        distance: Squared L2 distance returned by a backend search
+
+    Returns:
+        Cosine similarity between -1 and 1
+    """
+    return 1 - distance / 2
+
+class VectorBackend(ABC):
+    """
+    Storage of chunk vectors, text and metadata used by KnowledgeBase
+
+    Distances are squared L2 whatever the backend, as in Chroma's default
+    "l2" space, so cosine_similarity() converts them for normalized embeddings.
+    """
+
+    @abstractmethod
+    def add(self, chunk_ids: List[str], embeddings: List[List[float]], chunks: List[Document]) -> None:
+        """
+        Store chunks with their embeddings, replacing chunks with the same IDs
+
+        Args:
+            chunk_ids: IDs of the chunks
+            embeddings: Embedding of each chunk
+            chunks: Chunk text and metadata
+        """
+
+    @abstractmethod
+    def delete(self, chunk_ids: List[str]) -> None:
+        """
+        Remove chunks, ignoring unknown IDs
+
+        Args:
+            chunk_ids: IDs of the chunks to remove
+        """
+
+    @abstractmethod
+    def update_metadata(self, chunk_ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Replace the metadata of stored chunks, keeping their text and embedding
+
+        Args:
+            chunk_ids: IDs of the chunks
+            metadatas: New metadata of each chunk
+        """
+
+    @abstractmethod
+    def ids_for_source(self, source: str) -> List[str]:
+        """
+        Find the chunks of a source file without the ingest manifest
+
+        Args:
+            source: Source path of the file
+
+        Returns:
+            IDs of the chunks
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, Document, float]]:
+        """
+        Find the nearest chunks to a query embedding
+
+        Args:
+            embedding: Query embedding
+            k: Number of neighbours
+            categories: Optional categories the chunks must belong to
+
+        Returns:
+            List of (chunk ID, document, distance) ordered by distance
+        """
+
+    def search_ids(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the nearest chunks to a query embedding without reading their text
+
+        Args:
+            embedding: Query embedding
+            k: Number of neighbours
+            categories: Optional categories the chunks must belong to
+
+        Returns:
+            List of (chunk ID, distance) ordered by distance
+        """
+        return [(chunk_id, distance) for chunk_id, _, distance in self.search(embedding, k, categories)]
+
+    @abstractmethod
+    def get_documents(self, chunk_ids: List[str], categories: Optional[List[str]] = None) -> Dict[str, Document]:
+        """
+        Load the text and metadata of chunks by ID
+
+        Args:
+            chunk_ids: IDs of the chunks
+            categories: Optional categories of the chunks, lets partitioned backends read less
+
+        Returns:
+            Documents keyed by chunk ID
+        """
+
+    @abstractmethod
+    def iter_chunks(
+        self,
+        batch_size: int,
+        include_embeddings: bool = False
+    ) -> Iterator[Tuple[List[str], List[Document], Optional[List[List[float]]]]]:
+        """
+        Read every stored chunk in batches
+
+        Args:
+            batch_size: Number of chunks per batch
+            include_embeddings: Also return the embeddings
+
+        Yields:
+            Tuples of (chunk IDs, documents, embeddings or None)
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Get the number of stored chunks
+
+        Returns:
+            Number of chunks
+        """
+
+    def persist(self) -> None:
+        """Make the writes so far durable"""
+
+    def reload(self) -> None:
+        """Pick up changes written by another process"""
+
+class ChromaBackend(VectorBackend):
+    """Chroma collections, with one collection per category when partitioning is enabled"""
+
+    def __init__(self, embeddings: Any, persist_directory: str = VECTOR_DB_PATH):
+        """
+        Open the default collection and the existing category partitions
+
+        Args:
+            embeddings: Embedding function used by the langchain wrapper
+            persist_directory: Chroma database directory
+        """
+        self.embeddings = embeddings
+        self.persist_directory = persist_directory
+        self._open()
+
+    def _open(self) -> None:
+        """Open a Chroma client on the database with its default collection and partitions"""
+        # Check if vector store exists and load it
+        if os.path.exists(self.persist_directory) and os.listdir(self.persist_directory):
+            self.vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+            logger.info(f"Loaded existing vector store from {self.persist_directory}")
+        else:
+            # Create a new vector store if it doesn't exist
+            self.vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+            logger.info(f"Created new vector store at {self.persist_directory}")
+
+        # Per-category collections, so category-filtered queries only scan their partition.
+        # The default collection keeps chunks ingested before partitioning was enabled.
+        self.partitions: Dict[str, Chroma] = {}
+        if PARTITION_BY_CATEGORY:
+            self._load_partitions()
+
+    def _open_partition(self, category: str) -> Chroma:
+        """
+        Get the vector store partition of a category, creating it if needed
+
+        Args:
+            category: Chunk category
+
+        Returns:
+            Chroma store sharing the client of the default collection
+        """
+        store = self.partitions.get(category)
+        if store is None:
+            store = Chroma(
+                collection_name=partition_collection_name(category),
+                embedding_function=self.embeddings,
+                persist_directory=self.persist_directory,
+                client=self.vectorstore._client,
+                collection_metadata={"category": category}
+            )
+            self.partitions[category] = store
+        return store
+
+    def _load_partitions(self) -> None:
+        """Open every category partition that already exists in the vector database"""
+        client = self.vectorstore._client
+        for collection in client.list_collections():
+            name = str(collection)
+            if not name.startswith(PARTITION_COLLECTION_PREFIX):
+                continue
+            metadata = client.get_collection(name).metadata or {}
+            self._open_partition(metadata.get("category", name[len(PARTITION_COLLECTION_PREFIX):]))
+        logger.info(f"Loaded {len(self.partitions)} category partitions")
+
+    def _all_stores(self) -> List[Chroma]:
+        """
+        Get the default collection and every category partition
+
+        Returns:
+            List of Chroma stores
+        """
+        return [self.vectorstore] + list(self.partitions.values())
+
+    def _stores_for_categories(self, categories: Optional[List[str]]) -> List[Tuple[Chroma, Optional[Dict[str, Any]]]]:
+        """
+        Get the stores a search has to scan, with the metadata filter to apply to each
+
+        Args:
+            categories: Optional categories to restrict the search to
+
+        Returns:
+            List of (store, where filter)
+        """
+        if not categories:
+            return [(store, None) for store in self._all_stores()]
+
+        # Unpartitioned chunks live in the default collection and need a metadata filter
+        targets: List[Tuple[Chroma, Optional[Dict[str, Any]]]] = [
+            (self.vectorstore, {"category": {"$in": list(categories)}})
+        ]
+        for category in categories:
+            if category in self.partitions:
+                targets.append((self.partitions[category], None))
+        return targets
+
+    def add(self, chunk_ids: List[str], embeddings: List[List[float]], chunks: List[Document]) -> None:
+        if PARTITION_BY_CATEGORY:
+            # Group the batch by category and write each group to its partition
+            groups: Dict[str, List[int]] = {}
+            for position, chunk in enumerate(chunks):
+                groups.setdefault(chunk.metadata.get("category", "general"), []).append(position)
+            targets = [(self._open_partition(category), positions) for category, positions in groups.items()]
+        else:
+            targets = [(self.vectorstore, list(range(len(chunks))))]
+
+        for store, positions in targets:
+            store._collection.upsert(
+                ids=[chunk_ids[i] for i in positions],
+                embeddings=[embeddings[i] for i in positions],
+                metadatas=[chunks[i].metadata for i in positions],
+                documents=[chunks[i].page_content for i in positions]
+            )
+
+    def delete(self, chunk_ids: List[str]) -> None:
+        # The category of a chunk may have changed since it was written, so look in every store
+        for store in self._all_stores():
+            stored_ids = store.get(ids=chunk_ids, include=[])["ids"]
+            if stored_ids:
+                store.delete(ids=stored_ids)
+
+    def update_metadata(self, chunk_ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        metadata_by_id = dict(zip(chunk_ids, metadatas))
+        for store in self._all_stores():
+            stored_ids = store.get(ids=chunk_ids, include=[])["ids"]
+            if stored_ids:
+                store._collection.update(ids=stored_ids, metadatas=[metadata_by_id[i] for i in stored_ids])
+
+    def ids_for_source(self, source: str) -> List[str]:
+        chunk_ids: List[str] = []
+        for store in self._all_stores():
+            chunk_ids.extend(store.get(where={"source": source}, include=[])["ids"])
+        return chunk_ids
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, Document, float]]:
+        hits: List[Tuple[str, Document, float]] = []
+        for store, where in self._stores_for_categories(categories):
+            if not store._collection.count():
+                continue
+            results = store._collection.query(
+                query_embeddings=[embedding],
+                n_results=k,
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+            hits.extend(
+                (chunk_id, Document(page_content=text or "", metadata=metadata or {}), distance)
+                for chunk_id, text, metadata, distance in zip(
+                    results["ids"][0],
+                    results["documents"][0],
+                    results["metadatas"][0],
+                    results["distances"][0]
+                )
+            )
+        hits.sort(key=lambda hit: hit[2])
+        return hits[:k]
+
+    def search_ids(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        hits: List[Tuple[str, float]] = []
+        for store, where in self._stores_for_categories(categories):
+            if not store._collection.count():
+                continue
+            results = store._collection.query(
+                query_embeddings=[embedding],
+                n_results=k,
+                where=where,
+                include=["distances"]
+            )
+            hits.extend(zip(results["ids"][0], results["distances"][0]))
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+
+    def get_documents(self, chunk_ids: List[str], categories: Optional[List[str]] = None) -> Dict[str, Document]:
+        docs_by_id: Dict[str, Document] = {}
+        for store, _ in self._stores_for_categories(categories) if chunk_ids else []:
+            stored = store.get(ids=chunk_ids, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                docs_by_id[chunk_id] = Document(page_content=text or "", metadata=metadata or {})
+        return docs_by_id
+
+    def iter_chunks(
+        self,
+        batch_size: int,
+        include_embeddings: bool = False
+    ) -> Iterator[Tuple[List[str], List[Document], Optional[List[List[float]]]]]:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        for store in self._all_stores():
+            offset = 0
+            while True:
+                stored = store.get(include=include, limit=batch_size, offset=offset)
+                if not len(stored["ids"]):
+                    break
+                documents = [
+                    Document(page_content=text or "", metadata=metadata or {})
+                    for text, metadata in zip(stored["documents"], stored["metadatas"])
+                ]
+                yield stored["ids"], documents, stored["embeddings"] if include_embeddings else None
+                offset += len(stored["ids"])
+
+    def count(self) -> int:
+        return sum(store._collection.count() for store in self._all_stores())
+
+    def persist(self) -> None:
+        self.vectorstore.persist()
+
+    def reload(self) -> None:
+        # A Chroma client keeps its HNSW indexes in memory and never sees writes of other
+        # processes. Clients are cached per database path, so drop the cached system to
+        # have the next client load the database again. Searches still running on the
+        # old client finish on the indexes it loaded.
+        SharedSystemClient._identifier_to_system.pop(self.vectorstore._client._identifier, None)
+        self._open()
+
+class NumpyBackend(VectorBackend):
+    """
+    Exact brute-force search over a memory-mapped float32 matrix
+
+    Embeddings live in an .npy file opened with mmap, so worker processes share
+    its pages through the OS cache and startup only reads the metadata
+    sidecar. Chunk texts live in a separate offset-indexed blob file and are
+    only read for the chunks that are returned. Suited to knowledge bases of
+    up to a few hundred thousand chunks.
+
+    Checkpoints append new chunks and metadata changes to the files; they are
+    only rewritten once chunks were deleted. The sidecar is a JSON lines file
+    of chunk records and metadata update records, written last, so rows the
+    other files hold beyond its chunk records are ignored.
+    """
+
+    def __init__(self, path: Path = NUMPY_STORE_DIR):
+        """
+        Initialize the store, loading it from disk if present
+
+        Args:
+            path: Directory holding the matrix and the metadata sidecar
+        """
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.reload()
+
+    def reload(self) -> None:
+        with self._lock:
+            if hasattr(self, "texts"):
+                self.texts.close()
+            self.ids: List[str] = []
+            self.texts = TextBlob(self.path / "texts.bin", load=False)
+            self.metadatas: List[Dict[str, Any]] = []
+            self.vectors = MmapMatrix(self.path / "vectors.npy", load=False)
+            self.norms = np.zeros(0, dtype=np.float32)
+            # Bytes of complete records in the sidecar, a torn last line is overwritten
+            self._sidecar_bytes = 0
+            # Rewrite every file on the next persist
+            self._compact = False
+
+            sidecar = self.path / "chunks.jsonl"
+            legacy_sidecar = self.path / "chunks.json"
+            if sidecar.exists() or legacy_sidecar.exists():
+                try:
+                    if sidecar.exists():
+                        self.ids, self.metadatas, self._sidecar_bytes = self._read_sidecar(sidecar)
+                        self.texts = TextBlob(self.path / "texts.bin", rows=len(self.ids))
+                    else:
+                        # Stores written before the JSON lines sidecar are converted on the next persist
+                        with open(legacy_sidecar, 'r') as f:
+                            data = json.load(f)
+                        self.ids = data["ids"]
+                        self.metadatas = data["metadatas"]
+                        if "texts" in data:
+                            # Stores written before the blob file kept the texts in the sidecar
+                            self.texts.append(data["texts"])
+                        else:
+                            self.texts = TextBlob(self.path / "texts.bin", rows=len(self.ids))
+                        self._compact = True
+                    self.vectors = MmapMatrix(self.path / "vectors.npy", rows=len(self.ids))
+                    self.norms = np.load(self.path / "norms.npy")[:len(self.ids)]
+                    for name, rows in (("text blob", len(self.texts)), ("matrix", len(self.vectors)), ("norms", len(self.norms))):
+                        if rows != len(self.ids):
+                            raise ValueError(f"{name} holds {rows} rows for {len(self.ids)} chunks")
+                    logger.info(f"Loaded NumPy vector store with {len(self.ids)} chunks from {self.path}")
+                except Exception as e:
+                    logger.error(f"Error loading NumPy vector store: {str(e)}")
+                    self.ids, self.metadatas = [], []
+                    self.texts = TextBlob(self.path / "texts.bin", load=False)
+                    self.vectors = MmapMatrix(self.path / "vectors.npy", load=False)
+                    self.norms = np.zeros(0, dtype=np.float32)
+                    self._sidecar_bytes = 0
+                    self._compact = False
+
+            self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            self._index_sources()
+            self.alive = np.ones(len(self.ids), dtype=bool)
+            self._category_code: Dict[str, int] = {}
+            self.category_codes = self._encode_categories(self.metadatas)
+            # Chunks up to this row are in the sidecar, metadata of the updated ones changed since
+            self._disk_rows = len(self.ids)
+            self._updated_rows: Set[int] = set()
+            self._dirty = self._compact
+
+    @staticmethod
+    def _read_sidecar(path: Path) -> Tuple[List[str], List[Dict[str, Any]], int]:
+        """Replay the sidecar records, returning the chunk IDs, their metadata and the bytes read"""
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                # A persist interrupted while appending leaves an incomplete last line
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if "id" in record:
+                    ids.append(record["id"])
+                    metadatas.append(record["metadata"])
+                else:
+                    metadatas[record["row"]] = record["metadata"]
+                size += len(line)
+        return ids, metadatas, size
+
+    @staticmethod
+    def _sidecar_lines(records: List[Dict[str, Any]]) -> bytes:
+        """Encode sidecar records as JSON lines"""
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+
+    def _index_sources(self) -> None:
+        """Rebuild the rows of each source, so a file's chunks are found without scanning all metadata"""
+        self._rows_of_source: Dict[str, Set[int]] = {}
+        for row, metadata in enumerate(self.metadatas):
+            self._rows_of_source.setdefault(metadata.get("source"), set()).add(row)
+
+    def _unindex_source(self, row: int) -> None:
+        """Forget the source of a row"""
+        source = self.metadatas[row].get("source")
+        rows = self._rows_of_source.get(source)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del self._rows_of_source[source]
+
+    def _encode_categories(self, metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        """Map the category of each chunk to a small integer for vectorized filtering"""
+        return np.asarray(
+            [self._category_code.setdefault(metadata.get("category", "general"), len(self._category_code))
+             for metadata in metadatas],
+            dtype=np.int32
+        )
+
+    def _documents(self, rows: List[int]) -> List[Document]:
+        """Build the documents of rows, reading their text from the blob file"""
+        return [
+            Document(page_content=text, metadata=dict(self.metadatas[row]))
+            for row, text in zip(rows, self.texts.take(rows))
+        ]
+
+    def _nearest(self, embedding: List[float], k: int, categories: Optional[List[str]]) -> List[Tuple[str, float]]:
+        """Get the IDs of the chunks nearest to a query embedding with their distances"""
+        query = np.asarray(embedding, dtype=np.float32)
+        # Snapshot the rows under the lock and scan without it, so searches do not block writers.
+        # Appends and compactions replace these arrays, deletes flag rows in place so the mask is copied.
+        with self._lock:
+            if not self._row_of:
+                return []
+            rows = len(self.ids)
+            ids = self.ids
+            mask = self.alive[:rows].copy()
+            if categories:
+                codes = [self._category_code[name] for name in categories if name in self._category_code]
+                mask &= np.isin(self.category_codes[:rows], codes)
+            norms = self.norms[:rows]
+            vectors = self.vectors.snapshot()
+
+        k = min(k, int(mask.sum()))
+        if not k:
+            return []
+        # Squared L2 distance = |x|^2 - 2 x.q + |q|^2, blocks are multiplied straight from the mapped file
+        distances = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, rows)
+            distances[start:end] = norms[start:end] - 2 * (vectors.block(start, end) @ query)
+        distances += float(query @ query)
+        distances[~mask] = np.inf
+
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(ids[row], float(distances[row])) for row in nearest]
+
+    def add(self, chunk_ids: List[str], embeddings: List[List[float]], chunks: List[Document]) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if not len(vectors):
+            return
+        with self._lock:
+            self.delete(chunk_ids)
+            start = len(self.ids)
+            self.texts.append([chunk.page_content for chunk in chunks])
+            for offset, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks)):
+                self.ids.append(chunk_id)
+                self.metadatas.append(chunk.metadata)
+                self._row_of[chunk_id] = start + offset
+                self._rows_of_source.setdefault(chunk.metadata.get("source"), set()).add(start + offset)
+            self.vectors.append(vectors)
+            self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", vectors, vectors)])
+            self.alive = np.concatenate([self.alive, np.ones(len(vectors), dtype=bool)])
+            self.category_codes = np.concatenate([self.category_codes, self._encode_categories([chunk.metadata for chunk in chunks])])
+            self._dirty = True
+
+    def delete(self, chunk_ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in chunk_ids:
+                row = self._row_of.pop(chunk_id, None)
+                if row is not None:
+                    self.alive[row] = False
+                    self._unindex_source(row)
+                    self._dirty = True
+
+    def update_metadata(self, chunk_ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for chunk_id, metadata in zip(chunk_ids, metadatas):
+                row = self._row_of.get(chunk_id)
+                if row is not None:
+                    # Promoting a deduplicated chunk changes its source
+                    self._unindex_source(row)
+                    self.metadatas[row] = dict(metadata)
+                    self._rows_of_source.setdefault(metadata.get("source"), set()).add(row)
+                    if row < self._disk_rows:
+                        self._updated_rows.add(row)
+                    self._dirty = True
+
+    def ids_for_source(self, source: str) -> List[str]:
+        with self._lock:
+            return [self.ids[row] for row in sorted(self._rows_of_source.get(source, ()))]
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, Document, float]]:
+        nearest = self._nearest(embedding, k, categories)
+        with self._lock:
+            # Chunks deleted since the scan are left out
+            nearest = [(chunk_id, distance) for chunk_id, distance in nearest if chunk_id in self._row_of]
+            documents = self._documents([self._row_of[chunk_id] for chunk_id, _ in nearest])
+            return [(chunk_id, document, distance) for (chunk_id, distance), document in zip(nearest, documents)]
+
+    def search_ids(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        return self._nearest(embedding, k, categories)
+
+    def get_documents(self, chunk_ids: List[str], categories: Optional[List[str]] = None) -> Dict[str, Document]:
+        with self._lock:
+            found_ids = [chunk_id for chunk_id in chunk_ids if chunk_id in self._row_of]
+            return dict(zip(found_ids, self._documents([self._row_of[chunk_id] for chunk_id in found_ids])))
+
+    def iter_chunks(
+        self,
+        batch_size: int,
+        include_embeddings: bool = False
+    ) -> Iterator[Tuple[List[str], List[Document], Optional[List[List[float]]]]]:
+        with self._lock:
+            rows = np.flatnonzero(self.alive)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            with self._lock:
+                chunk_ids = [self.ids[row] for row in batch]
+                documents = self._documents(batch)
+                embeddings = self.vectors.take(batch).tolist() if include_embeddings else None
+            yield chunk_ids, documents, embeddings
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    def persist(self) -> None:
+        """Append the new chunks to the store files, rewriting them without the deleted chunks if there are any"""
+        with self._lock:
+            if not self._dirty:
+                return
+            sidecar = self.path / "chunks.jsonl"
+            compact = self._compact or not self.alive.all()
+            rows = np.flatnonzero(self.alive)
+            self.vectors.save(rows)
+            self.texts.save(rows)
+
+            if compact:
+                self.norms = self.norms[rows]
+                self.category_codes = self.category_codes[rows]
+                self.ids = [self.ids[row] for row in rows]
+                self.metadatas = [self.metadatas[row] for row in rows]
+                self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+                self._index_sources()
+                self.alive = np.ones(len(self.ids), dtype=bool)
+                records = [{"id": chunk_id, "metadata": metadata} for chunk_id, metadata in zip(self.ids, self.metadatas)]
+            else:
+                records = [{"row": row, "metadata": self.metadatas[row]} for row in sorted(self._updated_rows)]
+                records += [
+                    {"id": self.ids[row], "metadata": self.metadatas[row]}
+                    for row in range(self._disk_rows, len(self.ids))
+                ]
+
+            np.save(self.path / "norms.tmp.npy", self.norms)
+            os.replace(self.path / "norms.tmp.npy", self.path / "norms.npy")
+
+            # The sidecar is written last, it decides which rows of the other files exist
+            lines = self._sidecar_lines(records)
+            if compact:
+                tmp_path = self.path / "chunks.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(lines)
+                os.replace(tmp_path, sidecar)
+                (self.path / "chunks.json").unlink(missing_ok=True)
+                self._sidecar_bytes = len(lines)
+            else:
+                with open(sidecar, 'ab') as f:
+                    f.truncate(self._sidecar_bytes)
+                    f.write(lines)
+                self._sidecar_bytes += len(lines)
+
+            self._disk_rows = len(self.ids)
+            self._updated_rows = set()
+            self._compact = False
+            self._dirty = False
+
+def shard_of(chunk_id: str, num_shards: int) -> int:
+    """
+    Get the shard a chunk is stored in
+
+    Args:
+        chunk_id: Chunk ID
+        num_shards: Number of shards
+
+    Returns:
+        Shard number
+    """
+    return int.from_bytes(hashlib.blake2b(chunk_id.encode(), digest_size=8).digest(), "little") % num_shards
+
+class ShardedBackend(VectorBackend):
+    """
+    Chunks hashed by ID across several independent backends
+
+    Each shard has its own database and index files, so writes to different
+    shards and searches across all shards run concurrently on a thread pool.
+    Search results of the shards are merged by distance.
+    """
+
+    def __init__(self, shards: List[VectorBackend]):
+        """
+        Initialize the backend
+
+        Args:
+            shards: One backend per shard, in shard order
+        """
+        self.shards = shards
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="vector-shard")
+
+    def _map(self, fn: Any, jobs: List[Tuple[VectorBackend, Any]]) -> List[Any]:
+        """Run fn(shard, argument) for each job in parallel and return the results in order"""
+        if len(jobs) == 1:
+            return [fn(*jobs[0])]
+        return list(self._pool.map(lambda job: fn(*job), jobs))
+
+    def _group_by_shard(self, chunk_ids: List[str]) -> Dict[int, List[int]]:
+        """Group the positions of chunk IDs by the shard they belong to"""
+        groups: Dict[int, List[int]] = {}
+        for position, chunk_id in enumerate(chunk_ids):
+            groups.setdefault(shard_of(chunk_id, len(self.shards)), []).append(position)
+        return groups
+
+    def add(self, chunk_ids: List[str], embeddings: List[List[float]], chunks: List[Document]) -> None:
+        jobs = [
+            (self.shards[shard], positions)
+            for shard, positions in self._group_by_shard(chunk_ids).items()
+        ]
+        self._map(
+            lambda backend, positions: backend.add(
+                [chunk_ids[i] for i in positions],
+                [embeddings[i] for i in positions],
+                [chunks[i] for i in positions]
+            ),
+            jobs
+        )
+
+    def delete(self, chunk_ids: List[str]) -> None:
+        jobs = [
+            (self.shards[shard], [chunk_ids[i] for i in positions])
+            for shard, positions in self._group_by_shard(chunk_ids).items()
+        ]
+        self._map(lambda backend, ids: backend.delete(ids), jobs)
+
+    def update_metadata(self, chunk_ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        jobs = [
+            (self.shards[shard], positions)
+            for shard, positions in self._group_by_shard(chunk_ids).items()
+        ]
+        self._map(
+            lambda backend, positions: backend.update_metadata(
+                [chunk_ids[i] for i in positions],
+                [metadatas[i] for i in positions]
+            ),
+            jobs
+        )
+
+    def ids_for_source(self, source: str) -> List[str]:
+        results = self._map(lambda backend, _: backend.ids_for_source(source), [(shard, None) for shard in self.shards])
+        return [chunk_id for shard_ids in results for chunk_id in shard_ids]
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, Document, float]]:
+        results = self._map(
+            lambda backend, _: backend.search(embedding, k, categories),
+            [(shard, None) for shard in self.shards]
+        )
+        hits = [hit for shard_hits in results for hit in shard_hits]
+        hits.sort(key=lambda hit: hit[2])
+        return hits[:k]
+
+    def search_ids(
+        self,
+        embedding: List[float],
+        k: int,
+        categories: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        results = self._map(
+            lambda backend, _: backend.search_ids(embedding, k, categories),
+            [(shard, None) for shard in self.shards]
+        )
+        hits = [hit for shard_hits in results for hit in shard_hits]
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+
+    def get_documents(self, chunk_ids: List[str], categories: Optional[List[str]] = None) -> Dict[str, Document]:
+        jobs = [
+            (self.shards[shard], [chunk_ids[i] for i in positions])
+            for shard, positions in self._group_by_shard(chunk_ids).items()
+        ]
+        docs_by_id: Dict[str, Document] = {}
+        for shard_docs in self._map(lambda backend, ids: backend.get_documents(ids, categories), jobs):
+            docs_by_id.update(shard_docs)
+        return docs_by_id
+
+    def iter_chunks(
+        self,
+        batch_size: int,
+        include_embeddings: bool = False
+    ) -> Iterator[Tuple[List[str], List[Document], Optional[List[List[float]]]]]:
+        for backend in self.shards:
+            yield from backend.iter_chunks(batch_size, include_embeddings)
+
+    def count(self) -> int:
+        return sum(self._map(lambda backend, _: backend.count(), [(shard, None) for shard in self.shards]))
+
+    def persist(self) -> None:
+        self._map(lambda backend, _: backend.persist(), [(shard, None) for shard in self.shards])
+
+    def reload(self) -> None:
+        self._map(lambda backend, _: backend.reload(), [(shard, None) for shard in self.shards])
+
+def _open_shards(name: str, embeddings: Any, num_shards: int, directory: Path = VECTOR_SHARDS_DIR) -> ShardedBackend:
+    """
+    Open the shards of a sharded backend, refusing a directory written with another layout
+
+    Args:
+        name: "chroma" or "numpy"
+        embeddings: Embedding function, used by the Chroma wrapper
+        num_shards: Number of shards
+        directory: Directory holding one subdirectory per shard
+
+    Returns:
+        Sharded backend
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    layout_file = directory / "layout.json"
+    layout = {"backend": name, "shards": num_shards}
+    if layout_file.exists():
+        with open(layout_file, 'r') as f:
+            stored_layout = json.load(f)
+        if stored_layout != layout:
+            # Chunk IDs would hash to other shards than the ones holding them
+            raise ValueError(
+                f"{directory} holds {stored_layout['shards']} {stored_layout['backend']} shards, "
+                f"move it away and re-ingest with --full to use {num_shards} {name} shards"
+            )
+    else:
+        with open(layout_file, 'w') as f:
+            json.dump(layout, f)
+
+    shards: List[VectorBackend] = []
+    for shard in range(num_shards):
+        path = directory / f"{name}_{shard:02d}"
+        shards.append(ChromaBackend(embeddings, persist_directory=str(path)) if name == "chroma" else NumpyBackend(path))
+    logger.info(f"Opened {num_shards} {name} vector store shards in {directory}")
+    return ShardedBackend(shards)
+
+def create_vector_backend(name: str, embeddings: Any, num_shards: int = VECTOR_SHARDS) -> VectorBackend:
+    """
+    Create the vector backend selected by VECTOR_BACKEND
+
+    Args:
+        name: "chroma" or "numpy"
+        embeddings: Embedding function, used by the Chroma wrapper
+        num_shards: Number of shards, 1 stores everything in a single backend
+
+    Returns:
+        Vector backend instance
+    """
+    if name not in ("chroma", "numpy"):
+        raise ValueError(f"Unknown vector backend: {name}")
+    if num_shards > 1:
+        return _open_shards(name, embeddings, num_shards)
+    if name == "chroma":
+        return ChromaBackend(embeddings)
+    return NumpyBackend()
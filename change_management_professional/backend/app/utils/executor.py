@@ -0,0 +1,115 @@
+"""
+Utility module containing a bounded thread pool for running blocking work off the event loop
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ThreadPoolSaturated(Exception):
+    """Raised when a MeteredThreadPool already has its maximum number of queued tasks"""
+
+
+class MeteredThreadPool:
+    """Thread pool with a bounded queue and counters for queue depth and throughput"""
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        """
+        Initialize the pool
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Maximum number of tasks waiting for a thread, 0 means unbounded
+            name: Thread name prefix, also used in log and error messages
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.max_queue_depth_seen = 0
+
+    def _run_task(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a task on a worker thread while keeping the counters up to date"""
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            result = fn(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+        return result
+
+    def _task_done(self, future: Future) -> None:
+        """Take a task cancelled before it started off the queue, it never reached _run_task"""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking function on the pool and await its result
+
+        Args:
+            fn: Blocking function to run
+            args: Positional arguments for fn
+
+        Returns:
+            Return value of fn
+        """
+        with self._lock:
+            if self.max_queue and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ThreadPoolSaturated(f"{self.name} pool has {self.queued} queued tasks")
+            self.queued += 1
+            self.max_queue_depth_seen = max(self.max_queue_depth_seen, self.queued)
+
+        try:
+            future = self._executor.submit(self._run_task, fn, *args)
+        except RuntimeError:
+            # The pool was shut down
+            with self._lock:
+                self.queued -= 1
+            raise
+        # Cancelling the awaiting coroutine cancels the task if it has not started yet
+        future.add_done_callback(self._task_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters
+
+        Returns:
+            Dictionary with pool size, tasks waiting for and running on a thread, and task counters
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "max_queue_depth_seen": self.max_queue_depth_seen,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting tasks and release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
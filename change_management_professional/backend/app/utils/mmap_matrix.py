@@ -0,0 +1,189 @@
+"""
+Utility module containing a float32 matrix stored in a memory-mapped .npy file
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Rows copied per step when the matrix is rewritten
+COPY_BLOCK_ROWS = 16384
+
+
+class MmapMatrix:
+    """
+    Append-only float32 matrix backed by an .npy file
+
+    Rows saved to disk are memory-mapped read-only, so processes opening the
+    same file share its pages through the OS cache. Appended rows stay in
+    memory until save() appends them to the file, or rewrites it when rows
+    were dropped.
+    """
+
+    def __init__(self, path: Path, load: bool = True, rows: Optional[int] = None):
+        """
+        Initialize the matrix, mapping the file if it exists
+
+        Args:
+            path: Location of the .npy file
+            load: Map the existing file, False starts empty and overwrites it on save
+            rows: Optional number of rows to use, rows after them are left over
+                from an interrupted save and get overwritten by the next one
+        """
+        self.path = path
+        self._disk: Optional[np.ndarray] = np.load(path, mmap_mode="r") if load and path.exists() else None
+        if self._disk is not None and rows is not None:
+            self._disk = self._disk[:rows]
+        self._pending: List[np.ndarray] = []
+
+    @property
+    def disk_rows(self) -> int:
+        return len(self._disk) if self._disk is not None else 0
+
+    @property
+    def dim(self) -> Optional[int]:
+        if self._disk is not None and self._disk.shape[1]:
+            return self._disk.shape[1]
+        return self._pending[0].shape[1] if self._pending else None
+
+    def __len__(self) -> int:
+        return self.disk_rows + sum(len(vectors) for vectors in self._pending)
+
+    def _pending_matrix(self) -> np.ndarray:
+        """Get the appended rows as one matrix"""
+        if len(self._pending) > 1:
+            self._pending = [np.concatenate(self._pending)]
+        return self._pending[0]
+
+    def append(self, vectors: np.ndarray) -> None:
+        """
+        Append rows
+
+        Args:
+            vectors: Matrix of float32 vectors
+        """
+        self._pending.append(np.asarray(vectors, dtype=np.float32))
+
+    def block(self, start: int, end: int) -> np.ndarray:
+        """
+        Get a contiguous range of rows, without copying rows that are on disk
+
+        Args:
+            start: First row
+            end: Row after the last one, clamped to the number of rows
+
+        Returns:
+            Matrix of float32 vectors
+        """
+        disk_rows = self.disk_rows
+        end = min(end, len(self))
+        if end <= disk_rows or not self._pending:
+            if self._disk is None:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            return self._disk[start:end]
+        if start >= disk_rows:
+            return self._pending_matrix()[start - disk_rows:end - disk_rows]
+        return np.concatenate([self._disk[start:], self._pending_matrix()[:end - disk_rows]])
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Get arbitrary rows
+
+        Args:
+            rows: Row numbers
+
+        Returns:
+            Matrix of float32 vectors in the order of rows
+        """
+        vectors = np.empty((len(rows), self.dim or 0), dtype=np.float32)
+        on_disk = rows < self.disk_rows
+        if on_disk.any():
+            vectors[on_disk] = self._disk[rows[on_disk]]
+        if not on_disk.all():
+            vectors[~on_disk] = self._pending_matrix()[rows[~on_disk] - self.disk_rows]
+        return vectors
+
+    def snapshot(self) -> "MmapMatrix":
+        """
+        Get a read-only view of the current rows that later appends and saves leave unchanged
+
+        The view keeps the old mapping alive, so a save replacing the file does
+        not invalidate it.
+
+        Returns:
+            Matrix sharing the mapped file and the appended rows
+        """
+        view = MmapMatrix(self.path, load=False)
+        view._disk = self._disk
+        view._pending = list(self._pending)
+        return view
+
+    def _append_in_place(self) -> bool:
+        """
+        Append the pending rows to the file and update the shape in its header
+
+        Readers that mapped the file before only see the rows they mapped.
+
+        Returns:
+            False if the header cannot be updated in place and the file must be rewritten
+        """
+        pending = self._pending_matrix()
+        rows = self.disk_rows + len(pending)
+        with open(self.path, 'r+b') as f:
+            if np.lib.format.read_magic(f) != (1, 0):
+                return False
+            np.lib.format.read_array_header_1_0(f)
+            data_offset = f.tell()
+            header = io.BytesIO()
+            np.lib.format.write_array_header_1_0(
+                header,
+                {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)), "fortran_order": False, "shape": (rows, pending.shape[1])}
+            )
+            if len(header.getvalue()) != data_offset:
+                return False
+
+            # Data first, so an interrupted save leaves the old header describing valid rows
+            f.seek(data_offset + self.disk_rows * pending.shape[1] * pending.itemsize)
+            f.truncate()
+            f.write(pending.tobytes())
+            f.flush()
+            f.seek(0)
+            f.write(header.getvalue())
+        return True
+
+    def save(self, keep: np.ndarray) -> None:
+        """
+        Write the appended rows and drop the rows that are not kept, then map the file again
+
+        When every row is kept the new rows are appended to the file in place,
+        otherwise the file is rewritten.
+
+        Args:
+            keep: Row numbers to keep, in their new order
+        """
+        keep = np.asarray(keep)
+        if (
+            self._disk is not None
+            and self.dim
+            and np.array_equal(keep, np.arange(len(self)))
+            and (not self._pending or self._append_in_place())
+        ):
+            self._disk = np.load(self.path, mmap_mode="r")[:len(keep)]
+            self._pending = []
+            return
+
+        tmp_path = self.path.with_suffix(".tmp.npy")
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(keep), self.dim or 0))
+        for start in range(0, len(keep), COPY_BLOCK_ROWS):
+            matrix[start:start + COPY_BLOCK_ROWS] = self.take(keep[start:start + COPY_BLOCK_ROWS])
+        matrix.flush()
+        del matrix
+
+        # Release the old mapping before replacing the file it points to
+        self._disk = None
+        self._pending = []
+        os.replace(tmp_path, self.path)
+        self._disk = np.load(self.path, mmap_mode="r")
@@ -0,0 +1,85 @@
+"""
+Utility module containing a thread-safe progress tracker for long running ingestion work
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class IngestProgress:
+    """Counters of an ingestion run with derived throughput and ETA"""
+
+    def __init__(self):
+        """Initialize the counters, the clock starts with the first reported file count"""
+        self._lock = threading.Lock()
+        self.total_files = 0
+        self.files_parsed = 0
+        self.files_failed = 0
+        self.files_skipped = 0
+        self.chunks_embedded = 0
+        self.started_at: Optional[float] = None
+
+    def add_files(self, count: int, skipped: int = 0) -> None:
+        """
+        Report files that will be processed
+
+        Args:
+            count: Number of files that will be parsed
+            skipped: Number of files that are left out because they are unchanged
+        """
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            self.total_files += count
+            self.files_skipped += skipped
+
+    def file_parsed(self, failed: bool = False) -> None:
+        """
+        Report a parsed file
+
+        Args:
+            failed: Whether the file could not be loaded
+        """
+        with self._lock:
+            self.files_parsed += 1
+            if failed:
+                self.files_failed += 1
+
+    def chunks_written(self, count: int) -> None:
+        """
+        Report chunks that were embedded and stored
+
+        Args:
+            count: Number of chunks
+        """
+        with self._lock:
+            self.chunks_embedded += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current counters
+
+        Returns:
+            Dictionary with file and chunk counters, throughput and estimated seconds remaining
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+            files_per_second = self.files_parsed / elapsed if elapsed > 0 else 0.0
+            remaining_files = max(0, self.total_files - self.files_parsed)
+            eta_seconds = None
+            if remaining_files == 0 and self.started_at is not None:
+                eta_seconds = 0.0
+            elif files_per_second > 0:
+                eta_seconds = round(remaining_files / files_per_second, 1)
+            return {
+                "total_files": self.total_files,
+                "files_parsed": self.files_parsed,
+                "files_failed": self.files_failed,
+                "files_skipped": self.files_skipped,
+                "chunks_embedded": self.chunks_embedded,
+                "elapsed_seconds": round(elapsed, 1),
+                "files_per_second": round(files_per_second, 2),
+                "chunks_per_second": round(self.chunks_embedded / elapsed, 2) if elapsed > 0 else 0.0,
+                "eta_seconds": eta_seconds,
+            }
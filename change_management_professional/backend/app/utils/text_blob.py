@@ -0,0 +1,155 @@
+"""
+Utility module containing chunk texts stored in an offset-indexed blob file
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Bytes copied per step when the blob is rewritten
+COPY_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+class TextBlob:
+    """
+    Append-only list of texts stored as concatenated UTF-8 in one file
+
+    Only the int64 start offset of each row is held in memory; texts are read
+    with positional reads when asked for, so memory does not grow with the
+    text volume. Appended texts stay in memory until save() writes them.
+    """
+
+    def __init__(self, path: Path, load: bool = True, rows: Optional[int] = None):
+        """
+        Initialize the blob, opening the file and its offsets if they exist
+
+        Args:
+            path: Location of the blob file, offsets are kept next to it
+            load: Open the existing files, False starts empty and overwrites them on save
+            rows: Optional number of rows to use, rows after them are left over
+                from an interrupted save and get overwritten by the next one
+        """
+        self.path = path
+        self.offsets_path = path.with_suffix(".offsets.npy")
+        # Row i spans offsets[i]:offsets[i + 1] of the file
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self._fd: Optional[int] = None
+        if load and path.exists() and self.offsets_path.exists():
+            self.offsets = np.load(self.offsets_path)
+            if rows is not None:
+                self.offsets = self.offsets[:rows + 1]
+            self._fd = os.open(path, os.O_RDONLY)
+        self._pending: List[bytes] = []
+
+    @property
+    def disk_rows(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return self.disk_rows + len(self._pending)
+
+    def append(self, texts: List[str]) -> None:
+        """
+        Append rows
+
+        Args:
+            texts: Texts to add
+        """
+        self._pending.extend(text.encode("utf-8") for text in texts)
+
+    def get(self, row: int) -> str:
+        """
+        Get the text of a row
+
+        Args:
+            row: Row number
+
+        Returns:
+            Text of the row
+        """
+        if row >= self.disk_rows:
+            return self._pending[row - self.disk_rows].decode("utf-8")
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return os.pread(self._fd, end - start, start).decode("utf-8")
+
+    def take(self, rows: List[int]) -> List[str]:
+        """
+        Get the texts of arbitrary rows
+
+        Args:
+            rows: Row numbers
+
+        Returns:
+            Texts in the order of rows
+        """
+        return [self.get(int(row)) for row in rows]
+
+    def close(self) -> None:
+        """Close the blob file, rows on disk can no longer be read"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _copy_rows(self, keep: np.ndarray, f) -> np.ndarray:
+        """Write the bytes of the kept disk rows to f and return their new offsets"""
+        lengths = (self.offsets[keep + 1] - self.offsets[keep]) if len(keep) else np.zeros(0, dtype=np.int64)
+        offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        buffer: List[bytes] = []
+        buffered = 0
+        for row in keep:
+            start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+            buffer.append(os.pread(self._fd, end - start, start))
+            buffered += end - start
+            if buffered >= COPY_BLOCK_BYTES:
+                f.write(b"".join(buffer))
+                buffer, buffered = [], 0
+        f.write(b"".join(buffer))
+        return offsets
+
+    def save(self, keep: np.ndarray) -> None:
+        """
+        Write the appended rows and drop the rows that are not kept
+
+        When every row is kept the new texts are appended to the file in
+        place, otherwise the file is rewritten.
+
+        Args:
+            keep: Row numbers to keep, in ascending order
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        pending_bytes = [len(text) for text in self._pending]
+        disk_rows = self.disk_rows
+        kept_disk = keep[keep < disk_rows]
+        appends_only = (
+            self._fd is not None
+            and len(kept_disk) == disk_rows
+            and np.array_equal(keep, np.arange(len(self)))
+        )
+
+        if appends_only:
+            # Readers in other processes only read up to their own last offset
+            with open(self.path, 'r+b') as f:
+                f.truncate(int(self.offsets[-1]))
+                f.seek(0, os.SEEK_END)
+                f.write(b"".join(self._pending))
+            offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(pending_bytes, dtype=np.int64)])
+        else:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                offsets = self._copy_rows(kept_disk, f) if self._fd is not None else np.zeros(1, dtype=np.int64)
+                kept_pending = [self._pending[row - disk_rows] for row in keep[keep >= disk_rows]]
+                f.write(b"".join(kept_pending))
+                offsets = np.concatenate([offsets, offsets[-1] + np.cumsum([len(text) for text in kept_pending], dtype=np.int64)])
+            self.close()
+            os.replace(tmp_path, self.path)
+
+        tmp_offsets_path = self.path.with_suffix(".offsets.tmp.npy")
+        np.save(tmp_offsets_path, offsets)
+        os.replace(tmp_offsets_path, self.offsets_path)
+        self.offsets = offsets
+        self._pending = []
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
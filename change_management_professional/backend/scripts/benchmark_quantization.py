@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Script to measure the memory saved and the recall lost by quantized vector storage.
+Usage:
+    python -m scripts.benchmark_quantization                     # Use the vectors of the knowledge base
+    python -m scripts.benchmark_quantization --synthetic 100000  # Use 100k random vectors
+    python -m scripts.benchmark_quantization --candidates 50     # Re-score 50 candidates per query
+
+Queries are stored vectors with added noise. Each quantized index is compared
+against an exact float32 search over the same vectors.
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.quantized_index import QuantizedVectorIndex, QUANTIZATION_TYPES
+from app.config import VECTOR_DB_PATH, NUM_DOCS_TO_RETRIEVE, QUANTIZED_RESCORE_CANDIDATES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+)
+logger = logging.getLogger(__name__)
+
+def load_knowledge_base_vectors() -> np.ndarray:
+    """
+    Read every chunk vector stored in the knowledge base vector database
+
+    Returns:
+        Matrix of float32 vectors
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    batches = []
+    for name in client.list_collections():
+        collection = client.get_collection(str(name))
+        offset = 0
+        while True:
+            stored = collection.get(include=["embeddings"], limit=5000, offset=offset)
+            if not len(stored["ids"]):
+                break
+            batches.append(np.asarray(stored["embeddings"], dtype=np.float32))
+            offset += len(stored["ids"])
+    return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+def exact_search(vectors: np.ndarray, norms: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """
+    Find the k nearest vectors by squared L2 distance
+
+    Args:
+        vectors: Matrix of float32 vectors
+        norms: Squared norm of each vector
+        query: Query vector
+        k: Number of results
+
+    Returns:
+        Row numbers of the nearest vectors
+    """
+    distances = norms - 2 * (vectors @ query)
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return nearest[np.argsort(distances[nearest])]
+
+def benchmark(vectors: np.ndarray, num_queries: int, k: int, candidates: int, seed: int) -> None:
+    """
+    Compare the quantized indexes with exact float32 search and log the results
+
+    Args:
+        vectors: Matrix of float32 vectors to index
+        num_queries: Number of queries to run
+        k: Number of results per query
+        candidates: Number of approximate hits re-scored per query
+        seed: Random seed for query sampling
+    """
+    rng = np.random.default_rng(seed)
+    noise = float(np.std(vectors)) * 0.5
+    queries = vectors[rng.integers(0, len(vectors), num_queries)]
+    queries = (queries + rng.normal(0, noise, queries.shape)).astype(np.float32)
+
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    exact_start = time.perf_counter()
+    expected = [exact_search(vectors, norms, query, k) for query in queries]
+    exact_ms = (time.perf_counter() - exact_start) * 1000 / num_queries
+
+    ids = [str(row) for row in range(len(vectors))]
+    logger.info(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {num_queries} queries, k={k}")
+    logger.info(f"float32: {vectors.nbytes / 1024 / 1024:.1f} MiB in memory, {exact_ms:.2f} ms/query (exact)")
+
+    for dtype in QUANTIZATION_TYPES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = QuantizedVectorIndex(dtype, Path(tmp_dir))
+            index.add(ids, vectors, [None] * len(ids))
+            index.save()
+
+            latencies = []
+            hits = 0
+            for query, nearest in zip(queries, expected):
+                start = time.perf_counter()
+                results = index.search(query, k, candidates)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len({int(chunk_id) for chunk_id, _ in results}.intersection(nearest.tolist()))
+
+            memory = index.memory_stats()
+            saved = 1 - memory["quantized_bytes"] / vectors.nbytes
+            logger.info(
+                f"{dtype}: {memory['quantized_bytes'] / 1024 / 1024:.1f} MiB in memory ({saved:.0%} saved), "
+                f"recall@{k} {hits / (k * num_queries):.4f}, "
+                f"{np.mean(latencies):.2f} ms/query (p95 {np.percentile(latencies, 95):.2f} ms)"
+            )
+            del index
+
+def main():
+    """Main entry point for the script"""
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage")
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of random vectors to use instead of the knowledge base")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the random vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=NUM_DOCS_TO_RETRIEVE, help="Number of results per query")
+    parser.add_argument("--candidates", type=int, default=QUANTIZED_RESCORE_CANDIDATES, help="Approximate hits re-scored with float32 vectors")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        vectors = rng.normal(0, 1, (args.synthetic, args.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        vectors = load_knowledge_base_vectors()
+
+    if len(vectors) < args.k:
+        logger.error(f"Need at least {args.k} vectors, found {len(vectors)}")
+        return
+
+    benchmark(vectors, args.queries, args.k, args.candidates, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark ingestion and retrieval on a synthetic change management corpus.
+Usage:
+    python -m scripts.benchmark_retrieval                        # 10k chunks, vector retrieval
+    python -m scripts.benchmark_retrieval --chunks 1000000       # 1M chunks
+    python -m scripts.benchmark_retrieval --mode hybrid          # Hybrid retrieval
+    python -m scripts.benchmark_retrieval --output results.json  # Keep the results for comparisons
+    python -m scripts.benchmark_retrieval --work-dir /tmp/bench --reuse  # Query an existing benchmark corpus
+
+The corpus and the knowledge base built from it live in their own data
+directory, the real knowledge base is never touched. Backend, quantization and
+cache settings are read from the environment as usual, so running the script
+with different settings gives comparable results.
+
+Every synthetic document describes one fictional organization. Queries are
+taken from a sentence of a document; a query is a hit when a chunk of that
+document is retrieved. Recall@k compares the vector search with an exact
+float32 nearest neighbour search over all stored embeddings.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+)
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ["frameworks", "case_studies", "best_practices", "industry_trends"]
+FRAMEWORKS = ["ADKAR", "Kotter's 8-Step Process", "Lewin's Change Model", "McKinsey 7-S", "Bridges' Transition Model", "Prosci 3-Phase Process", "Kubler-Ross Change Curve", "Nudge Theory"]
+INDUSTRIES = ["logistics", "retail banking", "healthcare", "manufacturing", "telecommunications", "higher education", "public sector", "insurance", "energy", "software"]
+ORGANIZATION_PARTS = ["Northwind", "Contoso", "Fabrikam", "Tailspin", "Woodgrove", "Litware", "Adventure", "Proseware", "Lucerne", "Wingtip"]
+INITIATIVES = ["ERP migration", "cloud adoption", "agile transformation", "merger integration", "hybrid work policy", "CRM rollout", "restructuring", "digital onboarding", "process automation", "culture program"]
+STAKEHOLDERS = ["frontline managers", "the executive sponsor", "middle management", "the works council", "customer service teams", "the finance department", "IT operations", "regional sales leads"]
+CHALLENGES = ["change fatigue", "unclear ownership", "fear of job loss", "low training attendance", "competing priorities", "weak sponsorship", "legacy workarounds", "communication gaps"]
+INTERVENTIONS = ["weekly town halls", "a change champion network", "role-based training paths", "pulse surveys", "sponsor roadmaps", "peer coaching circles", "a resistance management plan", "quick-win celebrations"]
+OUTCOMES = ["adoption reached {pct}% within {months} months", "support tickets dropped by {pct}%", "employee engagement rose by {pct} points", "the go-live slipped by {months} months", "proficiency scores improved by {pct}%"]
+SENTENCES = [
+    "{org} used {framework} to guide its {initiative} in the {industry} sector.",
+    "During the {initiative} at {org}, {stakeholder} raised concerns about {challenge}.",
+    "To address {challenge}, the {org} change team introduced {intervention}.",
+    "{stakeholder} at {org} responded well to {intervention} once the case for change was clear.",
+    "After {months} months of the {initiative}, {outcome} at {org}.",
+    "The {framework} assessment at {org} showed that {challenge} was the main barrier for {stakeholder}.",
+    "Lessons learned at {org}: start {intervention} early and measure {challenge} continuously.",
+    "Leaders at {org} tied the {initiative} to the {industry} market pressures to build awareness.",
+]
+
+def current_rss_mib() -> float:
+    """Get the resident memory of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mib()
+
+def peak_rss_mib() -> float:
+    """Get the peak resident memory of this process in MiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def directory_size_mib(path: Path) -> float:
+    """Get the total size of the files below a directory in MiB"""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file()) / (1024 * 1024)
+
+def generate_paragraph(rng: random.Random, facts: Dict[str, str], min_chars: int) -> str:
+    """
+    Write sentences about one organization until a paragraph is long enough
+
+    Args:
+        rng: Random generator
+        facts: Organization, framework, industry and initiative of the document
+        min_chars: Minimum paragraph length
+
+    Returns:
+        Paragraph text
+    """
+    sentences = []
+    length = 0
+    while length < min_chars:
+        values = dict(
+            facts,
+            stakeholder=rng.choice(STAKEHOLDERS),
+            challenge=rng.choice(CHALLENGES),
+            intervention=rng.choice(INTERVENTIONS),
+            pct=rng.randint(5, 95),
+            months=rng.randint(2, 24),
+        )
+        values["outcome"] = rng.choice(OUTCOMES).format(**values)
+        sentence = rng.choice(SENTENCES).format(**values)
+        sentences.append(sentence[0].upper() + sentence[1:])
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+def generate_corpus(
+    directory: Path,
+    num_chunks: int,
+    chunks_per_document: int,
+    chunk_chars: int,
+    num_queries: int,
+    seed: int
+) -> List[Tuple[str, str]]:
+    """
+    Write a synthetic corpus of text documents into category subdirectories
+
+    Each paragraph is long enough to become one chunk, so the corpus splits
+    into about num_chunks chunks.
+
+    Args:
+        directory: Directory to write the documents to
+        num_chunks: Approximate number of chunks
+        chunks_per_document: Paragraphs per document
+        chunk_chars: Paragraph length in characters
+        num_queries: Number of queries to derive from the documents
+        seed: Random seed
+
+    Returns:
+        List of (query, source path of the document it was taken from)
+    """
+    rng = random.Random(seed)
+    num_documents = max(1, num_chunks // chunks_per_document)
+    query_documents = set(rng.sample(range(num_documents), min(num_queries, num_documents)))
+    queries: List[Tuple[str, str]] = []
+
+    for category in CATEGORIES:
+        (directory / category).mkdir(parents=True, exist_ok=True)
+
+    for number in range(num_documents):
+        facts = {
+            "org": f"{rng.choice(ORGANIZATION_PARTS)} {rng.choice(INDUSTRIES).title()} {number}",
+            "framework": rng.choice(FRAMEWORKS),
+            "industry": rng.choice(INDUSTRIES),
+            "initiative": rng.choice(INITIATIVES),
+        }
+        paragraphs = [generate_paragraph(rng, facts, chunk_chars) for _ in range(chunks_per_document)]
+        file_path = directory / CATEGORIES[number % len(CATEGORIES)] / f"document_{number:07d}.txt"
+        file_path.write_text("\n\n".join(paragraphs))
+
+        if number in query_documents:
+            # Drop the leading words so the query is not an exact substring
+            sentence = rng.choice(rng.choice(paragraphs).split(". "))
+            queries.append((" ".join(sentence.rstrip(".").split()[2:]), str(file_path)))
+
+    rng.shuffle(queries)
+    return queries
+
+def exact_neighbours(kb: Any, query_embeddings: np.ndarray, k: int) -> List[set]:
+    """
+    Find the k nearest stored chunks of each query with an exact float32 search
+
+    Args:
+        kb: Knowledge base to read the stored embeddings from
+        query_embeddings: Matrix of query embeddings
+        k: Number of neighbours
+
+    Returns:
+        Set of chunk IDs for each query
+    """
+    best_ids = [np.empty(0, dtype=object) for _ in query_embeddings]
+    best_distances = [np.empty(0, dtype=np.float32) for _ in query_embeddings]
+    query_norms = np.einsum("ij,ij->i", query_embeddings, query_embeddings)
+
+    for chunk_ids, _, embeddings in kb.backend.iter_chunks(50000, include_embeddings=True):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.einsum("ij,ij->i", vectors, vectors)
+        distances = query_norms[:, None] + norms[None, :] - 2 * (query_embeddings @ vectors.T)
+        ids = np.asarray(chunk_ids, dtype=object)
+        block_k = min(k, len(ids))
+        nearest = np.argpartition(distances, block_k - 1, axis=1)[:, :block_k]
+        for row in range(len(query_embeddings)):
+            merged_distances = np.concatenate([best_distances[row], distances[row, nearest[row]]])
+            merged_ids = np.concatenate([best_ids[row], ids[nearest[row]]])
+            keep = np.argsort(merged_distances, kind="stable")[:k]
+            best_distances[row], best_ids[row] = merged_distances[keep], merged_ids[keep]
+    return [set(ids.tolist()) for ids in best_ids]
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds"""
+    return {
+        "mean_ms": round(float(np.mean(latencies)), 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+async def run_queries(kb: Any, queries: List[str], mode: str, concurrency: int) -> Tuple[List[float], List[List[Any]], float]:
+    """
+    Send queries through the public retrieval API
+
+    Args:
+        kb: Knowledge base
+        queries: Query texts
+        mode: "vector" or "hybrid"
+        concurrency: Number of queries in flight at once
+
+    Returns:
+        Tuple of (latency of each query in ms, documents of each query, wall clock seconds)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = [0.0] * len(queries)
+    results: List[List[Any]] = [[] for _ in queries]
+
+    async def run(position: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            results[position] = await kb.retrieve_relevant_documents(queries[position], mode=mode)
+            latencies[position] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(position) for position in range(len(queries))))
+    return latencies, results, time.perf_counter() - start
+
+async def benchmark(args: argparse.Namespace, work_dir: Path) -> Dict[str, Any]:
+    """
+    Generate the corpus, ingest it and measure retrieval
+
+    Args:
+        args: Parsed command line arguments
+        work_dir: Data directory of the benchmark knowledge base
+
+    Returns:
+        Dictionary of results
+    """
+    # Imported here so the app settings pick up the benchmark data directory
+    from app.services.knowledge_base import KnowledgeBase
+    from app.utils.progress import IngestProgress
+    from app.config import (
+        KNOWLEDGE_BASE_DIR, PROCESSED_DIR, DOCUMENT_CHUNK_SIZE, VECTOR_BACKEND,
+        VECTOR_QUANTIZATION, EMBEDDING_BACKEND, EMBEDDING_MODEL
+    )
+
+    results: Dict[str, Any] = {
+        "settings": {
+            "chunks": args.chunks,
+            "queries": args.queries,
+            "k": args.k,
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "vector_backend": VECTOR_BACKEND,
+            "vector_quantization": VECTOR_QUANTIZATION,
+            "embedding_backend": EMBEDDING_BACKEND,
+            "embedding_model": EMBEDDING_MODEL,
+        }
+    }
+    queries_file = work_dir / "queries.json"
+
+    if args.reuse and queries_file.exists():
+        with open(queries_file) as f:
+            queries = [tuple(pair) for pair in json.load(f)]
+        logger.info(f"Reusing the corpus in {KNOWLEDGE_BASE_DIR}")
+    else:
+        start = time.perf_counter()
+        queries = generate_corpus(
+            KNOWLEDGE_BASE_DIR, args.chunks, args.chunks_per_document,
+            int(DOCUMENT_CHUNK_SIZE * 0.8), args.queries, args.seed
+        )
+        with open(queries_file, 'w') as f:
+            json.dump(queries, f)
+        logger.info(f"Generated corpus of about {args.chunks} chunks in {time.perf_counter() - start:.1f}s")
+
+    rss_before = current_rss_mib()
+    kb = KnowledgeBase()
+    kb.warm_up()
+    results["memory"] = {"model_loaded_rss_mib": round(current_rss_mib(), 1), "baseline_rss_mib": round(rss_before, 1)}
+
+    progress = IngestProgress()
+    start = time.perf_counter()
+    await kb.ingest_directory(KNOWLEDGE_BASE_DIR, workers=args.workers, progress=progress)
+    ingest_seconds = time.perf_counter() - start
+    counters = progress.snapshot()
+    results["ingest"] = {
+        "seconds": round(ingest_seconds, 1),
+        "files": counters["files_parsed"],
+        "chunks": counters["chunks_embedded"],
+        "chunks_per_second": round(counters["chunks_embedded"] / ingest_seconds, 1) if ingest_seconds > 0 else 0.0,
+        "stored_chunks": kb.get_document_count(),
+    }
+    results["memory"]["after_ingest_rss_mib"] = round(current_rss_mib(), 1)
+    results["memory"]["index_on_disk_mib"] = round(directory_size_mib(PROCESSED_DIR), 1)
+    if kb._get_vector_index() is not None:
+        results["memory"]["quantized_index"] = kb._get_vector_index().memory_stats()
+
+    query_texts = [query for query, _ in queries]
+    sources = [source for _, source in queries]
+
+    # Cold pass: every query is new; warm pass: the same queries again, served by the caches
+    for name in ("cold", "warm"):
+        latencies, documents, wall_seconds = await run_queries(kb, query_texts, args.mode, args.concurrency)
+        pass_results = latency_stats(latencies)
+        pass_results["queries_per_second"] = round(len(query_texts) / wall_seconds, 1)
+        if name == "cold":
+            hits = sum(
+                any(doc.metadata.get("source") == source for doc in docs[:args.k])
+                for docs, source in zip(documents, sources)
+            )
+            results["source_hit_rate"] = round(hits / len(sources), 4)
+        results[f"latency_{name}"] = pass_results
+    results["cache"] = kb.get_cache_stats()
+    results["memory"]["after_queries_rss_mib"] = round(current_rss_mib(), 1)
+
+    # Recall of the configured vector search against exact nearest neighbours
+    query_embeddings = np.asarray(kb._embed_queries(query_texts), dtype=np.float32)
+    expected = exact_neighbours(kb, query_embeddings, args.k)
+    found = 0
+    for embedding, neighbours in zip(query_embeddings, expected):
+        hits = kb._vector_search(embedding.tolist(), args.k)
+        found += len({chunk_id for chunk_id, _ in hits}.intersection(neighbours))
+    results[f"recall@{args.k}"] = round(found / max(1, sum(len(neighbours) for neighbours in expected)), 4)
+    results["memory"]["peak_rss_mib"] = round(peak_rss_mib(), 1)
+    return results
+
+def main():
+    """Main entry point for the script"""
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and retrieval on a synthetic corpus")
+    parser.add_argument("--chunks", type=int, default=10000, help="Approximate number of chunks in the corpus (1k to 1M)")
+    parser.add_argument("--chunks-per-document", type=int, default=20, help="Chunks in each synthetic document")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--k", type=int, default=5, help="Number of results compared per query")
+    parser.add_argument("--mode", choices=["vector", "hybrid"], default="vector", help="Retrieval mode")
+    parser.add_argument("--concurrency", type=int, default=1, help="Queries in flight at once")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to parse documents")
+    parser.add_argument("--similarity-threshold", type=float, default=0.0, help="Minimum similarity of retrieved chunks")
+    parser.add_argument("--work-dir", help="Data directory of the benchmark, a temporary directory by default")
+    parser.add_argument("--reuse", action="store_true", help="Reuse the corpus and knowledge base in --work-dir")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kb_benchmark_") as tmp_dir:
+        work_dir = Path(args.work_dir or tmp_dir).resolve()
+        work_dir.mkdir(parents=True, exist_ok=True)
+        # Point the app settings at the benchmark data directory before they are imported
+        os.environ["DATA_DIR"] = str(work_dir)
+        os.environ["SIMILARITY_THRESHOLD"] = str(args.similarity_threshold)
+        os.environ["NUM_DOCS_TO_RETRIEVE"] = str(args.k)
+
+        results = asyncio.run(benchmark(args, work_dir))
+
+    logger.info(f"Settings: {results['settings']}")
+    logger.info(
+        f"Ingest: {results['ingest']['chunks']} chunks from {results['ingest']['files']} files in "
+        f"{results['ingest']['seconds']}s ({results['ingest']['chunks_per_second']} chunks/s)"
+    )
+    for name in ("cold", "warm"):
+        latency = results[f"latency_{name}"]
+        logger.info(
+            f"Latency ({name}): p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, "
+            f"p99 {latency['p99_ms']} ms, {latency['queries_per_second']} queries/s"
+        )
+    logger.info(f"Recall@{args.k} vs exact search: {results[f'recall@{args.k}']}, source hit rate: {results['source_hit_rate']}")
+    logger.info(f"Memory: {results['memory']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
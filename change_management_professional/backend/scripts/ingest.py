@@ -5,6 +5,25 @@ Usage:
     python -m scripts.ingest /path/to/documents  # Ingest specific directory
     python -m scripts.ingest --default           # Ingest default knowledge base directory
     python -m scripts.ingest --sample            # Create and ingest sample documents
+    python -m scripts.ingest --default --workers 4  # Parse documents with 4 processes
+    python -m scripts.ingest --default --full    # Re-ingest every file, even unchanged ones
+    python -m scripts.ingest --default --export-snapshot kb.tar.zst  # Ingest, then write a snapshot
+    python -m scripts.ingest --export-snapshot kb.tar.zst  # Snapshot the current knowledge base
+    python -m scripts.ingest --default --watch   # Ingest, then re-index files as they change
+
+Re-runs are incremental: unchanged files are skipped, modified files have their
+chunks replaced and chunks of deleted files are removed. After changing
+VECTOR_BACKEND or VECTOR_SHARDS, run once with --full to fill the new backend.
+
+With --watch the script keeps running after the ingest and re-indexes only
+the files that are created, modified or deleted in the directory.
+
+Ingests, re-indexes and snapshot exports hold the same ingest lock as the
+API ingestion jobs, so they wait for each other instead of interleaving writes.
+
+A snapshot holds the vector store and every index sidecar in one
+zstd-compressed file. Services started with KB_SNAPSHOT_PATH pointing to it
+restore it at startup instead of ingesting.
 
 This will recursively process all documents in the specified directory.
 """
@@ -14,13 +33,20 @@ import logging
 import asyncio
 import argparse
 from pathlib import Path
+from typing import List
 import os
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from app.services.knowledge_base import KnowledgeBase
-from app.config import KNOWLEDGE_BASE_DIR
+from app.services.snapshot import export_snapshot
+from app.services.kb_watcher import watch_directory
+from app.services.ingest_jobs import ingest_lock
+from app.config import (
+    KNOWLEDGE_BASE_DIR, INGEST_BATCH_SIZE, INGEST_PERSIST_INTERVAL, INGEST_WORKERS,
+    INGEST_MAX_CHUNKS_IN_MEMORY, INGEST_STREAMING_THRESHOLD_BYTES
+)
 
 # Configure logging
 logging.basicConfig(
@@ -29,12 +55,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def ingest_directory(directory_path: str):
+async def ingest_changes(kb: KnowledgeBase, directory: Path, paths: List[Path]):
+    """
+    Re-index changed files while holding the ingest lock, so API jobs and other scripts wait for it
+    
+    Args:
+        kb: Knowledge base to update
+        directory: Watched directory
+        paths: Created, modified and deleted paths
+    """
+    with ingest_lock():
+        return await kb.ingest_changes(directory, paths)
+
+async def ingest_directory(directory_path: str, watch: bool = False, **ingest_options):
     """
     Ingest all documents in the specified directory
     
     Args:
         directory_path: Path to the directory containing documents
+        watch: Keep re-indexing changed files after the ingest
+        ingest_options: Options forwarded to KnowledgeBase.ingest_directory
     """
     kb = KnowledgeBase()
     
@@ -45,13 +85,24 @@ async def ingest_directory(directory_path: str):
     
     logger.info(f"Starting ingestion from directory: {directory_path}")
     
-    total_chunks = await kb.ingest_directory(dir_path)
+    with ingest_lock():
+        total_chunks = await kb.ingest_directory(dir_path, **ingest_options)
     
     logger.info(f"Ingestion complete. Total chunks added: {total_chunks}")
-    logger.info(f"Total documents in knowledge base: {kb.get_document_count()}")
+    stats = kb.get_stats()
+    logger.info(f"Knowledge base holds {stats['total_chunks']} chunks from {stats['total_sources']} documents")
+    
+    if watch:
+        await watch_directory(lambda paths: ingest_changes(kb, dir_path, paths), dir_path)
 
-async def ingest_default_knowledge_base():
-    """Ingest documents from the default knowledge base directory"""
+async def ingest_default_knowledge_base(watch: bool = False, **ingest_options):
+    """
+    Ingest documents from the default knowledge base directory
+    
+    Args:
+        watch: Keep re-indexing changed files after the ingest
+        ingest_options: Options forwarded to KnowledgeBase.ingest_directory
+    """
     if not KNOWLEDGE_BASE_DIR.exists():
         logger.error(f"Default knowledge base directory not found: {KNOWLEDGE_BASE_DIR}")
         return
@@ -59,10 +110,15 @@ async def ingest_default_knowledge_base():
     logger.info(f"Starting ingestion from default knowledge base: {KNOWLEDGE_BASE_DIR}")
     
     kb = KnowledgeBase()
-    total_chunks = await kb.ingest_directory(KNOWLEDGE_BASE_DIR)
+    with ingest_lock():
+        total_chunks = await kb.ingest_directory(KNOWLEDGE_BASE_DIR, **ingest_options)
     
     logger.info(f"Ingestion complete. Total chunks added: {total_chunks}")
-    logger.info(f"Total documents in knowledge base: {kb.get_document_count()}")
+    stats = kb.get_stats()
+    logger.info(f"Knowledge base holds {stats['total_chunks']} chunks from {stats['total_sources']} documents")
+    
+    if watch:
+        await watch_directory(lambda paths: ingest_changes(kb, KNOWLEDGE_BASE_DIR, paths), KNOWLEDGE_BASE_DIR)
 
 def add_sample_documents():
     """Add sample documents to the knowledge base directory"""
@@ -635,26 +691,52 @@ async def main():
     parser = argparse.ArgumentParser(description="Ingest documents into the knowledge base")
     
     # Create mutually exclusive group for command-line arguments
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("--default", action="store_true", help="Ingest documents from the default knowledge base directory")
     group.add_argument("--sample", action="store_true", help="Create and ingest sample documents")
     group.add_argument("directory", nargs="?", help="Directory containing documents to ingest")
     
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Number of chunks embedded and written per batch")
+    parser.add_argument("--persist-interval", type=int, default=INGEST_PERSIST_INTERVAL, help="Batches between persist checkpoints (0 = only at the end)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Number of processes used to parse documents in parallel")
+    parser.add_argument("--full", action="store_true", help="Re-ingest all files instead of only new and modified ones")
+    parser.add_argument("--max-chunks-in-memory", type=int, default=INGEST_MAX_CHUNKS_IN_MEMORY, help="Upper bound on chunks buffered before embedding")
+    parser.add_argument("--streaming-threshold-mb", type=float, default=INGEST_STREAMING_THRESHOLD_BYTES / (1024 * 1024), help="Files at least this large are loaded page by page")
+    parser.add_argument("--watch", action="store_true", help="Keep running and re-index files as they are created, modified or deleted")
+    parser.add_argument("--export-snapshot", metavar="PATH", help="Write a snapshot of the knowledge base after ingesting")
+    parser.add_argument("--snapshot-level", type=int, default=10, help="zstd compression level of the snapshot")
+    
     args = parser.parse_args()
+    if args.watch and args.export_snapshot:
+        parser.error("--watch keeps running, so it cannot be combined with --export-snapshot")
+    ingest_options = {
+        "batch_size": args.batch_size,
+        "persist_interval": args.persist_interval,
+        "workers": args.workers,
+        "incremental": not args.full,
+        "max_chunks_in_memory": args.max_chunks_in_memory,
+        "streaming_threshold_bytes": int(args.streaming_threshold_mb * 1024 * 1024)
+    }
     
     if args.sample:
         logger.info("Creating sample documents...")
         add_sample_documents()
         logger.info("Ingesting sample documents...")
-        await ingest_default_knowledge_base()
+        await ingest_default_knowledge_base(watch=args.watch, **ingest_options)
     elif args.default:
         logger.info("Ingesting documents from default knowledge base...")
-        await ingest_default_knowledge_base()
+        await ingest_default_knowledge_base(watch=args.watch, **ingest_options)
     elif args.directory:
         logger.info(f"Ingesting documents from {args.directory}...")
-        await ingest_directory(args.directory)
-    else:
+        await ingest_directory(args.directory, watch=args.watch, **ingest_options)
+    elif not args.export_snapshot:
         parser.print_help()
+    
+    if args.export_snapshot:
+        logger.info(f"Exporting knowledge base snapshot to {args.export_snapshot}...")
+        # Waits for running ingestion jobs, so the snapshot never holds a half-written index
+        with ingest_lock():
+            export_snapshot(Path(args.export_snapshot), level=args.snapshot_level)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
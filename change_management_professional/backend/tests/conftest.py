@@ -0,0 +1,32 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# app.config creates its data directories on import, keep them out of the repository
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="kb-tests-"))
+os.environ.setdefault("VECTOR_BACKEND", "numpy")
+os.environ.setdefault("KB_WATCH_DEBOUNCE_MS", "3000")
+os.environ.setdefault("KB_WATCH_QUIET_MS", "300")
+
+# Fake embeddings in this process and, through sitecustomize, in the processes it spawns
+FAKE_SITE_DIR = Path(__file__).resolve().parent / "fake_site"
+sys.path.insert(0, str(FAKE_SITE_DIR))
+os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [str(FAKE_SITE_DIR), os.environ.get("PYTHONPATH")]))
+from fake_embeddings import install
+
+install()
+
+from app.config import PROCESSED_DIR, KB_INDEX_DIR
+
+@pytest.fixture
+def knowledge_base():
+    """A knowledge base over empty indexes, they live in the process-wide PROCESSED_DIR"""
+    shutil.rmtree(PROCESSED_DIR, ignore_errors=True)
+    KB_INDEX_DIR.mkdir(parents=True)
+    from app.services.knowledge_base import KnowledgeBase
+
+    return KnowledgeBase()
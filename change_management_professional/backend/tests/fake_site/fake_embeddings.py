@@ -0,0 +1,38 @@
+"""
+Deterministic stand-in for the sentence-transformers model, so integration tests need no model download
+"""
+
+import hashlib
+from typing import Any, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Dimensions of the hashed bag-of-words vectors
+DIMENSIONS = 64
+
+
+class FakeEmbeddings(Embeddings):
+    """Normalized bag-of-words vectors, texts sharing words are close"""
+
+    def __init__(self, **kwargs: Any):
+        pass
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(DIMENSIONS)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % DIMENSIONS] += 1
+        return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def install() -> None:
+    """Replace the model class the knowledge base imports, must run before app.services.knowledge_base is imported"""
+    import langchain_community.embeddings
+
+    langchain_community.embeddings.HuggingFaceEmbeddings = FakeEmbeddings
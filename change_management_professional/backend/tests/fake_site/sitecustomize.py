@@ -0,0 +1,7 @@
+"""
+Installs the fake embedding model in processes the tests spawn, such as ingestion jobs
+"""
+
+from fake_embeddings import install
+
+install()
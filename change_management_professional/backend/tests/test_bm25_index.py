@@ -0,0 +1,61 @@
+from app.services.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+ADKAR_TEXT = "ADKAR stands for awareness desire knowledge ability reinforcement"
+
+def _index(tmp_path):
+    index = BM25Index(tmp_path / "bm25.json")
+    index.add("adkar", ADKAR_TEXT, "frameworks")
+    index.add("kotter", "Kotter describes eight steps starting with urgency", "frameworks")
+    index.add("case", "The rollout case study used ADKAR to measure awareness", "cases")
+    return index
+
+def test_search_ranks_matching_chunks(tmp_path):
+    index = _index(tmp_path)
+    hits = index.search("ADKAR awareness", 5)
+    assert {chunk_id for chunk_id, _ in hits} == {"adkar", "case"}
+    assert hits[0][1] >= hits[1][1]
+    assert [chunk_id for chunk_id, _ in index.search("ADKAR", 5, categories=["cases"])] == ["case"]
+
+def test_remove_drops_postings_and_lengths(tmp_path):
+    index = _index(tmp_path)
+    total_length = index.total_length
+    index.remove(["adkar", "unknown"])
+
+    assert len(index) == 2
+    assert index.total_length == total_length - len(tokenize(ADKAR_TEXT))
+    assert "reinforcement" not in index.postings
+    assert "adkar" not in index.doc_categories
+    assert [chunk_id for chunk_id, _ in index.search("ADKAR", 5)] == ["case"]
+
+def test_add_replaces_a_chunk_with_the_same_id(tmp_path):
+    index = _index(tmp_path)
+    index.add("kotter", "Lewin unfreeze change refreeze", "frameworks")
+
+    assert len(index) == 3
+    assert index.search("urgency", 5) == []
+    assert [chunk_id for chunk_id, _ in index.search("refreeze", 5)] == ["kotter"]
+
+def test_save_and_reload(tmp_path):
+    index = _index(tmp_path)
+    index.save()
+    loaded = BM25Index(tmp_path / "bm25.json")
+    assert loaded.total_length == index.total_length
+    assert loaded.search("urgency", 5) == index.search("urgency", 5)
+
+def test_reciprocal_rank_fusion_rewards_items_in_both_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+    assert [item_id for item_id, _ in fused] == ["c", "a", "b", "d"]
+    assert fused[0][1] == 1 / 63 + 1 / 61
+
+def test_reciprocal_rank_fusion_of_one_ranking_keeps_its_order():
+    assert [item_id for item_id, _ in reciprocal_rank_fusion([["x", "y", "z"]])] == ["x", "y", "z"]
+    assert reciprocal_rank_fusion([]) == []
+
+def test_remove_after_reload_uses_rebuilt_terms(tmp_path):
+    _index(tmp_path).save()
+    loaded = BM25Index(tmp_path / "bm25.json")
+    loaded.remove(["adkar"])
+
+    assert "reinforcement" not in loaded.postings
+    assert "adkar" not in loaded.postings["awareness"]
+    assert [chunk_id for chunk_id, _ in loaded.search("ADKAR", 5)] == ["case"]
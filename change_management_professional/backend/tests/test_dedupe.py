@@ -0,0 +1,80 @@
+import json
+import asyncio
+
+from app.services.dedupe import NearDuplicateIndex, simhash, hamming_distance
+
+TEXT = (
+    "Change management is the discipline that guides how we prepare, equip and support "
+    "individuals to successfully adopt change in order to drive organizational success"
+)
+
+def test_simhash_is_close_for_near_duplicates():
+    edited = TEXT.replace("organizational success", "organizational success and outcomes")
+    unrelated = "Kotter's eight steps start with creating a sense of urgency around an opportunity"
+    assert simhash(TEXT) == simhash(TEXT)
+    assert hamming_distance(simhash(TEXT), simhash(edited)) < hamming_distance(simhash(TEXT), simhash(unrelated))
+
+def test_find_matches_within_max_distance_and_category(tmp_path):
+    index = NearDuplicateIndex(3, tmp_path / "dedupe.json")
+    index.add("a", 0b1011 << 40, "frameworks", ["doc1"])
+    assert index.find((0b1011 << 40) ^ 0b111, "frameworks") == "a"
+    # Four flipped bits, one in each band, share no band with the stored fingerprint
+    assert index.find((0b1011 << 40) ^ (1 | 1 << 16 | 1 << 32 | 1 << 48), "frameworks") is None
+    assert index.find(0b1011 << 40, "cases") is None
+
+def test_max_distance_is_capped_by_the_bands(tmp_path):
+    assert NearDuplicateIndex(10, tmp_path / "dedupe.json").max_distance == 3
+
+def test_release_keeps_chunks_referenced_by_other_sources(tmp_path):
+    index = NearDuplicateIndex(3, tmp_path / "dedupe.json")
+    index.add("shared", 1, "cases", ["doc1"])
+    # Differs from the shared chunk in every band
+    index.add("own", (1 << 64) - 1, "cases", ["doc1"])
+    assert index.add_reference("shared", "doc2")
+    assert not index.add_reference("shared", "doc2")
+
+    orphaned, changed = index.release("doc1", ["shared", "own", "legacy"])
+    assert sorted(orphaned) == ["legacy", "own"]
+    assert changed == ["shared"]
+    assert index.references["shared"] == ["doc2"]
+    assert index.find((1 << 64) - 1, "cases") is None
+
+    orphaned, changed = index.release("doc2", ["shared"])
+    assert orphaned == ["shared"] and changed == []
+    assert len(index) == 0 and not index._bands
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / "dedupe.json"
+    index = NearDuplicateIndex(3, path)
+    fingerprint = simhash(TEXT)
+    index.add("a", fingerprint, "frameworks", ["doc1", "doc2"])
+    index.save()
+
+    loaded = NearDuplicateIndex(3, path)
+    assert loaded.exists
+    assert loaded.find(fingerprint, "frameworks") == "a"
+    assert loaded.references["a"] == ["doc1", "doc2"]
+
+def test_ingest_stores_duplicate_chunks_once_and_hands_them_over(knowledge_base, tmp_path):
+    first = tmp_path / "frameworks" / "first.txt"
+    second = tmp_path / "frameworks" / "second.txt"
+    other_category = tmp_path / "cases" / "copy.txt"
+    for path in (first, second, other_category):
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(TEXT)
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+
+    # Duplicates are only collapsed within a category
+    assert knowledge_base.backend.count() == 2
+    # Directory order decides which copy is stored
+    stored, duplicate = (first, second) if knowledge_base.backend.ids_for_source(str(first)) else (second, first)
+    chunk_id, = knowledge_base.backend.ids_for_source(str(stored))
+    metadata = knowledge_base.backend.get_documents([chunk_id])[chunk_id].metadata
+    assert json.loads(metadata["duplicate_sources"]) == [str(duplicate)]
+
+    stored.unlink()
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+    assert knowledge_base.backend.count() == 2
+    assert knowledge_base.backend.ids_for_source(str(duplicate)) == [chunk_id]
+    metadata = knowledge_base.backend.get_documents([chunk_id])[chunk_id].metadata
+    assert json.loads(metadata["duplicate_sources"]) == []
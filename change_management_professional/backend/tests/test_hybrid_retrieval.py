@@ -0,0 +1,32 @@
+import asyncio
+
+ADKAR_TEXT = "ADKAR stands for awareness desire knowledge ability and reinforcement of individual change."
+RESISTANCE_TEXT = "resistance to change"
+
+def _ingest(knowledge_base, directory):
+    (directory / "frameworks").mkdir()
+    (directory / "frameworks" / "adkar.txt").write_text(ADKAR_TEXT)
+    (directory / "frameworks" / "resistance.txt").write_text(RESISTANCE_TEXT)
+    asyncio.run(knowledge_base.ingest_directory(directory))
+
+def test_hybrid_mode_surfaces_exact_term_matches_the_vector_search_misses(knowledge_base, tmp_path):
+    _ingest(knowledge_base, tmp_path)
+
+    assert knowledge_base._search("ADKAR", "vector") == []
+    assert [doc.page_content for doc in knowledge_base._search("ADKAR", "hybrid")] == [ADKAR_TEXT]
+
+def test_hybrid_mode_ranks_chunks_found_by_both_searches_first(knowledge_base, tmp_path):
+    _ingest(knowledge_base, tmp_path)
+
+    assert [doc.page_content for doc in knowledge_base._search("resistance to change", "vector")] == [RESISTANCE_TEXT]
+    hybrid = [doc.page_content for doc in knowledge_base._search("resistance to change", "hybrid")]
+    assert hybrid == [RESISTANCE_TEXT, ADKAR_TEXT]
+
+def test_hybrid_retrieval_filters_categories(knowledge_base, tmp_path):
+    _ingest(knowledge_base, tmp_path)
+    (tmp_path / "cases").mkdir()
+    (tmp_path / "cases" / "rollout.txt").write_text("The rollout case study measured ADKAR awareness in every team.")
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+
+    docs = asyncio.run(knowledge_base.retrieve_relevant_documents("ADKAR", mode="hybrid", categories=["cases"]))
+    assert [doc.metadata["category"] for doc in docs] == ["cases"]
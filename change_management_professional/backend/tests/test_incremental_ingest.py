@@ -0,0 +1,50 @@
+import asyncio
+
+from app.services.ingest_manifest import IngestManifest
+
+ADKAR_TEXT = "ADKAR stands for awareness desire knowledge ability and reinforcement of individual change."
+KOTTER_TEXT = "Kotter describes eight steps that start with creating a sense of urgency for the change."
+LEWIN_TEXT = "Lewin models change as unfreezing the current state, changing it and refreezing the result."
+
+def _write_documents(directory):
+    (directory / "frameworks").mkdir()
+    (directory / "frameworks" / "adkar.txt").write_text(ADKAR_TEXT)
+    (directory / "frameworks" / "kotter.txt").write_text(KOTTER_TEXT)
+    return directory / "frameworks" / "adkar.txt", directory / "frameworks" / "kotter.txt"
+
+def test_reingest_skips_unchanged_files(knowledge_base, tmp_path):
+    _write_documents(tmp_path)
+    assert asyncio.run(knowledge_base.ingest_directory(tmp_path)) == 2
+    assert asyncio.run(knowledge_base.ingest_directory(tmp_path)) == 0
+    assert knowledge_base.backend.count() == 2
+
+def test_reingest_replaces_the_chunks_of_modified_files(knowledge_base, tmp_path):
+    adkar, kotter = _write_documents(tmp_path)
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+    old_ids = IngestManifest().get(str(adkar))["chunk_ids"]
+
+    adkar.write_text(LEWIN_TEXT)
+    assert asyncio.run(knowledge_base.ingest_directory(tmp_path)) == 1
+
+    manifest = IngestManifest()
+    new_ids = manifest.get(str(adkar))["chunk_ids"]
+    assert new_ids != old_ids
+    assert knowledge_base.backend.count() == 2
+    assert knowledge_base.backend.get_documents(old_ids) == {}
+    assert [doc.page_content for doc in knowledge_base.backend.get_documents(new_ids).values()] == [LEWIN_TEXT]
+    assert manifest.get(str(kotter)) is not None
+
+def test_reingest_deletes_the_chunks_of_removed_files(knowledge_base, tmp_path):
+    adkar, kotter = _write_documents(tmp_path)
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+    adkar_ids = IngestManifest().get(str(adkar))["chunk_ids"]
+
+    adkar.unlink()
+    asyncio.run(knowledge_base.ingest_directory(tmp_path))
+
+    assert IngestManifest().get(str(adkar)) is None
+    assert knowledge_base.backend.count() == 1
+    assert knowledge_base.backend.get_documents(adkar_ids) == {}
+    assert knowledge_base.backend.ids_for_source(str(kotter))
+    assert knowledge_base.bm25_index.search("ADKAR awareness", 5) == []
+    assert knowledge_base.get_stats()["total_sources"] == 1
@@ -0,0 +1,70 @@
+import sys
+import time
+import subprocess
+
+import pytest
+
+from app.services import ingest_jobs
+from app.services.ingest_jobs import IngestJob, IngestJobManager, IngestJobRegistry, IngestQueueFull
+
+# Seconds a spawned job gets to import the app and ingest two small files
+JOB_TIMEOUT_SECONDS = 120
+
+def _wait_finished(registry, job_id):
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        state = registry.get(job_id)
+        if state["status"] in ("completed", "failed"):
+            return state
+        time.sleep(0.2)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_job_runs_in_a_process_and_is_visible_to_other_workers(knowledge_base, tmp_path):
+    (tmp_path / "docs" / "frameworks").mkdir(parents=True)
+    (tmp_path / "docs" / "frameworks" / "adkar.txt").write_text("ADKAR stands for awareness desire knowledge ability reinforcement")
+    (tmp_path / "docs" / "frameworks" / "kotter.txt").write_text("Kotter describes eight steps starting with urgency")
+    manager = IngestJobManager(max_queue=2, history=5, registry=IngestJobRegistry(tmp_path / "jobs.sqlite3"))
+    try:
+        job = manager.submit(IngestJob("directory", str(tmp_path / "docs")))
+        # A second registry on the same database stands in for another API worker
+        state = _wait_finished(IngestJobRegistry(tmp_path / "jobs.sqlite3"), job.id)
+    finally:
+        manager.shutdown()
+
+    assert state["status"] == "completed", state["error"]
+    assert state["chunks_added"] == 2
+    assert state["started_at"] <= state["finished_at"]
+    assert state["progress"]["files_parsed"] == 2
+    # The serving process reloads the store written by the job process
+    assert knowledge_base._get_backend().count() == 2
+
+def test_queue_limit_counts_the_jobs_of_all_workers(tmp_path):
+    IngestJobRegistry(tmp_path / "jobs.sqlite3").submit(IngestJob("directory", "/docs"), max_queue=1, history=5)
+    with pytest.raises(IngestQueueFull):
+        IngestJobRegistry(tmp_path / "jobs.sqlite3").submit(IngestJob("directory", "/docs"), max_queue=1, history=5)
+
+def test_jobs_of_exited_workers_are_reported_as_failed(tmp_path, monkeypatch):
+    exited = subprocess.Popen([sys.executable, "-c", ""])
+    exited.wait()
+    registry = IngestJobRegistry(tmp_path / "jobs.sqlite3")
+    job = IngestJob("directory", "/docs")
+    monkeypatch.setattr(ingest_jobs.os, "getpid", lambda: exited.pid)
+    registry.submit(job, max_queue=1, history=5)
+    monkeypatch.undo()
+
+    state = registry.get(job.id)
+    assert state["status"] == "failed"
+    assert "exited" in state["error"]
+    # The failed job no longer takes a queue slot
+    registry.submit(IngestJob("directory", "/docs"), max_queue=1, history=5)
+
+def test_finished_jobs_beyond_the_history_are_forgotten(tmp_path):
+    registry = IngestJobRegistry(tmp_path / "jobs.sqlite3")
+    jobs = [IngestJob("directory", "/docs") for _ in range(3)]
+    for job in jobs:
+        registry.submit(job, max_queue=5, history=1)
+        job.status = "completed"
+        registry.update(job)
+    registry.submit(IngestJob("directory", "/docs"), max_queue=5, history=1)
+
+    assert [state["job_id"] for state in registry.list_jobs()][1:] == [jobs[-1].id]
@@ -0,0 +1,54 @@
+from app.services.kb_stats import KnowledgeBaseStats
+
+def test_reingest_replaces_the_counts_of_a_source(tmp_path):
+    stats = KnowledgeBaseStats(tmp_path / "stats.json")
+    stats.add_source("a.pdf", "frameworks", chunks=10, size_bytes=1000)
+    stats.add_source("b.pdf", "cases", chunks=5, size_bytes=500, duplicates=2)
+    stats.add_source("a.pdf", "frameworks", chunks=4, size_bytes=400)
+
+    summary = stats.summary()
+    assert summary["total_chunks"] == 9
+    assert summary["total_sources"] == 2
+    assert summary["bytes_indexed"] == 900
+    assert summary["duplicates_collapsed"] == 2
+    assert summary["categories"]["frameworks"] == {"sources": 1, "chunks": 4, "bytes": 400}
+
+def test_remove_source_drops_empty_categories(tmp_path):
+    stats = KnowledgeBaseStats(tmp_path / "stats.json")
+    stats.add_source("a.pdf", "frameworks", chunks=10, size_bytes=1000, duplicates=1)
+    stats.add_source("b.pdf", "cases", chunks=5, size_bytes=500)
+    stats.remove_source("a.pdf")
+    stats.remove_source("missing.pdf")
+
+    summary = stats.summary()
+    assert summary["total_chunks"] == 5
+    assert summary["duplicates_collapsed"] == 0
+    assert list(summary["categories"]) == ["cases"]
+
+def test_transfer_moves_a_duplicate_to_its_new_owner(tmp_path):
+    stats = KnowledgeBaseStats(tmp_path / "stats.json")
+    stats.add_source("b.pdf", "cases", chunks=3, size_bytes=300, duplicates=1)
+    # The owner of the shared chunk was deleted, b.pdf now stores it
+    stats.transfer("b.pdf", 100)
+    assert stats.sources["b.pdf"] == {"category": "cases", "chunks": 4, "bytes": 400, "duplicates": 0}
+    assert stats.summary()["duplicates_collapsed"] == 0
+
+def test_transfer_to_a_source_being_ingested_is_applied_when_it_is_recorded(tmp_path):
+    stats = KnowledgeBaseStats(tmp_path / "stats.json")
+    stats.transfer("c.pdf", 100)
+    assert stats.summary()["total_chunks"] == 0
+
+    stats.add_source("c.pdf", "cases", chunks=2, size_bytes=200, duplicates=1)
+    assert stats.sources["c.pdf"] == {"category": "cases", "chunks": 3, "bytes": 300, "duplicates": 0}
+    assert stats.summary()["total_chunks"] == 3
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = KnowledgeBaseStats(path)
+    stats.add_source("a.pdf", "frameworks", chunks=10, size_bytes=1000, duplicates=2)
+    stats.save()
+
+    loaded = KnowledgeBaseStats(path)
+    assert loaded.exists
+    assert loaded.summary()["total_chunks"] == 10
+    assert loaded.summary()["duplicates_collapsed"] == 2
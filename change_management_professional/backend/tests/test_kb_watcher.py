@@ -0,0 +1,44 @@
+import asyncio
+
+from app.services.kb_watcher import watch_directory
+
+# Seconds the watcher gets to start before files are written, and to deliver the grouped events
+START_SECONDS = 1.0
+TIMEOUT_SECONDS = 15.0
+
+def _watch(directory, on_batch):
+    """Watch a directory until on_batch returns True, collecting the batches of changed file names"""
+    batches = []
+
+    async def main():
+        stop_event = asyncio.Event()
+
+        async def reindex(paths):
+            batches.append(sorted(path.name for path in paths))
+            if await on_batch(len(batches)):
+                stop_event.set()
+
+        watch = asyncio.create_task(watch_directory(reindex, directory, stop_event))
+        await asyncio.sleep(START_SECONDS)
+        for name in ("adkar.txt", "kotter.txt", ".adkar.txt.swp", "lewin.txt"):
+            (directory / name).write_text(name)
+            await asyncio.sleep(0.05)
+        await asyncio.wait_for(watch, TIMEOUT_SECONDS)
+
+    asyncio.run(main())
+    return batches
+
+def test_changes_in_quick_succession_are_reindexed_together(tmp_path):
+    async def on_batch(count):
+        return True
+
+    assert _watch(tmp_path, on_batch) == [["adkar.txt", "kotter.txt", "lewin.txt"]]
+
+def test_changes_made_during_a_reindex_are_handed_to_the_next_one(tmp_path):
+    async def on_batch(count):
+        if count == 1:
+            (tmp_path / "adkar.txt").write_text("ADKAR stands for awareness desire knowledge ability reinforcement")
+            await asyncio.sleep(0.5)
+        return count == 2
+
+    assert _watch(tmp_path, on_batch) == [["adkar.txt", "kotter.txt", "lewin.txt"], ["adkar.txt"]]
@@ -0,0 +1,21 @@
+from app.services.llm_service import strip_overlap
+
+START = "Change management helps people move from the current state to the desired future state. "
+MIDDLE = "Resistance is expected and should be planned for with sponsors and coaching. "
+END = "Reinforcement makes the change stick once the project team has moved on. "
+
+def test_strip_overlap_removes_a_contained_chunk():
+    assert strip_overlap(MIDDLE.strip(), [START + MIDDLE + END]) == ""
+
+def test_strip_overlap_removes_the_end_of_a_kept_chunk():
+    assert strip_overlap(MIDDLE + END, [START + MIDDLE]) == END.strip()
+
+def test_strip_overlap_removes_the_start_of_a_kept_chunk():
+    assert strip_overlap(START + MIDDLE, [MIDDLE + END]) == START.strip()
+
+def test_strip_overlap_ignores_short_coincidental_matches():
+    text = "Sponsors matter. " + END
+    assert strip_overlap(text, ["Unrelated text ending with Sponsors matter. "]) == text.strip()
+
+def test_strip_overlap_without_kept_chunks_returns_the_text():
+    assert strip_overlap(f"  {MIDDLE}", []) == MIDDLE.strip()
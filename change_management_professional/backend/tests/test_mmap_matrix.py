@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from app.utils.mmap_matrix import MmapMatrix
+
+def _rows(start, count, dim=4):
+    return np.arange(start * dim, (start + count) * dim, dtype=np.float32).reshape(count, dim)
+
+def _saved_matrix(path, rows):
+    matrix = MmapMatrix(path)
+    matrix.append(_rows(0, rows))
+    matrix.save(np.arange(rows))
+    return matrix
+
+def test_block_spans_disk_and_pending_rows(tmp_path):
+    matrix = _saved_matrix(tmp_path / "vectors.npy", 3)
+    matrix.append(_rows(3, 2))
+
+    np.testing.assert_array_equal(matrix.block(1, 5), _rows(1, 4))
+    np.testing.assert_array_equal(matrix.block(0, 2), _rows(0, 2))
+    np.testing.assert_array_equal(matrix.block(4, 5), _rows(4, 1))
+
+def test_block_clamps_the_end_without_pending_rows(tmp_path):
+    matrix = _saved_matrix(tmp_path / "vectors.npy", 3)
+    np.testing.assert_array_equal(matrix.block(0, 65536), _rows(0, 3))
+    assert MmapMatrix(tmp_path / "missing.npy").block(0, 10).shape[0] == 0
+
+def test_take_mixes_disk_and_pending_rows(tmp_path):
+    matrix = _saved_matrix(tmp_path / "vectors.npy", 3)
+    matrix.append(_rows(3, 2))
+    np.testing.assert_array_equal(matrix.take(np.array([4, 0, 2])), _rows(0, 5)[[4, 0, 2]])
+
+def test_save_appends_in_place_when_every_row_is_kept(tmp_path):
+    path = tmp_path / "vectors.npy"
+    matrix = _saved_matrix(path, 3)
+    inode = os.stat(path).st_ino
+
+    matrix.append(_rows(3, 2))
+    matrix.save(np.arange(5))
+    assert os.stat(path).st_ino == inode
+    np.testing.assert_array_equal(np.load(path), _rows(0, 5))
+    np.testing.assert_array_equal(matrix.block(0, 5), _rows(0, 5))
+
+def test_save_rewrites_without_dropped_rows(tmp_path):
+    path = tmp_path / "vectors.npy"
+    matrix = _saved_matrix(path, 3)
+    matrix.append(_rows(3, 2))
+
+    keep = np.array([0, 2, 4])
+    matrix.save(keep)
+    assert len(matrix) == 3
+    np.testing.assert_array_equal(np.load(path), _rows(0, 5)[keep])
+
+def test_rows_beyond_the_limit_are_ignored_and_overwritten(tmp_path):
+    path = tmp_path / "vectors.npy"
+    _saved_matrix(path, 4)
+
+    # The sidecar of an interrupted checkpoint only lists three rows
+    matrix = MmapMatrix(path, rows=3)
+    assert len(matrix) == 3
+    matrix.append(_rows(10, 1))
+    matrix.save(np.arange(4))
+    np.testing.assert_array_equal(np.load(path), np.concatenate([_rows(0, 3), _rows(10, 1)]))
+
+def test_snapshot_is_unaffected_by_later_appends_and_rewrites(tmp_path):
+    matrix = _saved_matrix(tmp_path / "vectors.npy", 3)
+    matrix.append(_rows(3, 1))
+    snapshot = matrix.snapshot()
+
+    matrix.append(_rows(4, 1))
+    matrix.save(np.array([1, 3]))
+    assert len(snapshot) == 4
+    np.testing.assert_array_equal(snapshot.block(0, 4), _rows(0, 4))
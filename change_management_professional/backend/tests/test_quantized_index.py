@@ -0,0 +1,73 @@
+import json
+import os
+
+import numpy as np
+
+from app.services.quantized_index import QuantizedVectorIndex
+
+def _vectors(count, seed, dim=8):
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+def _index(path, dtype="int8"):
+    index = QuantizedVectorIndex(dtype, path)
+    index.add([f"c{i}" for i in range(4)], _vectors(4, 0), ["frameworks", "cases", None, "cases"])
+    return index
+
+def test_search_rescores_exactly_and_filters_categories(tmp_path):
+    index = _index(tmp_path)
+    vectors = _vectors(4, 0)
+
+    hits = index.search(vectors[2].tolist(), 2, 4)
+    assert hits[0][0] == "c2"
+    assert abs(hits[0][1]) < 1e-5
+    assert {chunk_id for chunk_id, _ in index.search(vectors[2].tolist(), 4, 4, categories=["cases"])} == {"c1", "c3"}
+
+def test_save_appends_new_vectors_in_place(tmp_path):
+    index = _index(tmp_path)
+    index.save()
+    inodes = {name: os.stat(tmp_path / name).st_ino for name in ("ids.jsonl", "codes.bin", "norms.bin")}
+
+    index.add(["c4"], _vectors(1, 1), ["cases"])
+    index.save()
+    assert {name: os.stat(tmp_path / name).st_ino for name in inodes} == inodes
+
+    loaded = QuantizedVectorIndex("int8", tmp_path)
+    assert loaded.ids == [f"c{i}" for i in range(5)]
+    np.testing.assert_array_equal(loaded.codes, index.codes)
+    assert loaded.search(_vectors(1, 1)[0].tolist(), 1, 4) == [("c4", index.search(_vectors(1, 1)[0].tolist(), 1, 4)[0][1])]
+
+def test_save_rewrites_without_removed_vectors(tmp_path):
+    index = _index(tmp_path)
+    index.save()
+    index.remove(["c1"])
+    index.save()
+
+    loaded = QuantizedVectorIndex("int8", tmp_path)
+    assert loaded.ids == ["c0", "c2", "c3"]
+    assert [loaded.category_names[code] for code in loaded.categories] == ["frameworks", "general", "cases"]
+
+def test_rows_after_a_torn_sidecar_line_are_ignored(tmp_path):
+    index = _index(tmp_path)
+    index.save()
+    with open(tmp_path / "ids.jsonl", 'ab') as f:
+        f.write(b'{"id":"c9","cat')
+
+    loaded = QuantizedVectorIndex("int8", tmp_path)
+    assert len(loaded) == 4
+    loaded.add(["c4"], _vectors(1, 1), ["cases"])
+    loaded.save()
+    assert QuantizedVectorIndex("int8", tmp_path).ids == [f"c{i}" for i in range(5)]
+
+def test_legacy_index_is_requantized_and_converted(tmp_path):
+    index = _index(tmp_path, "float16")
+    index.full.save(np.arange(4))
+    np.save(tmp_path / "norms.npy", index.norms)
+    np.save(tmp_path / "codes.npy", index.codes)
+    with open(tmp_path / "ids.json", 'w') as f:
+        json.dump({"dtype": "float16", "ids": index.ids, "category_names": index.category_names, "categories": index.categories.tolist()}, f)
+
+    loaded = QuantizedVectorIndex("int8", tmp_path)
+    assert loaded.codes.dtype == np.int8
+    loaded.save()
+    assert not (tmp_path / "ids.json").exists()
+    assert QuantizedVectorIndex("int8", tmp_path).ids == index.ids
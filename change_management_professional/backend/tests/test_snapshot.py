@@ -0,0 +1,38 @@
+import asyncio
+
+from app.config import KB_GENERATION_FILE
+from app.services.knowledge_base import KnowledgeBase
+from app.services.snapshot import export_snapshot, restore_snapshot
+
+def _generation():
+    return int(KB_GENERATION_FILE.read_text())
+
+def test_restore_brings_back_the_exported_indexes(knowledge_base, tmp_path):
+    docs = tmp_path / "docs" / "frameworks"
+    docs.mkdir(parents=True)
+    (docs / "adkar.txt").write_text("ADKAR stands for awareness desire knowledge ability reinforcement")
+    (docs / "kotter.txt").write_text("Kotter describes eight steps starting with urgency")
+    asyncio.run(knowledge_base.ingest_directory(tmp_path / "docs"))
+    exported_results = [doc.page_content for doc in knowledge_base._search("ADKAR urgency", "hybrid")]
+    snapshot = tmp_path / "kb.tar.zst"
+    export_snapshot(snapshot, level=1)
+
+    (docs / "lewin.txt").write_text("Lewin models change as unfreeze, change and refreeze")
+    asyncio.run(knowledge_base.ingest_directory(tmp_path / "docs"))
+    assert knowledge_base.backend.count() == 3
+    generation = _generation()
+
+    assert restore_snapshot(snapshot, force=True)
+    # Above every generation seen before, so running processes drop their cached results
+    assert _generation() > generation
+    assert KnowledgeBase().backend.count() == 2
+    assert knowledge_base._get_backend().count() == 2
+    assert [doc.page_content for doc in knowledge_base._search("ADKAR urgency", "hybrid")] == exported_results
+    assert knowledge_base._get_bm25_index().search("refreeze", 5) == []
+
+def test_restoring_the_same_snapshot_again_is_skipped(knowledge_base, tmp_path):
+    snapshot = tmp_path / "kb.tar.zst"
+    export_snapshot(snapshot, level=1)
+
+    assert restore_snapshot(snapshot)
+    assert not restore_snapshot(snapshot)
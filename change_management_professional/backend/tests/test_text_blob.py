@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from app.utils.text_blob import TextBlob
+
+def test_appended_rows_are_readable_before_and_after_save(tmp_path):
+    blob = TextBlob(tmp_path / "texts.bin")
+    blob.append(["first", "zweite Zeile é"])
+    assert blob.get(1) == "zweite Zeile é"
+
+    blob.save(np.arange(2))
+    assert blob.disk_rows == 2
+    assert blob.take([1, 0]) == ["zweite Zeile é", "first"]
+    blob.close()
+
+def test_save_appends_in_place_when_every_row_is_kept(tmp_path):
+    path = tmp_path / "texts.bin"
+    blob = TextBlob(path)
+    blob.append(["a", "b"])
+    blob.save(np.arange(2))
+    inode = os.stat(path).st_ino
+
+    blob.append(["c"])
+    blob.save(np.arange(3))
+    assert os.stat(path).st_ino == inode
+    assert blob.take([0, 1, 2]) == ["a", "b", "c"]
+    blob.close()
+
+    reopened = TextBlob(path)
+    assert reopened.take([0, 1, 2]) == ["a", "b", "c"]
+    reopened.close()
+
+def test_save_compacts_when_rows_are_dropped(tmp_path):
+    path = tmp_path / "texts.bin"
+    blob = TextBlob(path)
+    blob.append(["a", "bb", "ccc"])
+    blob.save(np.arange(3))
+    blob.append(["dddd"])
+
+    blob.save(np.array([0, 2, 3]))
+    assert len(blob) == 3
+    assert blob.take([0, 1, 2]) == ["a", "ccc", "dddd"]
+    assert path.stat().st_size == len("acccdddd")
+    blob.close()
+
+def test_rows_beyond_the_limit_are_ignored_and_overwritten(tmp_path):
+    path = tmp_path / "texts.bin"
+    blob = TextBlob(path)
+    blob.append(["a", "b", "leftover"])
+    blob.save(np.arange(3))
+    blob.close()
+
+    # The sidecar of an interrupted checkpoint only lists two rows
+    blob = TextBlob(path, rows=2)
+    assert len(blob) == 2
+    blob.append(["c"])
+    blob.save(np.arange(3))
+    assert blob.take([0, 1, 2]) == ["a", "b", "c"]
+    blob.close()